@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+from typing import Self, Callable
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from modules.books import Book, BookStatus, BookStorage, BookSearchConditionBase, DefaultBookSearchCondition
+from modules.events import Event, WeakSubscriber
+
+from modules.menu.replay import ReplayMenuHost, RandomSession
+
+from menus.BooksListMenu import LibraryManagerBooksListMenu
+from menus.RootMenu import LibraryManagerRootMenu
+
+from benchmarks.catalogue import build_storage, generate_books, TITLE_WORDS
+
+class BenchmarkContext:
+    '''
+    Общие для всех замеров данные одного размера каталога.
+    Хранилище и файл БД создаются один раз при первом обращении.
+    '''
+    def __init__(self, size: int, seed: int, workdir: str) -> None:
+        '''
+        size : int -- число книг в каталоге.
+        seed : int -- зерно генератора каталога.
+        workdir : str -- каталог для временных файлов.
+        '''
+        self.size = size
+        self.seed = seed
+        self.workdir = workdir
+        self._storage : BookStorage | None = None
+        self._db_path : str | None = None
+
+    @property
+    def storage(self: Self) -> BookStorage:
+        '''Хранилище с синтетическим каталогом'''
+        if self._storage is None:
+            self._storage = build_storage(self.size, self.path('database.json'), self.seed)
+        return self._storage
+
+    @property
+    def db_path(self: Self) -> str:
+        '''Путь до сохранённого на диск синтетического каталога'''
+        if self._db_path is None:
+            self.storage.save_to_disk()
+            self._db_path = self.path('database.json')
+        return self._db_path
+
+    def path(self: Self, name: str) -> str:
+        '''Путь до временного файла с указанным именем'''
+        return os.path.join(self.workdir, f'{self.size}-{name}')
+
+type BenchmarkSetup = Callable[[BenchmarkContext], Callable[[], object]]
+'''Подготовка замера: получает контекст и возвращает замеряемую функцию'''
+
+BENCHMARKS : dict[str, BenchmarkSetup] = {}
+'''Все замеры по имени'''
+
+def benchmark(name: str) -> Callable[[BenchmarkSetup], BenchmarkSetup]:
+    '''Декоратор, регистрирующий подготовку замера под указанным именем'''
+    def register(setup: BenchmarkSetup) -> BenchmarkSetup:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+@benchmark('storage.save_to_disk')
+def _save_to_disk(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    return storage.save_to_disk
+
+@benchmark('storage.load_from_disk')
+def _load_from_disk(ctx: BenchmarkContext) -> Callable[[], object]:
+    path = ctx.db_path
+    return lambda: BookStorage.load_from_disk(path)
+
+@benchmark('storage.load_from_disk.serial')
+def _load_from_disk_serial(ctx: BenchmarkContext) -> Callable[[], object]:
+    #для сравнения с параллельным разбором, который по умолчанию включается на больших файлах и машинах с несколькими ядрами
+    path = ctx.db_path
+    return lambda: BookStorage.load_from_disk(path, workers=1)
+
+@benchmark('storage.load_from_disk.parallel')
+def _load_from_disk_parallel(ctx: BenchmarkContext) -> Callable[[], object]:
+    #параллельный разбор независимо от размера файла и числа ядер
+    path = ctx.db_path
+    workers = max(2, os.cpu_count() or 1)
+    return lambda: BookStorage.load_from_disk(path, workers=workers)
+
+@benchmark('storage.load_from_disk.lazy')
+def _load_from_disk_lazy(ctx: BenchmarkContext) -> Callable[[], object]:
+    #ленивая загрузка с уже построенным индексом смещений и обращение к одной странице списка
+    path = ctx.db_path
+    BookStorage.load_from_disk(path, lazy=True)
+    def run() -> object:
+        storage = BookStorage.load_from_disk(path, lazy=True)
+        books = storage.all_books()
+        return [books[i] for i in range(min(10, len(books)))]
+    return run
+
+CODEC_EXTENSIONS = {'gzip': '.gz', 'lzma': '.xz', 'bz2': '.bz2'}
+'''Расширения файлов БД для замеров сохранения и загрузки со сжатием'''
+
+def _register_codec_benchmarks(codec: str, extension: str) -> None:
+    '''Зарегистрировать замеры сохранения и загрузки БД со сжатием codec'''
+    @benchmark(f'storage.save_to_disk.{codec}')
+    def _save(ctx: BenchmarkContext) -> Callable[[], object]:
+        storage = ctx.storage
+        path = ctx.path(f'database.json{extension}')
+        return lambda: storage.save_to_disk(path)
+
+    @benchmark(f'storage.load_from_disk.{codec}')
+    def _load(ctx: BenchmarkContext) -> Callable[[], object]:
+        path = ctx.path(f'database.json{extension}')
+        ctx.storage.save_to_disk(path)
+        return lambda: BookStorage.load_from_disk(path)
+
+for _codec, _extension in CODEC_EXTENSIONS.items():
+    _register_codec_benchmarks(_codec, _extension)
+
+@benchmark('storage.find_books.title_substring')
+def _find_by_title(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    return lambda: storage.find_books(DefaultBookSearchCondition().by_title_substring('МИР'))
+
+class _FullmatchTitleCondition(BookSearchConditionBase):
+    '''Условие на название без анализа выражения: fullmatch для каждой книги'''
+    def __init__(self, pattern: re.Pattern[str]) -> None:
+        self._pattern = pattern
+
+    def matches(self: Self, book: Book) -> bool:
+        return self._pattern.fullmatch(book.title) is not None
+
+def _register_regex_benchmarks(name: str, pattern: re.Pattern[str]) -> None:
+    '''Зарегистрировать поиск по регулярному выражению и его замер без анализа выражения для сравнения'''
+    @benchmark(f'storage.find_books.{name}')
+    def _find(ctx: BenchmarkContext) -> Callable[[], object]:
+        storage = ctx.storage
+        return lambda: storage.find_books(DefaultBookSearchCondition().by_title(pattern))
+
+    @benchmark(f'storage.find_books.{name}.fullmatch')
+    def _find_fullmatch(ctx: BenchmarkContext) -> Callable[[], object]:
+        storage = ctx.storage
+        return lambda: storage.find_books(_FullmatchTitleCondition(pattern))
+
+#выражение вида .*x.* заменяется проверкой вхождения, а во втором выражении обязательная подстрока отсекает книги до fullmatch
+_register_regex_benchmarks('title_regex', re.compile('.*мир.*'))
+_register_regex_benchmarks('title_regex_literal', re.compile('.*мастер.*маргарита.*'))
+
+@benchmark('storage.find_books.author_substring')
+def _find_by_author(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    return lambda: storage.find_books(DefaultBookSearchCondition().by_author_substring('толстой'))
+
+@benchmark('storage.find_books.year')
+def _find_by_year(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    return lambda: storage.find_books(DefaultBookSearchCondition().by_year(1900))
+
+@benchmark('storage.find_books.year_range')
+def _find_by_year_range(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    return lambda: storage.find_books(DefaultBookSearchCondition().by_year_range(1900, 1909).by_status(BookStatus.loaned))
+
+@benchmark('storage.find_books.status')
+def _find_by_status(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    return lambda: storage.find_books(DefaultBookSearchCondition().by_status(BookStatus.loaned))
+
+@benchmark('storage.complete_title.short_prefix')
+def _complete_title(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    return lambda: storage.complete_title('м')
+
+class _Subscriber:
+    def on_event(self: Self, _: object) -> None:
+        pass
+
+@benchmark('event.call')
+def _event_call(ctx: BenchmarkContext) -> Callable[[], object]:
+    #событие с одним подписчиком на каждые 1000 книг - как открытые списки книг, подписанные на удаление
+    event = Event[object]()
+    subscribers = [_Subscriber() for _ in range(max(1, ctx.size // 1000))]
+    for sub in subscribers:
+        event += WeakSubscriber(sub.on_event)
+    def call() -> object:
+        for _ in range(1000):
+            event(None)
+        return subscribers
+    return call
+
+@benchmark('books_list_menu.entries')
+def _books_list_entries(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    books = storage.all_books()
+    def render() -> object:
+        menu = LibraryManagerBooksListMenu(storage, books)
+        for _ in range(100):
+            menu.entries
+        return menu
+    return render
+
+@benchmark('books_list_menu.delete')
+def _books_list_delete(ctx: BenchmarkContext) -> Callable[[], object]:
+    #удаление меняет хранилище, поэтому для замера нужно отдельное хранилище на каждый вызов
+    def delete() -> object:
+        storage = build_storage(ctx.size, ctx.path('delete.json'), ctx.seed)
+        books = storage.all_books()
+        menu = LibraryManagerBooksListMenu(storage, list(books))
+        for book in books[:1000]:
+            storage.remove_book(book)
+            menu.entries
+        return menu
+    return delete
+
+@benchmark('books_list_menu.delete_bulk')
+def _books_list_delete_bulk(ctx: BenchmarkContext) -> Callable[[], object]:
+    #те же 1000 книг, что и в books_list_menu.delete, но одним вызовом remove_books
+    def delete() -> object:
+        storage = build_storage(ctx.size, ctx.path('delete.json'), ctx.seed)
+        books = storage.all_books()
+        menu = LibraryManagerBooksListMenu(storage, list(books))
+        storage.remove_books([book.id for book in books[:1000]])
+        menu.entries
+        return menu
+    return delete
+
+@benchmark('storage.import_books')
+def _import_books(ctx: BenchmarkContext) -> Callable[[], object]:
+    #10000 записей, каждая вторая повторяет более раннюю: проверка повтора по хэш-индексу не зависит от размера хранилища
+    records = [(title, author, year) for title, author, year, _ in generate_books(5000, ctx.seed + 1)] * 2
+    def run() -> object:
+        storage = BookStorage(ctx.path('import.json'))
+        return storage.import_books(records)
+    return run
+
+@benchmark('storage.duplicate_groups')
+def _duplicate_groups(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    return storage.duplicate_groups
+
+@benchmark('storage.search_keywords')
+def _search_keywords(ctx: BenchmarkContext) -> Callable[[], object]:
+    storage = ctx.storage
+    #индекс строится при первом поиске, замеряются только запросы к нему
+    storage.search_keywords('мир')
+    query = ' '.join(TITLE_WORDS[:3])
+    return lambda: storage.search_keywords(query)
+
+@benchmark('menu.random_session')
+def _random_session(ctx: BenchmarkContext) -> Callable[[], object]:
+    #сессия меняет каталог, поэтому использует отдельное хранилище
+    storage = build_storage(ctx.size, ctx.path('session.json'), ctx.seed)
+    def replay() -> object:
+        host = ReplayMenuHost(RandomSession(1000, ctx.seed, TITLE_WORDS, ctx.size), restart=True)
+        host.run(LibraryManagerRootMenu(storage))
+        return host
+    return replay
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@benchmark('startup.time_to_first_prompt')
+def _time_to_first_prompt(ctx: BenchmarkContext) -> Callable[[], object]:
+    #приложение запускается в отдельном каталоге с копией БД, замер идёт до появления приглашения ввода
+    workdir = ctx.path('startup')
+    os.makedirs(workdir, exist_ok=True)
+    shutil.copyfile(ctx.db_path, os.path.join(workdir, 'database.json'))
+    env = dict(os.environ, PYTHONPATH=_REPO_ROOT)
+    prompt = 'Введите номер пункта'.encode()
+
+    def start() -> object:
+        process = subprocess.Popen([sys.executable, os.path.join(_REPO_ROOT, 'main.py')], cwd=workdir, env=env,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        assert process.stdout is not None
+        output = b''
+        try:
+            while prompt not in output:
+                chunk = os.read(process.stdout.fileno(), 4096)
+                if len(chunk) == 0:
+                    raise RuntimeError('приложение завершилось до приглашения ввода')
+                output += chunk
+        finally:
+            #SIGKILL, чтобы не ждать окончания загрузки и сохранения БД
+            process.kill()
+            process.wait()
+        return output
+    return start
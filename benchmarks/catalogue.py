@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Iterator
+import random
+
+from modules.books import BookStatus, BookStorage
+
+_FIRST_NAMES = [
+    'Лев', 'Фёдор', 'Антон', 'Александр', 'Михаил', 'Иван', 'Николай', 'Анна', 'Марина', 'Борис',
+    'Сергей', 'Владимир', 'Ольга', 'Татьяна', 'Юрий', 'Leo', 'Jane', 'Charles', 'Mark', 'Ernest',
+    'George', 'Virginia', 'Agatha', 'Arthur', 'Franz'
+]
+
+_LAST_NAMES = [
+    'Толстой', 'Достоевский', 'Чехов', 'Пушкин', 'Булгаков', 'Тургенев', 'Гоголь', 'Ахматова', 'Цветаева', 'Пастернак',
+    'Есенин', 'Набоков', 'Берггольц', 'Толстая', 'Лермонтов', 'Tolstoy', 'Austen', 'Dickens', 'Twain', 'Hemingway',
+    'Orwell', 'Woolf', 'Christie', 'Doyle', 'Kafka'
+]
+
+TITLE_WORDS = [
+    'война', 'мир', 'преступление', 'наказание', 'мастер', 'маргарита', 'отцы', 'дети', 'мёртвые', 'души',
+    'вишнёвый', 'сад', 'тихий', 'дон', 'белая', 'гвардия', 'герой', 'нашего', 'времени', 'записки',
+    'идиот', 'бесы', 'братья', 'сердце', 'собачье', 'pride', 'prejudice', 'old', 'man', 'sea',
+    'great', 'expectations', 'castle', 'trial', 'hound', 'farm', 'lighthouse', 'murder', 'orient', 'express'
+]
+
+def generate_books(count: int, seed: int = 42) -> Iterator[tuple[str, str, int, BookStatus]]:
+    '''
+    Генерирует синтетические данные книг (название, автор, год, статус) с фиксированным зерном.
+    Авторы распределены неравномерно: небольшое число авторов пишет большую часть книг.
+
+    Аргументы:
+    count : int -- число книг.
+    seed : int -- зерно генератора случайных чисел.
+    '''
+    rng = random.Random(seed)
+    authors = [f'{first} {last}' for first in _FIRST_NAMES for last in _LAST_NAMES]
+    #вес автора обратно пропорционален его номеру (закон Ципфа)
+    weights = [1 / (i + 1) for i in range(len(authors))]
+    for _ in range(count):
+        words = rng.choices(TITLE_WORDS, k=rng.randint(1, 4))
+        title = ' '.join(words).capitalize()
+        author = rng.choices(authors, weights)[0]
+        year = rng.randint(1800, 2024)
+        status = BookStatus.loaned if rng.random() < 0.2 else BookStatus.in_storage
+        yield title, author, year, status
+
+def build_storage(count: int, path: str, seed: int = 42) -> BookStorage:
+    '''
+    Создаёт хранилище с count синтетическими книгами (см. generate_books).
+
+    Аргументы:
+    count : int -- число книг.
+    path : str -- путь до файла хранилища.
+    seed : int -- зерно генератора случайных чисел.
+    '''
+    storage = BookStorage(path)
+    for title, author, year, status in generate_books(count, seed):
+        book = storage.new_book(title, author, year)
+        if status != BookStatus.in_storage:
+            storage.set_status(book, status)
+    return storage
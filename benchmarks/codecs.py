@@ -0,0 +1,61 @@
+'''
+Сравнение размера файла БД и времени сохранения/загрузки для каждого формата сжатия.
+
+Пример:
+python -m benchmarks.codecs --sizes 100000 --output codecs.json
+'''
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from modules.books import BookStorage
+
+from benchmarks.catalogue import build_storage
+from benchmarks.cases import CODEC_EXTENSIONS
+
+def compare_codecs(size: int, seed: int, workdir: str) -> dict[str, dict[str, float]]:
+    '''
+    Сохранить и загрузить каталог из size книг в каждом формате.
+    Возвращает для каждого формата размер файла в байтах и время сохранения и загрузки в секундах.
+    '''
+    storage = build_storage(size, os.path.join(workdir, 'database.json'), seed)
+    results : dict[str, dict[str, float]] = {}
+    for codec, extension in {'json': '', **CODEC_EXTENSIONS}.items():
+        path = os.path.join(workdir, f'{size}-database.json{extension}')
+
+        start = time.perf_counter()
+        storage.save_to_disk(path)
+        save_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        BookStorage.load_from_disk(path)
+        load_s = time.perf_counter() - start
+
+        results[codec] = {'file_bytes': os.path.getsize(path), 'save_s': save_s, 'load_s': load_s}
+        print(f'{size:>10} {codec:<6} {results[codec]["file_bytes"]:>12} байт, сохранение {save_s:.3f} s, загрузка {load_s:.3f} s', file=sys.stderr)
+    return results
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Сравнение форматов сжатия файла БД.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000], help='размеры каталога (число книг)')
+    parser.add_argument('--seed', type=int, default=42, help='зерно генератора каталога')
+    parser.add_argument('--output', help='файл для сохранения результатов в формате JSON')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {str(size): compare_codecs(size, args.seed, workdir) for size in args.sizes}
+
+    encoded = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output is None:
+        print(encoded)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(encoded)
+
+if __name__ == '__main__':
+    main()
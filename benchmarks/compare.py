@@ -0,0 +1,56 @@
+'''
+Сравнение двух файлов результатов benchmarks.run.
+
+Пример:
+python -m benchmarks.compare baseline.json results.json --threshold 1.2
+Завершается с кодом 1, если какой-либо замер стал медленнее более чем в threshold раз.
+'''
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+def compare(baseline: dict[str, object], current: dict[str, object], threshold: float) -> list[str]:
+    '''
+    Сравнить результаты и вывести таблицу отношений времени current/baseline.
+    Возвращает список регрессий в виде строк "размер замер".
+    '''
+    regressions : list[str] = []
+    base_results : dict[str, dict[str, dict[str, float]]] = baseline['results'] # type: ignore
+    cur_results : dict[str, dict[str, dict[str, float]]] = current['results'] # type: ignore
+
+    for size, cases in cur_results.items():
+        for name, result in cases.items():
+            base = base_results.get(size, {}).get(name)
+            if base is None:
+                print(f'{size:>10} {name:<45} новый замер')
+                continue
+            ratio = result['min_s'] / base['min_s'] if base['min_s'] > 0 else float('inf')
+            line = f'{size:>10} {name:<45} {base["min_s"]:.6f} -> {result["min_s"]:.6f} s (x{ratio:.2f})'
+            if 'peak_bytes' in result and 'peak_bytes' in base:
+                line += f', память {base["peak_bytes"]} -> {result["peak_bytes"]} байт'
+            if ratio > threshold:
+                line += ' РЕГРЕССИЯ'
+                regressions.append(f'{size} {name}')
+            print(line)
+
+    return regressions
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Сравнение результатов бенчмарков.')
+    parser.add_argument('baseline', help='файл с базовыми результатами')
+    parser.add_argument('current', help='файл с новыми результатами')
+    parser.add_argument('--threshold', type=float, default=1.2, help='допустимое отношение времени нового замера к базовому')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    if len(compare(baseline, current, args.threshold)) > 0:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+'''
+Нагрузочное воспроизведение сессий меню на синтетическом каталоге: записанной сессии (см. LIBRARY_RECORD_SESSION) или случайной.
+Выводит число действий, пропускную способность и перцентили времени каждого действия меню.
+
+Примеры:
+python -m benchmarks.replay --size 1000000 --random 10000
+python -m benchmarks.replay --size 100000 --session session.jsonl --output report.json
+'''
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+
+from modules.menu.replay import ReplayMenuHost, RecordedSession, RandomSession, SessionSourceBase
+from menus.RootMenu import LibraryManagerRootMenu
+
+from benchmarks.catalogue import build_storage, TITLE_WORDS
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Воспроизведение сессий меню на синтетическом каталоге.')
+    parser.add_argument('--size', type=int, default=100000, help='размер каталога (число книг)')
+    parser.add_argument('--seed', type=int, default=42, help='зерно генератора каталога и случайной сессии')
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument('--session', help='файл записанной сессии')
+    source_group.add_argument('--random', type=int, help='число действий случайной сессии')
+    parser.add_argument('--output', help='файл для сохранения отчёта в формате JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        storage = build_storage(args.size, os.path.join(workdir, 'database.json'), args.seed)
+        source : SessionSourceBase
+        if args.session is not None:
+            source = RecordedSession(args.session)
+        else:
+            source = RandomSession(args.random, args.seed, TITLE_WORDS, args.size)
+        #случайная сессия может закрыть корневое меню раньше, чем закончатся действия
+        host = ReplayMenuHost(source, restart=args.random is not None)
+        host.run(LibraryManagerRootMenu(storage))
+
+    report = json.dumps(host.report(), indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+    print(report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+'''
+Запуск бенчмарков горячих путей на синтетическом каталоге.
+
+Пример:
+python -m benchmarks.run --sizes 10000 1000000 --output results.json
+'''
+from __future__ import annotations
+
+from typing import Callable
+import argparse
+import datetime
+import fnmatch
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.cases import BENCHMARKS, BenchmarkContext
+
+def measure_time(func: Callable[[], object], repeat: int) -> list[float]:
+    '''Замерить время repeat вызовов func в секундах'''
+    timings : list[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def measure_peak_memory(func: Callable[[], object]) -> int:
+    '''Замерить пиковый объём памяти, выделенной во время вызова func, в байтах'''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run(sizes: list[int], patterns: list[str], repeat: int, seed: int, memory: bool) -> dict[str, object]:
+    '''
+    Выполнить замеры с именами, подходящими под patterns, для каждого размера каталога.
+    Возвращает json-совместимый словарь с результатами.
+    '''
+    names = [name for name in BENCHMARKS if any(fnmatch.fnmatch(name, p) for p in patterns)]
+    results : dict[str, dict[str, dict[str, object]]] = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            ctx = BenchmarkContext(size, seed, workdir)
+            results[str(size)] = {}
+            for name in names:
+                func = BENCHMARKS[name](ctx)
+                timings = measure_time(func, repeat)
+                result : dict[str, object] = {
+                    'min_s': min(timings),
+                    'median_s': statistics.median(timings),
+                    'repeat': repeat
+                }
+                if memory:
+                    result['peak_bytes'] = measure_peak_memory(func)
+                results[str(size)][name] = result
+                print(f'{size:>10} {name:<45} {result["min_s"]:.6f} s', file=sys.stderr)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'date': datetime.datetime.now().isoformat(timespec='seconds')
+        },
+        'results': results
+    }
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Бенчмарки хранилища, поиска, сохранения и меню.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000], help='размеры каталога (число книг)')
+    parser.add_argument('--only', nargs='+', default=['*'], help='шаблоны имён замеров (fnmatch)')
+    parser.add_argument('--repeat', type=int, default=5, help='число повторов каждого замера')
+    parser.add_argument('--seed', type=int, default=42, help='зерно генератора каталога')
+    parser.add_argument('--no-memory', action='store_true', help='не замерять пиковую память')
+    parser.add_argument('--output', help='файл для сохранения результатов в формате JSON')
+    parser.add_argument('--list', action='store_true', help='вывести имена замеров и выйти')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return
+
+    results = run(args.sizes, args.only, args.repeat, args.seed, not args.no_memory)
+    encoded = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output is None:
+        print(encoded)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(encoded)
+
+if __name__ == '__main__':
+    main()
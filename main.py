@@ -1,30 +1,106 @@
 from __future__ import annotations
 
-import traceback
+from typing import TYPE_CHECKING
+import os
+import signal
 
 from modules.menu.hosts import SimpleConsoleMenuHost
+from modules.loader import BackgroundStorageLoader
+from modules.autosave import AutosaveService
 from modules.books import BookStorage
+from modules import metrics
 from menus.RootMenu import LibraryManagerRootMenu
 
-host = SimpleConsoleMenuHost()
+if TYPE_CHECKING:
+    from modules.menu.replay import SessionRecorder
+    from modules.changefeed import ChangeFeed, ChangeFeedServer
 
-db_path = './database.json'
+def main() -> None:
+    #действия пользователя записываются в файл сессии, если задан путь до него (см. benchmarks.replay)
+    session_path = os.environ.get('LIBRARY_RECORD_SESSION')
+    recorder : SessionRecorder | None = None
+    if session_path:
+        from modules.menu.replay import SessionRecorder
+        recorder = SessionRecorder(session_path)
+    host = SimpleConsoleMenuHost(recorder=recorder)
 
-try:
-    storage = BookStorage.load_from_disk(db_path)
-except Exception:
-    host.message(traceback.format_exc())
-    host.message('Не удалось загрузить БД с диска, создаём новую БД.')
-    storage = BookStorage(db_path)
+    db_path = './database.json'
 
-def on_exit(*args: object)-> None:
-    storage.save_to_disk()
+    #сбор метрик включается переменной окружения с путём до файла, в который метрики записываются при выходе и по SIGUSR1
+    metrics_path = os.environ.get('LIBRARY_METRICS')
+    if metrics_path:
+        metrics.enable()
+        metrics.install_dump_signal(metrics_path)
 
-import signal
-signal.signal(signal.SIGTERM, on_exit)
-signal.signal(signal.SIGABRT, on_exit)
+    #БД загружается в фоне, корневое меню доступно сразу
+    #при ленивой загрузке книги создаются из файла только при обращении к ним, в памяти хранятся последние LIBRARY_LAZY_CACHE книг
+    lazy = os.environ.get('LIBRARY_LAZY_LOAD', '') not in ('', '0')
+    loader = BackgroundStorageLoader(db_path, lazy, int(os.environ.get('LIBRARY_LAZY_CACHE', 10000)))
+
+    #лента изменений для внешних потребителей пишется в файл и (или) передаётся через Unix-сокет, если заданы пути до них
+    feed_path = os.environ.get('LIBRARY_CHANGE_FEED')
+    feed_socket = os.environ.get('LIBRARY_CHANGE_FEED_SOCKET')
+    feed : ChangeFeed | None = None
+    feed_server : ChangeFeedServer | None = None
+
+    def start_change_feed(storage: BookStorage) -> None:
+        #подписка происходит до того, как хранилище станет доступно меню, поэтому ни одно изменение не будет пропущено
+        nonlocal feed, feed_server
+        from modules.changefeed import ChangeFeed, ChangeFeedServer
+        feed = ChangeFeed(storage, feed_path)
+        if feed_socket:
+            feed_server = ChangeFeedServer(feed, feed_socket).start()
+
+    if feed_path or feed_socket:
+        loader.loaded_event += start_change_feed
+    loader.start()
+
+    #изменения сохраняются в фоне, когда их не было autosave_interval секунд, но не реже чем раз в autosave_max_delay секунд
+    autosave_interval = float(os.environ.get('LIBRARY_AUTOSAVE_INTERVAL', 5))
+    autosave_max_delay = float(os.environ.get('LIBRARY_AUTOSAVE_MAX_DELAY', 30))
+    autosave = AutosaveService(loader, autosave_interval, autosave_max_delay).start()
+
+    #выполняется ли уже завершение (on_exit)
+    exiting = False
+
+    def on_exit()-> None:
+        #on_exit вызывается один раз, даже если во время завершения пришёл сигнал
+        nonlocal exiting
+        if exiting:
+            return
+        exiting = True
+        autosave.stop()
+        #сохраняем только после окончания загрузки, иначе файл БД будет перезаписан неполными данными
+        storage = loader.result()
+        error = loader.take_error()
+        if error is not None:
+            host.message(error)
+            host.message('Не удалось загрузить БД с диска, создаём новую БД.')
+        storage.save_to_disk()
+        if feed_server is not None:
+            feed_server.stop()
+        if feed is not None:
+            feed.close()
+        reg = metrics.registry()
+        if metrics_path and reg is not None:
+            reg.dump(metrics_path)
+        if recorder is not None:
+            recorder.close()
+
+    def on_signal(signum: int, frame: object) -> None:
+        #обработчик только прерывает основной поток, а сохранение выполняется в блоке finally ниже.
+        #сигнал во время сохранения игнорируется, иначе повторное сохранение в том же потоке ждало бы само себя
+        if not exiting:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGABRT, on_signal)
+
+    try:
+        host.run(LibraryManagerRootMenu(loader))
+    finally:
+        on_exit()
 
-try:
-    host.run(LibraryManagerRootMenu(storage))
-finally:
-    on_exit()
\ No newline at end of file
+#дочерние процессы параллельной загрузки БД импортируют этот модуль, поэтому приложение запускается только при запуске модуля
+if __name__ == '__main__':
+    main()
@@ -59,7 +59,7 @@ class BookMenu(MenuBase):
         '''
         Изменить статус связанной книги на указанный
         '''
-        self._book.status = status
+        self._storage.set_status(self._book, status)
 
     def __delete_book(self: Self, host: MenuHostBase) -> None:
         '''
@@ -5,34 +5,113 @@ from typing import Self
 from modules.menu.static import StaticMenuEntry, MenuEntryBack
 from modules.menu.core import MenuBase, MenuEntryBase, MenuHostBase
 
-from modules.books import Book, BookStorage
+from modules.books import Book, BookStatus, BookStorage
+from modules.lazy_load import LazyBookList
 
-from modules.menu.input import converter_int, validator_int_range
+from modules.menu.input import converter_int, converter_string, validator_int_range, validator_always
 from modules.events import WeakSubscriber
 
 import math
 
 from menus.BookMenu import book_status_to_string, BookMenu
 
+class _FenwickTree:
+    '''
+    Дерево Фенвика над флагами "книга на позиции ещё не удалена".
+    Позволяет за O(log n) удалить позицию и найти позицию k-й оставшейся книги.
+    '''
+    def __init__(self, size: int) -> None:
+        #построение за O(n): каждая позиция изначально содержит одну книгу
+        self._tree = [0] * (size + 1)
+        for i in range(1, size + 1):
+            self._tree[i] += 1
+            parent = i + (i & -i)
+            if parent <= size:
+                self._tree[parent] += self._tree[i]
+
+    def remove(self: Self, position: int) -> None:
+        '''Отметить позицию как удалённую'''
+        i = position + 1
+        while i < len(self._tree):
+            self._tree[i] -= 1
+            i += i & -i
+
+    def find(self: Self, k: int) -> int:
+        '''Позиция k-й (с нуля) оставшейся книги'''
+        position = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step > 0:
+            nxt = position + step
+            if nxt < len(self._tree) and self._tree[nxt] <= k:
+                position = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return position
+
+class BookListEntry(MenuEntryBase):
+    '''
+    Пункт списка книг, открывающий меню управления книгой.
+    Текст формируется при отображении, поэтому всегда отражает текущий статус книги.
+    '''
+    def __init__(self, storage: BookStorage, book: Book) -> None:
+        super().__init__()
+        self._storage = storage
+        self._book = book
+
+    @MenuEntryBase.text.getter
+    def text(self: Self) -> str:
+        book = self._book
+        return f'{book.title} ({book.author}) [{book.year} г.] - {book_status_to_string(book.status)} (ID: {book.id})'
+
+    def on_selected(self: Self, host: MenuHostBase) -> None:
+        host.push(BookMenu(self._storage, self._book))
+
 class LibraryManagerBooksListMenu(MenuBase):
     '''
-    Меню, отображающее список книг с поддержкой пагинации
+    Меню, отображающее список книг с поддержкой пагинации.
+    Пункты создаются только для текущей страницы и кэшируются до смены страницы, её размера или удаления книги с этой (или предыдущей) страницы.
     '''
-    def __init__(self, storage: BookStorage, books : list[Book]) -> None:
+    def __init__(self, storage: BookStorage, books : list[Book] | LazyBookList, bulk_actions: bool = False) -> None:
         '''
         storage : BookStorage -- хранилище, книги из которого отображаются.
-        books : list[Book] -- список книг, которые необходимо отобразить.
+        books : list[Book] | LazyBookList -- список книг, которые необходимо отобразить. Меню изменяет этот список при удалении книг.
+        bulk_actions : bool -- добавить ли пункты для смены статуса и удаления сразу всех книг списка (например, для результатов поиска).
         '''
-        self._books = books
+        self._books : list[Book | None] | LazyBookList = books # type: ignore
+        '''Книги списка. Удалённые книги заменяются на None до уплотнения списка.'''
+        self._live_count = len(books)
         self._storage = storage
         self.__currentPage = 0
         self._pageSize = 10
 
-        storage.book_deleted_event += WeakSubscriber(self.__on_book_deleted)
+        #структуры для удаления строятся при первом удалении, чтобы не обходить весь список при открытии меню
+        self._positions : dict[int, int] | None = None
+        '''Позиция книги в self._books по её ID'''
+        self._alive : _FenwickTree | None = None
+
+        self._page_cache : list[MenuEntryBase] | None = None
+        self._page_cache_key : tuple[int, int] = (-1, -1)
+        '''Страница и её размер, для которых построен кэш'''
+        self._page_cache_last = -1
+        '''Позиция в self._books последней книги закэшированной страницы'''
+
+        self._change_page_size_entry = StaticMenuEntry('Изменить размер страницы', self.__change_page_size)
+        self._next_page_entry = StaticMenuEntry('Следующая страница', self.__next_page)
+        self._previous_page_entry = StaticMenuEntry('Предыдущая страница', self.__previous_page)
+        self._back_entry = MenuEntryBack()
+        self._bulk_entries : list[MenuEntryBase] = []
+        if bulk_actions:
+            self._bulk_entries = [
+                StaticMenuEntry("Изменить статус всех книг списка на 'Выдана'", lambda host: self.__set_all_status(host, BookStatus.loaned)),
+                StaticMenuEntry("Изменить статус всех книг списка на 'В наличии'", lambda host: self.__set_all_status(host, BookStatus.in_storage)),
+                StaticMenuEntry('Удалить все книги списка', self.__delete_all)
+            ]
+
+        storage.books_deleted_event += WeakSubscriber(self.__on_books_deleted)
 
     @MenuBase.text.getter
     def text(self: Self) -> str:
-        if len(self._books) < 1:
+        if self._live_count < 1:
             return 'Нет книг.'
         return f'Страница {self._current_page + 1}/{ self._page_count }'
 
@@ -40,34 +119,106 @@ class LibraryManagerBooksListMenu(MenuBase):
     def entries(self: Self) -> list[MenuEntryBase]:
         entries : list[MenuEntryBase] = []
 
-        if len(self._books) > 0:
+        if self._live_count > 0:
             #Добавить опцию изменения размера страницы, если есть книги
-            entries.append(StaticMenuEntry('Изменить размер страницы', self.__change_page_size))
+            entries.append(self._change_page_size_entry)
 
             #Добавить опцию перехода на следующую страницу, если не на последней странице
-            if (self._current_page + 1) * self._pageSize < len(self._books):
-                entries.append(StaticMenuEntry('Следующая страница', self.__next_page))
+            if (self._current_page + 1) * self._pageSize < self._live_count:
+                entries.append(self._next_page_entry)
 
             #Добавить опцию перехода на предыдущую страницу, если не на первой странице
             if self._current_page > 0:
-                entries.append(StaticMenuEntry('Предыдущая страница', self.__previous_page))
+                entries.append(self._previous_page_entry)
+
+            #Добавить опции, применяемые ко всем книгам списка, если они включены
+            entries.extend(self._bulk_entries)
 
             #Добавить все книги текущей страницы как пункты, открывающие меню управления каждой книгой
-            for i in range(self._current_page * self._pageSize, min((self._current_page + 1) * self._pageSize, len(self._books))):
-                book = self._books[i]
-                entries.append(StaticMenuEntry(f'{book.title} ({book.author}) [{book.year} г.] - {book_status_to_string(book.status)} (ID: {book.id})', lambda host, book=book: host.push(BookMenu(self._storage, book))))
+            entries.extend(self._page_entries())
 
         #Добавить опцию перехода к предыдущему меню
-        entries.append(MenuEntryBack())
+        entries.append(self._back_entry)
 
         return entries
 
-    def __on_book_deleted(self: Self, book: Book) -> None:
-        try:
-            self._books.remove(book)
-        except:
-            #ничего не делать, книги просто не было
-            pass
+    def _page_entries(self: Self) -> list[MenuEntryBase]:
+        '''Пункты книг текущей страницы (из кэша, если он актуален)'''
+        key = (self._current_page, self._pageSize)
+        if self._page_cache is not None and self._page_cache_key == key:
+            return self._page_cache
+
+        entries : list[MenuEntryBase] = []
+        first = self._current_page * self._pageSize
+        position = first if self._alive is None else self._alive.find(first)
+        last = position
+        while len(entries) < self._pageSize and position < len(self._books):
+            book = self._books[position]
+            if book is not None:
+                entries.append(BookListEntry(self._storage, book))
+                last = position
+            position += 1
+
+        self._page_cache = entries
+        self._page_cache_key = key
+        self._page_cache_last = last
+        return entries
+
+    def _ids(self: Self) -> list[int | None]:
+        '''ID книг списка по позициям (None на месте удалённых). Ленивый список отдаёт ID без загрузки книг.'''
+        if isinstance(self._books, LazyBookList):
+            return self._books.ids()
+        return [b.id if b is not None else None for b in self._books]
+
+    def _live_ids(self: Self) -> list[int]:
+        '''ID книг списка без удалённых'''
+        return [id for id in self._ids() if id is not None]
+
+    def __on_books_deleted(self: Self, books: list[Book]) -> None:
+        if self._positions is None or self._alive is None:
+            ids = self._ids()
+            self._positions = {id: i for i, id in enumerate(ids) if id is not None}
+            self._alive = _FenwickTree(len(self._books))
+
+        for book in books:
+            position = self._positions.pop(book.id, None)
+            #ленивый список уже не найдёт удалённую книгу в хранилище, поэтому для него достаточно совпадения ID
+            if position is None or (not isinstance(self._books, LazyBookList) and self._books[position] is not book):
+                #ничего не делать, книги просто не было
+                continue
+
+            self._books[position] = None
+            self._alive.remove(position)
+            self._live_count -= 1
+
+            #удаление на текущей или предыдущей странице сдвигает книги текущей страницы
+            if position <= self._page_cache_last:
+                self._page_cache = None
+
+        #уплотнить список, когда удалённых больше, чем оставшихся
+        if self._live_count * 2 < len(self._books):
+            if isinstance(self._books, LazyBookList):
+                #ленивый список уплотняется по ID, без загрузки книг
+                self._books.compact()
+            else:
+                self._books[:] = [b for b in self._books if b is not None]
+            self._positions = None
+            self._alive = None
+            self._page_cache = None
+
+    def __set_all_status(self: Self, host: MenuHostBase, status: BookStatus) -> None:
+        '''Изменить статус всех книг списка'''
+        changed = self._storage.set_status_many(self._live_ids(), status)
+        host.message(f'Статус изменён у {len(changed)} книг.')
+
+    def __delete_all(self: Self, host: MenuHostBase) -> None:
+        '''Удалить все книги списка после подтверждения'''
+        answer = host.input(f'Удалить {self._live_count} книг? Введите "да" для подтверждения (или нажмите Ctrl + C для отмены): ', converter_string, validator_always, '')
+        if answer is None or answer.strip().lower() != 'да':
+            return
+        #список обновится через books_deleted_event
+        removed = self._storage.remove_books(self._live_ids())
+        host.message(f'Удалено {len(removed)} книг.')
 
     def __previous_page(self: Self, _: MenuHostBase) -> None:
         '''Перейти на предыдущую страницу, если не на первой странице.'''
@@ -76,18 +227,18 @@ class LibraryManagerBooksListMenu(MenuBase):
 
     def __next_page(self: Self, _: MenuHostBase) -> None:
         '''Перейти на следующую страницу, если не на последней странице'''
-        if self.__currentPage * self._pageSize < len(self._books):
+        if self.__currentPage * self._pageSize < self._live_count:
             self.__currentPage += 1
     
     @property
     def _page_count(self: Self) -> int:
         '''Число страниц с текущими настройками'''
-        return int(math.ceil(len(self._books) / self._pageSize))
+        return int(math.ceil(self._live_count / self._pageSize))
 
     @property
     def _current_page(self: Self) -> int:
         '''Текущая страница, ограниченная числом страниц.'''
-        self.__currentPage = min(self.__currentPage, self._page_count - 1)
+        self.__currentPage = max(0, min(self.__currentPage, self._page_count - 1))
         return self.__currentPage
 
     def __change_page_size(self: Self, host:MenuHostBase) -> None:
@@ -95,4 +246,4 @@ class LibraryManagerBooksListMenu(MenuBase):
         size = host.input('Введите желаемое число книг на странице (или нажмите Ctrl + C для отмены): ', converter_int, lambda x: validator_int_range(x, 1), 'Количество книг на странице должно быть целым числом не меньше 1!')
         if size is None:
             return
-        self._pageSize = size
\ No newline at end of file
+        self._pageSize = size
@@ -5,33 +5,121 @@ from typing import Self
 from modules.menu.static import StaticMenuEntry
 from modules.menu.core import MenuBase, MenuEntryBase, MenuHostBase
 
-from modules.books import BookStorage
+from modules.books import BookStatus, BookStorage
+from modules.loader import BackgroundStorageLoader
 
 from modules.menu.input import converter_string, converter_int, validator_string_not_empty, validator_always
 
-from menus.BooksListMenu import LibraryManagerBooksListMenu
-from menus.SearchMenu import LibraryManagerSearchMenu
-from menus.BookMenu import BookMenu
+#меню, открываемые из корневого меню, импортируются при первом открытии, чтобы не замедлять запуск приложения
 
 class LibraryManagerRootMenu(MenuBase):
     '''корневое меню приложения'''
-    def __init__(self, storage: BookStorage) -> None:
-        self._storage = storage
+    def __init__(self, storage: BookStorage | BackgroundStorageLoader) -> None:
+        '''
+        storage : BookStorage | BackgroundStorageLoader -- хранилище книг или загрузчик, который его загружает.
+                                                           Пока хранилище загружается, меню доступно, а действия с книгами ждут окончания загрузки.
+        '''
+        self._loader = storage if isinstance(storage, BackgroundStorageLoader) else None
+        self._loaded_storage = storage if isinstance(storage, BookStorage) else None
+        self._load_reported = self._loader is None
+        '''Показан ли пользователю результат загрузки БД'''
         self._entries : list[MenuEntryBase] = [
             StaticMenuEntry('Добавить книгу', self.__add_book),
             StaticMenuEntry('Найти книгу по ID', self.__find_book_by_id),
-            StaticMenuEntry('Список книг', lambda host: host.push(LibraryManagerBooksListMenu(self._storage, self._storage.all_books()))),
-            StaticMenuEntry('Поиск по книгам', lambda host: host.push(LibraryManagerSearchMenu(self._storage))),
+            StaticMenuEntry('Список книг', self.__open_books_list),
+            StaticMenuEntry('Выданные книги', self.__open_loaned_books_list),
+            StaticMenuEntry('Поиск по книгам', self.__open_search),
+            StaticMenuEntry('Поиск по ключевым словам', self.__search_keywords),
+            StaticMenuEntry('Статистика', self.__open_statistics),
             StaticMenuEntry('Выход', lambda host: host.pop())
         ]
 
     @MenuBase.text.getter
     def text(self: Self) -> str:
+        if self._loaded_storage is None and self._loader is not None and not self._loader.done:
+            return f'Выберите действие ({self.__loading_status()}):'
+        #ошибка загрузки или отсутствие файла БД показываются в первом выводе меню после окончания загрузки
+        report = self.__take_load_report()
+        if report is not None:
+            return f'{report}\nВыберите действие:'
         return 'Выберите действие:'
     
     @MenuBase.entries.getter
     def entries(self: Self) -> list[MenuEntryBase]:
         return self._entries
+
+    def __loading_status(self: Self) -> str:
+        '''Строка с прогрессом загрузки БД'''
+        assert self._loader is not None
+        loaded, total = self._loader.progress
+        if total == 0:
+            return 'БД загружается'
+        return f'БД загружается: {loaded * 100 // total}%'
+
+    def __take_load_report(self: Self) -> str | None:
+        '''Сообщение о результате загрузки БД, если загрузка завершилась ошибкой или файла БД не было. Возвращается один раз.'''
+        if self._load_reported or self._loader is None or not self._loader.done:
+            return None
+        self._load_reported = True
+        error = self._loader.take_error()
+        if error is not None:
+            return f'{error}\nНе удалось загрузить БД с диска, создаём новую БД.'
+        if self._loader.missing:
+            return 'Файл БД не найден, создаём новую БД.'
+        return None
+
+    def _storage(self: Self, host: MenuHostBase) -> BookStorage:
+        '''Хранилище книг. Если оно ещё загружается, ждёт окончания загрузки, показывая прогресс.'''
+        if self._loaded_storage is not None:
+            return self._loaded_storage
+
+        assert self._loader is not None
+        while not self._loader.wait(0.5):
+            host.message(f'{self.__loading_status()}...')
+
+        report = self.__take_load_report()
+        if report is not None:
+            host.message(report)
+        self._loaded_storage = self._loader.result()
+        return self._loaded_storage
+
+    def __open_books_list(self: Self, host: MenuHostBase) -> None:
+        '''Открыть список всех книг'''
+        from menus.BooksListMenu import LibraryManagerBooksListMenu
+        storage = self._storage(host)
+        host.push(LibraryManagerBooksListMenu(storage, storage.all_books()))
+
+    def __open_loaned_books_list(self: Self, host: MenuHostBase) -> None:
+        '''Открыть список выданных книг'''
+        from menus.BooksListMenu import LibraryManagerBooksListMenu
+        storage = self._storage(host)
+        host.push(LibraryManagerBooksListMenu(storage, storage.books_with_status(BookStatus.loaned)))
+
+    def __open_search(self: Self, host: MenuHostBase) -> None:
+        '''Открыть меню поиска'''
+        from menus.SearchMenu import LibraryManagerSearchMenu
+        host.push(LibraryManagerSearchMenu(self._storage(host)))
+
+    _KEYWORD_RESULTS_LIMIT = 200
+    '''Сколько самых релевантных книг показывать в результатах поиска по ключевым словам'''
+
+    def __search_keywords(self: Self, host: MenuHostBase) -> None:
+        '''Найти книги по словам названия и автора и открыть их список в порядке релевантности'''
+        from menus.BooksListMenu import LibraryManagerBooksListMenu
+        storage = self._storage(host)
+        query = host.input('Введите ключевые слова из названия и автора через пробел (или нажмите Ctrl + C для отмены): ', converter_string, validator_string_not_empty, 'Запрос должен быть непустой строкой!')
+        if query is None:
+            return
+        books = storage.search_keywords(query, self._KEYWORD_RESULTS_LIMIT)
+        if len(books) < 1:
+            host.message('Книги не найдены')
+            return
+        host.push(LibraryManagerBooksListMenu(storage, books, bulk_actions=True))
+
+    def __open_statistics(self: Self, host: MenuHostBase) -> None:
+        '''Открыть меню статистики'''
+        from menus.StatisticsMenu import LibraryManagerStatisticsMenu
+        host.push(LibraryManagerStatisticsMenu(self._storage(host)))
     
     def __add_book(self: Self, host: MenuHostBase) -> None:
         '''Добавить книгу'''
@@ -45,15 +133,25 @@ class LibraryManagerRootMenu(MenuBase):
         year = host.input('Введите год издания книги (или нажмите Ctrl + C для отмены): ', converter_int, validator_always, 'Год издания должен быть целым числом!')
         if year is None:
             return
-        self._storage.new_book(title, author, year)
+        storage = self._storage(host)
+        #предупредить о такой же книге, если она уже есть
+        duplicates = storage.find_duplicates(title, author, year)
+        if len(duplicates) > 0:
+            host.message(f'Такая книга уже есть в библиотеке (ID: {", ".join(str(b.id) for b in duplicates)}).')
+            answer = host.input('Всё равно добавить книгу? Введите "да" для подтверждения (или нажмите Ctrl + C для отмены): ', converter_string, validator_always, '')
+            if answer is None or answer.strip().lower() != 'да':
+                return
+        storage.new_book(title, author, year)
 
     def __find_book_by_id(self: Self, host: MenuHostBase) -> None:
         '''Открыть меню управления книгой по ID'''
+        from menus.BookMenu import BookMenu
+        storage = self._storage(host)
         #считать ID книги (если книги есть), а затем открыть меню книги с этим ID
-        if self._storage.books_count < 1:
+        if storage.books_count < 1:
             host.message('Книг нет')
             return
-        id = host.input('Введите ID книги (или нажмите Ctrl + C для отмены): ', converter_int, self._storage.has_book_with_id, 'Книги с таким ID не существует!')
+        id = host.input('Введите ID книги (или нажмите Ctrl + C для отмены): ', converter_int, storage.has_book_with_id, 'Книги с таким ID не существует!')
         if id is None:
             return
-        host.push(BookMenu(self._storage, self._storage.find_book_by_id(id)))
\ No newline at end of file
+        host.push(BookMenu(storage, storage.find_book_by_id(id)))
@@ -5,13 +5,12 @@ from typing import Self
 from modules.menu.static import StaticMenuEntry, MenuEntryBack
 from modules.menu.core import MenuBase, MenuEntryBase, MenuHostBase
 
-from modules.books import BookStorage, DefaultBookSearchCondition
+from modules.books import BookStatus, BookStorage, DefaultBookSearchCondition
 
-from modules.menu.input import converter_string, converter_int, validator_string_not_empty, validator_always
-
-import re
+from modules.menu.input import converter_string, converter_int, validator_string_not_empty, validator_always, validator_int_range
 
 from menus.BooksListMenu import LibraryManagerBooksListMenu
+from menus.BookMenu import book_status_to_string
 
 class LibraryManagerSearchMenu(MenuBase):
     '''Меню для поиска по книгами'''
@@ -20,6 +19,7 @@ class LibraryManagerSearchMenu(MenuBase):
         self._author = None
         self._title = None
         self._year = None
+        self._status : BookStatus | None = None
 
     @MenuBase.text.getter
     def text(self: Self) -> str:
@@ -37,6 +37,10 @@ class LibraryManagerSearchMenu(MenuBase):
         if self._year is not None:
             res += f'По году: {self._year}\n'
 
+        #Отобразить текущее условие поиска по статусу, если указано
+        if self._status is not None:
+            res += f'По статусу: {book_status_to_string(self._status)}\n'
+
         return res.strip()
     
     @MenuBase.entries.getter
@@ -49,15 +53,20 @@ class LibraryManagerSearchMenu(MenuBase):
             entries.append(StaticMenuEntry('Очистить поиск по автору', self._clear_by_author))
 
         #Добавить опцию задать поиск по названию и очистить, если уже задан
-        entries.append(StaticMenuEntry('Задать поиск по названию', self._set_by_author))
+        entries.append(StaticMenuEntry('Задать поиск по названию', self._set_by_title))
         if self._title is not None:
-            entries.append(StaticMenuEntry('Очистить поиск по названию', self._clear_by_author))
+            entries.append(StaticMenuEntry('Очистить поиск по названию', self._clear_by_title))
 
         #Добавить опцию задать поиск по году публикации и очистить, если уже задан
         entries.append(StaticMenuEntry('Задать поиск по году публикации', self._set_by_year))
         if self._year is not None:
             entries.append(StaticMenuEntry('Очистить поиск по году публикации', self._clear_by_year))
 
+        #Добавить опцию задать поиск по статусу и очистить, если уже задан
+        entries.append(StaticMenuEntry('Задать поиск по статусу', self._set_by_status))
+        if self._status is not None:
+            entries.append(StaticMenuEntry('Очистить поиск по статусу', self._clear_by_status))
+
         #Добавить опцию выполнить и вернуться
         entries.append(StaticMenuEntry('Выполнть поиск', self._do_search))
         entries.append(MenuEntryBack())
@@ -66,7 +75,7 @@ class LibraryManagerSearchMenu(MenuBase):
 
     def _set_by_author(self: Self, host: MenuHostBase) -> None:
         '''выставить условие поиска по автору'''
-        self._author = host.input('Введите частичное имя автора (или нажмите Ctrl + C для отмены): ', converter_string, validator_string_not_empty, 'Имя автора должно быть не пустой строкой!')
+        self._author = host.input('Введите частичное имя автора (допишите "?" для подсказок или нажмите Ctrl + C для отмены): ', converter_string, validator_string_not_empty, 'Имя автора должно быть не пустой строкой!', self._storage.complete_author)
 
     def _clear_by_author(self: Self, _: MenuHostBase) -> None:
         '''удалить условие поиска по автору'''
@@ -74,7 +83,7 @@ class LibraryManagerSearchMenu(MenuBase):
 
     def _set_by_title(self: Self, host: MenuHostBase) -> None:
         '''выставить условие поиска по заголовку'''
-        self._title = host.input('Введите частичное название книги (или нажмите Ctrl + C для отмены): ', converter_string, validator_string_not_empty, 'Название книги должно быть не пустой строкой!')
+        self._title = host.input('Введите частичное название книги (допишите "?" для подсказок или нажмите Ctrl + C для отмены): ', converter_string, validator_string_not_empty, 'Название книги должно быть не пустой строкой!', self._storage.complete_title)
 
     def _clear_by_title(self: Self, _: MenuHostBase) -> None:
         '''удалить условие поиска по заголовку'''
@@ -88,20 +97,36 @@ class LibraryManagerSearchMenu(MenuBase):
         '''удалить условие поиска по году публикации'''
         self._year = None
 
+    def _set_by_status(self: Self, host: MenuHostBase) -> None:
+        '''выставить условие поиска по статусу'''
+        statuses = list(BookStatus)
+        prompt = ', '.join(f'{i + 1} - {book_status_to_string(status)}' for i, status in enumerate(statuses))
+        option = host.input(f'Выберите статус ({prompt}) (или нажмите Ctrl + C для отмены): ', converter_int, lambda x: validator_int_range(x, 1, len(statuses)), 'Некорректный номер статуса!')
+        if option is None:
+            return
+        self._status = statuses[option - 1]
+
+    def _clear_by_status(self: Self, _: MenuHostBase) -> None:
+        '''удалить условие поиска по статусу'''
+        self._status = None
+
     def _do_search(self: Self, host: MenuHostBase) -> None:
         '''выполнить поиск'''
 
-        #создаём условие и выставляем на нём параметры, генерируем регулярные выражения для поиска подстроки 
+        #создаём условие и выставляем на нём параметры, поиск подстроки идёт без учёта регистра
         cond = DefaultBookSearchCondition()
 
         if self._author is not None:
-            cond.by_author(re.compile(f'.*{re.escape(self._author)}.*'))
+            cond.by_author_substring(self._author)
 
         if self._title is not None:
-            cond.by_title(re.compile(f'.*{re.escape(self._title)}.*'))
+            cond.by_title_substring(self._title)
 
         if self._year is not None:
             cond.by_year(self._year)
 
-        #Создаём меню списка книг на основе результата поиска
-        host.push(LibraryManagerBooksListMenu(self._storage, self._storage.find_books(cond)))
\ No newline at end of file
+        if self._status is not None:
+            cond.by_status(self._status)
+
+        #Создаём меню списка книг на основе результата поиска, с действиями над всеми найденными книгами
+        host.push(LibraryManagerBooksListMenu(self._storage, self._storage.find_books(cond), bulk_actions=True))
\ No newline at end of file
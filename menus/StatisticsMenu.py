@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Self
+
+from modules.menu.static import StaticMenuEntry, MenuEntryBack
+from modules.menu.core import MenuBase, MenuEntryBase, MenuHostBase
+
+from modules.books import BookStatus, BookStorage
+
+from menus.BookMenu import book_status_to_string
+
+class LibraryManagerStatisticsMenu(MenuBase):
+    '''
+    Меню, отображающее статистику по книгам хранилища
+    '''
+    def __init__(self, storage: BookStorage) -> None:
+        '''
+        storage : BookStorage -- хранилище, статистика которого отображается.
+        '''
+        self._storage = storage
+        self._entries : list[MenuEntryBase] = [
+            StaticMenuEntry('Книги по годам издания', self.__show_books_per_year),
+            StaticMenuEntry('Повторяющиеся книги', self.__show_duplicates),
+            StaticMenuEntry('Список лишних копий повторяющихся книг', self.__open_duplicate_copies),
+            MenuEntryBack()
+        ]
+
+    @MenuBase.text.getter
+    def text(self: Self) -> str:
+        stats = self._storage.statistics
+        res : str = 'Статистика\n'
+        res += f'Всего книг: {stats.total}\n'
+
+        #Отобразить число книг по каждому статусу
+        for status in BookStatus:
+            res += f'{book_status_to_string(status)}: {stats.count_by_status(status)}\n'
+
+        #Отобразить самых частых авторов, если есть книги
+        top_authors = stats.top_authors(10)
+        if len(top_authors) > 0:
+            res += f'Авторов: {stats.authors_count()}. Больше всего книг:\n'
+            for author, count in top_authors:
+                res += f'  {author} - {count}\n'
+
+        return res.strip()
+
+    @MenuBase.entries.getter
+    def entries(self: Self) -> list[MenuEntryBase]:
+        return self._entries
+
+    def __show_books_per_year(self: Self, host: MenuHostBase) -> None:
+        '''Вывести число книг по каждому году издания'''
+        books_per_year = self._storage.statistics.books_per_year()
+        if len(books_per_year) < 1:
+            host.message('Книг нет')
+            return
+        host.message('\n'.join(f'{year} г. - {count}' for year, count in books_per_year.items()))
+
+    _DUPLICATE_GROUPS_SHOWN = 20
+    '''Сколько групп повторяющихся книг выводить в отчёте'''
+
+    def __show_duplicates(self: Self, host: MenuHostBase) -> None:
+        '''Вывести группы книг с одинаковыми названием, автором и годом издания'''
+        groups = self._storage.duplicate_groups()
+        if len(groups) < 1:
+            host.message('Повторяющихся книг нет')
+            return
+        lines = [f'Групп повторяющихся книг: {len(groups)}, лишних копий: {self._storage.duplicate_count}']
+        for books in groups[:self._DUPLICATE_GROUPS_SHOWN]:
+            first = books[0]
+            lines.append(f'  {first.title} ({first.author}) [{first.year} г.] - ID: {", ".join(str(b.id) for b in books)}')
+        if len(groups) > self._DUPLICATE_GROUPS_SHOWN:
+            lines.append(f'  ... и ещё {len(groups) - self._DUPLICATE_GROUPS_SHOWN} групп')
+        host.message('\n'.join(lines))
+
+    def __open_duplicate_copies(self: Self, host: MenuHostBase) -> None:
+        '''Открыть список всех книг, кроме первой, из каждой группы повторяющихся книг (например, чтобы удалить их сразу)'''
+        from menus.BooksListMenu import LibraryManagerBooksListMenu
+        copies = [book for books in self._storage.duplicate_groups() for book in books[1:]]
+        host.push(LibraryManagerBooksListMenu(self._storage, copies, bulk_actions=True))
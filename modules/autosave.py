@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import Self
+import threading
+import time
+
+from modules.books import BookStorage
+from modules.loader import BackgroundStorageLoader
+
+class AutosaveService:
+    '''
+    Периодически сохраняет BookStorage на диск в фоновом потоке.
+    Серия изменений сохраняется одной записью: сохранение происходит, когда изменений не было interval секунд,
+    но не позже чем через max_delay секунд после первого несохранённого изменения.
+    '''
+    def __init__(self, storage: BookStorage | BackgroundStorageLoader, interval: float = 5.0, max_delay: float = 30.0) -> None:
+        '''
+        storage : BookStorage | BackgroundStorageLoader -- хранилище или загрузчик хранилища. Автосохранение начинается после окончания загрузки.
+        interval : float -- сколько секунд без изменений нужно ждать перед сохранением.
+        max_delay : float -- максимальная задержка сохранения в секундах после первого несохранённого изменения.
+        '''
+        self._storage = storage
+        self._interval = interval
+        self._max_delay = max(max_delay, interval)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self.__run, name='autosave', daemon=True)
+        self.saves_count = 0
+        '''Число выполненных автосохранений'''
+        self.last_error : Exception | None = None
+        '''Последняя ошибка автосохранения, если была'''
+
+    def start(self: Self) -> Self:
+        '''Запустить автосохранение'''
+        self._thread.start()
+        return self
+
+    def stop(self: Self) -> None:
+        '''Остановить автосохранение и дождаться завершения текущего сохранения'''
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def __run(self: Self) -> None:
+        storage = self._storage
+        if isinstance(storage, BackgroundStorageLoader):
+            #ждём загрузки, чтобы не перезаписать файл неполными данными
+            while not storage.wait(0.5):
+                if self._stopped.is_set():
+                    return
+            storage = storage.result()
+
+        poll = min(self._interval, 1.0) / 2
+        first_change : float | None = None
+        '''Момент обнаружения первого несохранённого изменения'''
+        last_change = 0.0
+        last_count = storage.modification_count
+
+        while not self._stopped.wait(poll):
+            if not storage.has_unsaved_changes:
+                first_change = None
+                continue
+
+            now = time.monotonic()
+            count = storage.modification_count
+            if first_change is None:
+                first_change = last_change = now
+                last_count = count
+            elif count != last_count:
+                last_change = now
+                last_count = count
+
+            if now - last_change >= self._interval or now - first_change >= self._max_delay:
+                try:
+                    storage.save_to_disk()
+                    self.saves_count += 1
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = e
+                first_change = None
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
-from typing import Self
+from typing import Self, Callable, Collection, Iterable, Iterator, BinaryIO, TextIO, TYPE_CHECKING
 from enum import Enum
-import re
-import json
+from collections import Counter
+from operator import attrgetter
 import abc
+import heapq
+import os
+import threading
 
 from modules.events import Event
+from modules.metrics import instrumented
+from modules.indexes import BookIndexBase, AuthorDictionary, SearchKeysIndex, DuplicateIndex, StatusIndex, TokenPrefixIndex, BookStatistics, KeywordIndex
+from modules.text import normalize_search_key
+from modules.compression import codec_by_extension, codec_by_magic, open_for_read, open_for_write
+from modules.rowstore import ChunkedRowStore, RowStoreView
+from modules.columns import create_numeric_columns, numpy_module
+from modules.patterns import fullmatch_predicate
+
+if TYPE_CHECKING:
+    import re
+    from modules.lazy_load import LazyBookSource, LazySourceView, LazyBookList
 
 class BookStatus(Enum):
     in_storage = 0
@@ -26,17 +40,35 @@ class BookStatus(Enum):
         Преобразует целое число в соответствующее значение BookStatus.
         Поднимает ValueError, если соответствующего значения BookStatus не существует.
         '''
-        if value == BookStatus.in_storage.value:
-            return BookStatus.in_storage
-        elif value == BookStatus.loaned.value:
-            return BookStatus.loaned
-        else:
-            raise ValueError
+        status = _STATUS_BY_VALUE.get(value)
+        if status is None:
+            raise ValueError(f'некорректный статус {value!r}')
+        return status
+
+_STATUS_BY_VALUE : dict[int, BookStatus] = {status.value: status for status in BookStatus}
+'''Значения BookStatus по их сериализованному представлению'''
+
+class BookRecordError(ValueError):
+    '''
+    Некорректная запись о книге в файле БД.
+    '''
+    def __init__(self, record: int, line: int | None, cause: str) -> None:
+        '''
+        record : int -- номер записи (с нуля).
+        line : int | None -- номер строки файла (с единицы), если известен.
+        cause : str -- описание ошибки.
+        '''
+        where = f'запись {record + 1}' if line is None else f'запись {record + 1}, строка {line}'
+        super().__init__(f'Некорректная книга в файле БД ({where}): {cause}')
+        self.record = record
+        self.line = line
 
 class Book:
     '''
     Одна книга
     '''
+    #__weakref__ нужен, чтобы ленивая загрузка (см. LazyBookSource) могла возвращать те же экземпляры книг, пока на них есть ссылки
+    __slots__ = ('_id', 'title', 'author', 'year', 'status', '__weakref__')
 
     def __init__(self, id : int, title : str, author : str, year : int) -> None:
         '''
@@ -103,6 +135,155 @@ class Book:
         b.status = BookStatus.deserialize(source['status'])
         return b
 
+    ROW_COLUMNS = ['id', 'title', 'author', 'year', 'status']
+    '''Порядок полей в компактном представлении книги в виде списка (см. serialize_row)'''
+
+    def serialize_row(self: Self) -> list[object]:
+        '''
+        Создаёт список значений всех полей этого объекта в json-сериализируемой форме в порядке ROW_COLUMNS.
+        '''
+        return [self.id, self.title, self.author, self.year, self.status.serialize()]
+
+    @staticmethod
+    def deserialize_row(source: object) -> Book:
+        '''
+        Создаёт объект Book из списка значений полей в порядке ROW_COLUMNS, если все значения присутствуют и верные.
+
+        Аргументы:
+        source : object - список с json-совместимым представлением полей.
+
+        Исключения:
+        TypeError -- если source не является списком из 5 значений или тип значения не соответствует ожидаемому.
+        ValueError -- если значение status не является корректным значением BookStatus.
+        '''
+        id, title, author, year, status = Book.validate_row(source)
+        b = Book(id, title, author, year)
+        b.status = _STATUS_BY_VALUE[status]
+        return b
+
+    @staticmethod
+    def validate_row(source: object) -> tuple[int, str, str, int, int]:
+        '''
+        Проверяет компактное представление книги (см. serialize_row) и возвращает значения его полей.
+        Типы сравниваются точно, т.к. json создаёт только int, str и list (в частности, true/false не считаются числами).
+
+        Аргументы:
+        source : object - список с json-совместимым представлением полей.
+
+        Исключения:
+        TypeError -- если source не является списком из 5 значений или тип значения не соответствует ожидаемому.
+        ValueError -- если значение status не является корректным значением BookStatus.
+        '''
+        if type(source) is not list or len(source) != 5:
+            raise TypeError('ожидается список из 5 значений')
+        id, title, author, year, status = source
+        if type(id) is not int or type(title) is not str or type(author) is not str or type(year) is not int or type(status) is not int:
+            raise TypeError(f'некорректные типы полей {source!r}')
+        if status not in _STATUS_BY_VALUE:
+            raise ValueError(f'некорректный статус {status!r}')
+        return id, title, author, year, status
+
+class StorageSnapshot:
+    '''
+    Неизменяемый снимок книг хранилища (см. BookStorage.snapshot).
+    Читать снимок можно из любого потока без блокировок, пока хранилище продолжает изменяться.
+    Книги, статус которых изменился после снятия снимка, возвращаются в виде отдельных копий со статусом на момент снятия,
+    остальные - в виде экземпляров из хранилища.
+    '''
+    def __init__(self, rows: RowStoreView[tuple[Book, BookStatus]], modification_count: int, lazy: LazySourceView | None = None) -> None:
+        self._rows = rows
+        self._lazy = lazy
+        '''Книги, ещё не загруженные из файла при ленивой загрузке (см. BookStorage.load_from_disk)'''
+        self.modification_count = modification_count
+        '''Число изменений хранилища на момент снятия снимка'''
+
+    @staticmethod
+    def _frozen(row: tuple[Book, BookStatus]) -> Book:
+        '''Книга в состоянии на момент снятия снимка'''
+        book, status = row
+        if book.status == status:
+            return book
+        copy = Book(book.id, book.title, book.author, book.year)
+        copy.status = status
+        return copy
+
+    @property
+    def books_count(self: Self) -> int:
+        '''
+        Возвращает число книг в снимке.
+        '''
+        return len(self._rows) + (len(self._lazy) if self._lazy is not None else 0)
+
+    def books(self: Self) -> Iterator[Book]:
+        '''
+        Обходит книги снимка в порядке возрастания ID.
+        '''
+        if self._lazy is None:
+            return map(self._frozen, self._rows)
+        import heapq
+        return heapq.merge(map(self._frozen, self._rows), self._lazy.books(), key=lambda book: book.id)
+
+    def all_books(self: Self) -> list[Book]:
+        '''
+        Возвращает список со всеми книгами снимка
+        '''
+        return list(self.books())
+
+    def find_book_by_id(self: Self, id: int) -> Book:
+        '''
+        Возвращает книгу с указанным id
+
+        Аргументы:
+        id : int -- ID книги
+
+        Исключения:
+        KeyError - если книги с таким ID не было в хранилище на момент снятия снимка
+        '''
+        row = self._rows.get(id)
+        if row is None:
+            book = self._lazy.get(id) if self._lazy is not None else None
+            if book is None:
+                raise KeyError(id)
+            return book
+        return self._frozen(row)
+
+    def find_books(self: Self, condition: BookSearchConditionBase) -> list[Book]:
+        '''
+        Находит все книги снимка, удовлетворяющие указанному условию.
+
+        Аргументы:
+        condition -- условие для поиска книг.
+        '''
+        return [book for book in self.books() if condition.matches(book)]
+
+    def serialize_rows(self: Self) -> Iterator[list[object]]:
+        '''Обходит книги снимка в компактном виде (см. Book.serialize_row)'''
+        if self._lazy is not None:
+            yield from (book.serialize_row() for book in self.books())
+            return
+        for book, status in self._rows:
+            row = book.serialize_row()
+            row[4] = status.serialize()
+            yield row
+
+    def encoded_rows(self: Self, encode: Callable[[list[object]], str]) -> Iterator[str]:
+        '''
+        Обходит книги снимка в компактном виде, закодированные в JSON, в порядке возрастания ID.
+        Записи книг, не загруженных из файла при ленивой загрузке, берутся из файла как есть, без разбора и повторного кодирования.
+
+        Аргументы:
+        encode : Callable[[list[object]], str] -- функция кодирования записи в JSON.
+        '''
+        if self._lazy is None:
+            return map(encode, self.serialize_rows())
+        import heapq
+        def stored() -> Iterator[tuple[int, str]]:
+            for book, status in self._rows:
+                row = book.serialize_row()
+                row[4] = status.serialize()
+                yield book.id, encode(row)
+        return (text for _, text in heapq.merge(stored(), self._lazy.encoded_rows(), key=lambda item: item[0]))
+
 class BookStorage:
     '''
     Все книги в библиотеке    
@@ -118,8 +299,42 @@ class BookStorage:
         self._storage_file_path = storage_file_path
         self._nextId = 0
         self._instances : dict[int, Book] = {}
+        self._lazy : LazyBookSource | None = None
+        '''Книги файла БД, ещё не загруженные в хранилище при ленивой загрузке (см. load_from_disk). None, если все книги загружены.'''
+        self._rows = ChunkedRowStore[tuple[Book, BookStatus]]()
+        '''Книги и их статусы по ID с копированием при записи, из которых снимаются снимки (см. snapshot)'''
+
+        self._lock = threading.RLock()
+        '''Защищает изменения хранилища от одновременного снятия снимка в другом потоке'''
+        self._save_lock = threading.Lock()
+        '''Не даёт двум сохранениям (например, автосохранению и сохранению при выходе) писать файл одновременно'''
+        self._modification_count = 0
+        self._saved_modification_count = 0
+
+        self._authors = AuthorDictionary()
+        self._search_keys = SearchKeysIndex()
+        self._status_index = StatusIndex()
+        self._title_prefixes = TokenPrefixIndex(lambda book: book.title)
+        self._author_prefixes = TokenPrefixIndex(lambda book: book.author)
+        self._statistics = BookStatistics()
+        self._duplicates = DuplicateIndex(self._search_keys, self._authors)
+        #словарь авторов идёт первым, т.к. заменяет автора книги на общий экземпляр строки, который используют остальные индексы,
+        #а индекс повторов - после индексов, ключи которых он использует (удаляются книги из индексов в обратном порядке)
+        self._indexes : list[BookIndexBase] = [self._authors, self._search_keys, self._duplicates, self._status_index, self._title_prefixes, self._author_prefixes, self._statistics]
+        '''Индексы, которые обновляются при добавлении и удалении книг'''
+        self._columns = create_numeric_columns()
+        '''Столбцы года и статуса для векторного поиска. None, если NumPy не установлен.'''
+        if self._columns is not None:
+            self._indexes.append(self._columns)
+        self._keywords : KeywordIndex | None = None
+        '''Индекс ключевых слов. Строится при первом поиске по ключевым словам (см. search_keywords), чтобы не замедлять загрузку.'''
 
-        self.book_deleted_event = Event[Book]()
+        self.books_added_event = Event[list[Book]]()
+        '''Вызывается один раз после каждого добавления книг (см. new_book и import_books) со списком добавленных книг. Книги, загруженные с диска, не передаются.'''
+        self.books_deleted_event = Event[list[Book]]()
+        '''Вызывается один раз после каждого удаления книг (см. remove_book и remove_books) со списком удалённых книг'''
+        self.books_status_changed_event = Event[list[Book]]()
+        '''Вызывается один раз после каждой смены статуса (см. set_status и set_status_many) со списком книг, статус которых изменился'''
 
     def new_book(self: Self, title : str, author : str, year : int) -> Book:
         '''
@@ -130,10 +345,59 @@ class BookStorage:
         author : str -- автор книги
         year : int -- год публикации книги
         '''
-        book = Book(self._nextId, title, author, year)
-        self._nextId += 1
-        self._instances[book.id] = book
+        with self._lock:
+            book = Book(self._nextId, title, author, year)
+            self._nextId += 1
+            self._add_instance(book)
+            self._modification_count += 1
+        self.books_added_event([book])
         return book
+
+    def import_books(self: Self, books: Iterable[tuple[str, str, int]], skip_duplicates: bool = True) -> list[Book]:
+        '''
+        Создать книги из последовательности (название, автор, год издания) за один проход и поднять одно событие books_added_event.
+        Возвращает список созданных книг.
+
+        Аргументы:
+        books : Iterable[tuple[str, str, int]] -- поля создаваемых книг.
+        skip_duplicates : bool -- пропускать книги, совпадающие с уже имеющимися или с ранее импортированными (см. find_duplicates).
+                                  Каждая книга проверяется за O(1) по хэш-индексу.
+        '''
+        self._materialize()
+        added : list[Book] = []
+        with self._lock:
+            for title, author, year in books:
+                if skip_duplicates and len(self._duplicates.find(DuplicateIndex.key_of(title, author, year))) > 0:
+                    continue
+                book = Book(self._nextId, title, author, year)
+                self._nextId += 1
+                self._add_instance(book)
+                added.append(book)
+            self._modification_count += len(added)
+        if len(added) > 0:
+            self.books_added_event(added)
+        return added
+
+    def _add_instance(self: Self, book: Book) -> None:
+        '''Добавить книгу в хранилище и во все индексы'''
+        self._instances[book.id] = book
+        for index in self._indexes:
+            index.add(book)
+        self._rows.set(book.id, (book, book.status))
+
+    def _add_instances(self: Self, books: list[Book], counted: Collection[BookIndexBase] = ()) -> None:
+        '''
+        Добавить сразу много книг в хранилище и во все индексы. Индексы строятся целиком (см. BookIndexBase.add_many), что быстрее, чем по одной книге.
+
+        Аргументы:
+        books : list[Book] -- добавляемые книги.
+        counted : Collection[BookIndexBase] -- индексы, в которых книги уже учтены (например, по данным процессов параллельной загрузки).
+        '''
+        self._instances.update((book.id, book) for book in books)
+        self._rows.set_many((book.id, (book, book.status)) for book in books)
+        for index in self._indexes:
+            if index not in counted:
+                index.add_many(books)
     
     def remove_book(self: Self, book: Book) -> None:
         '''
@@ -145,22 +409,197 @@ class BookStorage:
         Исключения:
         KeyError -- если указанной книги не существует в хранилище.
         '''
-        del self._instances[book.id]
+        with self._lock:
+            self._attach(book)
+            self._remove_instance(book)
+            self._modification_count += 1
         #если не было исключения, то книгу удалили, можно поднять событие
-        self.book_deleted_event(book)
-    
+        self.books_deleted_event([book])
+
+    def remove_books(self: Self, books: Iterable[int] | BookSearchConditionBase) -> list[Book]:
+        '''
+        Удаляет все указанные книги за один проход и поднимает одно событие books_deleted_event.
+        Возвращает список удалённых книг.
+
+        Аргументы:
+        books : Iterable[int] | BookSearchConditionBase -- ID удаляемых книг или условие, которому удовлетворяют удаляемые книги.
+
+        Исключения:
+        KeyError -- если книги с одним из указанных ID не существует в хранилище. В этом случае ни одна книга не удаляется.
+        '''
+        with self._lock:
+            if isinstance(books, BookSearchConditionBase):
+                removed = self.find_books(books)
+            else:
+                removed = [self._stored_book(id) for id in dict.fromkeys(books)]
+            for book in removed:
+                self._remove_instance(book)
+            self._modification_count += len(removed)
+        if len(removed) > 0:
+            self.books_deleted_event(removed)
+        return removed
+
+    def _remove_instance(self: Self, book: Book) -> None:
+        '''Удалить книгу из хранилища и из всех индексов'''
+        del self._instances[book.id]
+        for index in reversed(self._indexes):
+            index.remove(book)
+        self._rows.delete(book.id)
+
+    def set_status(self: Self, book: Book, status: BookStatus) -> None:
+        '''
+        Изменяет статус указанной книги. Статус книг хранилища нужно менять только через этот метод, чтобы индексы и статистика оставались актуальными.
+
+        Аргументы:
+        book : Book -- книга, статус которой нужно изменить.
+        status : BookStatus -- новый статус.
+
+        Исключения:
+        KeyError -- если указанной книги не существует в хранилище.
+        '''
+        with self._lock:
+            self._attach(book)
+            if not self._apply_status(book, status):
+                return
+            self._modification_count += 1
+        self.books_status_changed_event([book])
+
+    def set_status_many(self: Self, ids: Iterable[int], status: BookStatus) -> list[Book]:
+        '''
+        Изменяет статус всех указанных книг за один проход и поднимает одно событие books_status_changed_event.
+        Возвращает список книг, статус которых изменился (книги, у которых уже был этот статус, не входят в список).
+
+        Аргументы:
+        ids : Iterable[int] -- ID книг.
+        status : BookStatus -- новый статус.
+
+        Исключения:
+        KeyError -- если книги с одним из указанных ID не существует в хранилище. В этом случае статус не меняется ни у одной книги.
+        '''
+        with self._lock:
+            books = [self._stored_book(id) for id in ids]
+            changed = [book for book in books if self._apply_status(book, status)]
+            self._modification_count += len(changed)
+        if len(changed) > 0:
+            self.books_status_changed_event(changed)
+        return changed
+
+    def _attach(self: Self, book: Book) -> None:
+        '''
+        Проверить, что книга принадлежит хранилищу. Книгу, ещё не загруженную при ленивой загрузке, перенести в хранилище и индексы.
+
+        Исключения:
+        KeyError -- если указанной книги не существует в хранилище.
+        '''
+        if self._instances.get(book.id) is book:
+            return
+        if self._lazy is None or self._lazy.peek(book.id) is not book:
+            raise KeyError(book.id)
+        self._lazy.detach(book.id)
+        self._add_instance(book)
+
+    def _stored_book(self: Self, id: int) -> Book:
+        '''
+        Книга хранилища с указанным ID. Книга, ещё не загруженная при ленивой загрузке, переносится в хранилище и индексы.
+
+        Исключения:
+        KeyError -- если книги с таким ID не существует.
+        '''
+        book = self._instances.get(id)
+        if book is None:
+            if self._lazy is None:
+                raise KeyError(id)
+            book = self._lazy.get(id)
+            self._attach(book)
+        return book
+
+    def _materialize(self: Self) -> None:
+        '''Загрузить все книги, оставшиеся в файле при ленивой загрузке. Вызывается перед операциями, которым нужны индексы по всем книгам.'''
+        if self._lazy is None:
+            return
+        with self._lock:
+            lazy = self._lazy
+            if lazy is None:
+                return
+            #книги, перенесённые в хранилище до полной загрузки, стоят раньше остальных; все книги добавляются заново по возрастанию ID,
+            #чтобы порядок книг в хранилище и индексах был таким же, как при обычной загрузке
+            stored = sorted(self._instances.values(), key=attrgetter('id'))
+            for book in stored:
+                self._remove_instance(book)
+            self._add_instances(list(heapq.merge(stored, lazy.books(), key=attrgetter('id'))))
+            self._lazy = None
+
+    def _apply_status(self: Self, book: Book, status: BookStatus) -> bool:
+        '''Изменить статус книги хранилища и обновить индексы. Возвращает False, если у книги уже был этот статус.'''
+        old_status = book.status
+        if old_status == status:
+            return False
+        book.status = status
+        for index in self._indexes:
+            index.update_status(book, old_status)
+        self._rows.set(book.id, (book, status))
+        return True
+
+    @property
+    def modification_count(self: Self) -> int:
+        '''
+        Число изменений (добавлений, удалений, смен статуса) хранилища с момента создания или загрузки.
+        '''
+        return self._modification_count
+
+    @property
+    def has_unsaved_changes(self: Self) -> bool:
+        '''
+        Есть ли изменения, не попавшие в последнее сохранение на диск.
+        '''
+        return self._modification_count != self._saved_modification_count
+
+    @property
+    def statistics(self: Self) -> BookStatistics:
+        '''
+        Статистика по книгам хранилища. Поддерживается при каждом изменении, поэтому чтение не требует обхода книг.
+        При ленивой загрузке первое обращение загружает все книги.
+        '''
+        self._materialize()
+        return self._statistics
+
     @property
     def books_count(self: Self) -> int:
         '''
         Возвращает число книг в этом хранилище.
         '''
-        return len(self._instances)
+        return len(self._instances) + (len(self._lazy) if self._lazy is not None else 0)
 
-    def all_books(self: Self) -> list[Book]:
+    def all_books(self: Self) -> list[Book] | LazyBookList:
+        '''
+        Возвращает список со всеми книгами в хранилище.
+        При ленивой загрузке возвращает список ID, книги которого загружаются при обращении к элементам (см. LazyBookList).
+        '''
+        if self._lazy is None:
+            return list(self._instances.values())
+        from modules.lazy_load import LazyBookList, merge_ids
+        with self._lock:
+            ids = merge_ids(iter(sorted(self._instances)), self._lazy.ids())
+        return LazyBookList(ids, self._find_book_or_none)
+
+    def snapshot(self: Self) -> StorageSnapshot:
+        '''
+        Возвращает неизменяемый снимок книг хранилища за O(1), без копирования книг.
+        Снимок можно читать из другого потока (например, при сохранении или экспорте), не блокируя изменения хранилища:
+        последующие изменения копируют только затронутые блоки записей (см. ChunkedRowStore).
         '''
-        Возвращает список со всеми книгами в хранилище
+        with self._lock:
+            return StorageSnapshot(self._rows.snapshot(), self._modification_count, self._lazy.snapshot() if self._lazy is not None else None)
+
+    def books_with_status(self: Self, status: BookStatus) -> list[Book]:
+        '''
+        Возвращает список всех книг с указанным статусом. Не обходит остальные книги хранилища.
+
+        Аргументы:
+        status : BookStatus -- статус книг.
         '''
-        return list(self._instances.values())
+        self._materialize()
+        return list(self._status_index.books(status).values())
 
     def find_book_by_id(self: Self, id: int) -> Book:
         '''
@@ -172,7 +611,19 @@ class BookStorage:
         Исключения:
         KeyError - если книги с таким ID не существует
         '''
-        return self._instances[id]
+        book = self._instances.get(id)
+        if book is None:
+            if self._lazy is None:
+                raise KeyError(id)
+            return self._lazy.get(id)
+        return book
+
+    def _find_book_or_none(self: Self, id: int) -> Book | None:
+        '''Книга с указанным ID или None, если её нет'''
+        try:
+            return self.find_book_by_id(id)
+        except KeyError:
+            return None
     
     def has_book_with_id(self: Self, id: int) -> bool:
         '''
@@ -182,8 +633,81 @@ class BookStorage:
         Аргументы:
         id : int -- ID книги
         '''
-        return id in self._instances
+        return id in self._instances or (self._lazy is not None and id in self._lazy)
     
+    def find_duplicates(self: Self, title: str, author: str, year: int) -> list[Book]:
+        '''
+        Возвращает книги с теми же названием, автором и годом издания (без учёта регистра и различия "ё"/"е") за O(1).
+        Например, чтобы предупредить о повторе перед созданием книги.
+
+        Аргументы:
+        title : str -- название книги.
+        author : str -- автор книги.
+        year : int -- год издания книги.
+        '''
+        self._materialize()
+        return self._duplicates.find(DuplicateIndex.key_of(title, author, year))
+
+    def duplicate_groups(self: Self) -> list[list[Book]]:
+        '''
+        Возвращает все группы из двух и более книг с одинаковыми названием, автором и годом издания (см. find_duplicates).
+        Книги каждой группы идут в порядке добавления, первая из них - исходная.
+        '''
+        self._materialize()
+        return self._duplicates.groups()
+
+    @property
+    def duplicate_count(self: Self) -> int:
+        '''
+        Число книг, повторяющих более раннюю книгу (т.е. книг, которые можно удалить, оставив по одной книге каждой группы).
+        '''
+        self._materialize()
+        return self._duplicates.duplicate_count
+
+    @instrumented('storage.search_keywords')
+    def search_keywords(self: Self, query: str, limit: int = 100) -> list[Book]:
+        '''
+        Находит до limit книг, в названии или авторе которых есть слова запроса, в порядке убывания релевантности (BM25).
+        Книгам, содержащим больше слов запроса (особенно редких), соответствует большая релевантность.
+        Первый вызов строит индекс ключевых слов по всем книгам, после чего индекс обновляется при каждом изменении.
+
+        Аргументы:
+        query : str -- слова запроса, например "война мир толстой" (без учёта регистра и различия "ё"/"е").
+        limit : int -- максимальное число книг.
+        '''
+        self._materialize()
+        with self._lock:
+            if self._keywords is None:
+                self._keywords = KeywordIndex(self._search_keys, numpy_module())
+                for book in self._instances.values():
+                    self._keywords.add(book)
+                #индекс удаляется раньше SearchKeysIndex, ключи которого использует, т.к. индексы обходятся при удалении в обратном порядке
+                self._indexes.append(self._keywords)
+            return [self._instances[id] for id, _ in self._keywords.search(query, limit)]
+
+    def complete_title(self: Self, prefix: str, limit: int = 10) -> list[str]:
+        '''
+        Возвращает до limit слов из названий книг, начинающихся с prefix, начиная с самых частых.
+
+        Аргументы:
+        prefix : str -- начало слова.
+        limit : int -- максимальное число подсказок.
+        '''
+        self._materialize()
+        return self._title_prefixes.complete(prefix, limit)
+
+    def complete_author(self: Self, prefix: str, limit: int = 10) -> list[str]:
+        '''
+        Возвращает до limit слов из имён авторов, начинающихся с prefix, начиная с самых частых.
+
+        Аргументы:
+        prefix : str -- начало слова.
+        limit : int -- максимальное число подсказок.
+        '''
+        self._materialize()
+        return self._author_prefixes.complete(prefix, limit)
+
+    @instrumented('storage.find_books')
     def find_books(self: Self, condition: BookSearchConditionBase) -> list[Book]:
         '''
         Находит все книги, удовлетворяющие указанному условию.
@@ -191,57 +715,252 @@ class BookStorage:
         Аргументы:
         condition -- условие для поиска книг.
         '''
+        self._materialize()
+        if isinstance(condition, DefaultBookSearchCondition):
+            #используем заранее вычисленные ключи поиска вместо нормализации строк на каждом вызове
+            title_keys = self._search_keys.title_keys
+            columns = self._columns
+            candidates : Iterable[tuple[int, Book]]
+            if columns is not None and columns.usable and condition.has_year_condition:
+                #условия на год и статус проверяются векторно, строковые условия - только для прошедших книг
+                instances = self._instances
+                ids = columns.select(condition.by_year_pattern, condition.by_year_min, condition.by_year_max, condition.by_status_value)
+                candidates = ((id, instances[id]) for id in ids)
+                only_title = True
+            else:
+                #при поиске по статусу обходим только книги с этим статусом
+                source = self._instances if condition.by_status_value is None else self._status_index.books(condition.by_status_value)
+                candidates = source.items()
+                #без условий на год достаточно проверить название, т.к. статус уже учтён выбором source
+                only_title = not condition.has_year_condition
+            match = condition.matches_title if only_title else condition.matches_except_author
+
+            if not condition.has_author_condition:
+                title_predicate = condition.title_predicate
+                if only_title and title_predicate is not None:
+                    #единственное условие - регулярное выражение для названия, проверяем его без промежуточных вызовов
+                    return [book for id, book in candidates if title_predicate(book.title)]
+                return [book for id, book in candidates if match(book, title_keys[id])]
+
+            #условие на автора проверяем один раз для каждого автора, а для книг - только флаг по коду автора
+            author_flags = self._authors.select(condition.matches_author)
+            book_codes = self._authors.book_codes
+            return [book for id, book in candidates if author_flags[book_codes[id]] and match(book, title_keys[id])] # type: ignore
+
         books : list[Book] = []
         for value in self._instances.values():
             if condition.matches(value):
                 books.append(value)
         return books
     
-    def save_to_disk(self: Self) -> None:
+    @instrumented('storage.save_to_disk')
+    def save_to_disk(self: Self, path: str | None = None) -> None:
         '''
-        Сохраняет данные на диск
+        Сохраняет данные на диск.
+        Книги записываются по одной на строку в компактном виде (см. Book.serialize_row), со сжатием gzip, lzma или bz2,
+        если расширение файла .gz, .xz/.lzma или .bz2 соответственно. Данные сжимаются по мере записи, без промежуточной копии всего файла в памяти.
+        Можно вызывать из другого потока: книги записываются из снимка (см. snapshot), поэтому изменения хранилища не блокируются.
+        Файл записывается атомарно: данные пишутся во временный файл, который сбрасывается на диск и затем заменяет файл БД.
+
+        Аргументы:
+        path : str | None -- путь до файла. Если None, то используется путь хранилища.
         '''
-        enc = json.JSONEncoder()
-        with open(self._storage_file_path, "w") as f:
-            f.write(enc.encode(self._serialize()))
+        target = self._storage_file_path if path is None else path
+        with self._save_lock:
+            snapshot = self.snapshot()
+            tmp_path = target + '.tmp'
+            with open(tmp_path, 'wb') as raw, open_for_write(raw, codec_by_extension(target)) as f:
+                self._write_rows(f, snapshot)
+            #данные должны попасть на диск до замены файла БД, иначе после сбоя питания на месте БД может оказаться неполный файл
+            fd = os.open(tmp_path, os.O_RDWR)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, target)
+            if path is None:
+                self._saved_modification_count = snapshot.modification_count
+
+    _ROWS_HEADER_START = '{"format": 2,'
+    '''Начало первой строки файла в компактном формате'''
+
+    @staticmethod
+    def _write_rows(f: TextIO, snapshot: StorageSnapshot) -> None:
+        '''
+        Записать книги снимка в компактном формате: заголовок на первой строке, затем по одной книге на строку.
+        Файл остаётся корректным JSON вида {"format": 2, "columns": [...], "rows": [[...], ...]}.
+        '''
+        import json
+        enc = json.JSONEncoder(ensure_ascii=False)
+        f.write(f'{BookStorage._ROWS_HEADER_START} "columns": {enc.encode(Book.ROW_COLUMNS)}, "rows": [\n')
+        separator = ''
+        for text in snapshot.encoded_rows(enc.encode):
+            f.write(separator)
+            f.write(text)
+            separator = ',\n'
+        f.write('\n]}\n' if separator else ']}\n')
 
-    def _serialize(self: Self) -> dict[object, object]:
-        o : dict[object, object] = {}
-        o['books'] = []
-        for book in self._instances.values():
-            o['books'].append(book.serialize())
-        return o
     
     @staticmethod
-    def load_from_disk(path: str) -> BookStorage:
+    @instrumented('storage.load_from_disk')
+    def load_from_disk(path: str, progress: Callable[[int, int], None] | None = None, workers: int | None = None, lazy: bool = False, cache_size: int = 10000) -> BookStorage:
         '''
         Загружает данные из указанного файла и создаёт BookStorage
 
         Аргументы:
         path : str -- путь до файла на диске
+        progress : Callable[[int, int], None] | None -- функция, периодически вызываемая с объёмом выполненной работы и общим объёмом работы (в произвольных единицах).
+        workers : int | None -- число процессов для разбора файла (см. ниже). Если None, то для файлов от _PARALLEL_MIN_BYTES байт используются все ядра процессора,
+                                если их не меньше _PARALLEL_MIN_CPUS, иначе файл разбирается в этом потоке.
+        lazy : bool -- ленивая загрузка компактного файла без сжатия (см. ниже).
+        cache_size : int -- сколько последних книг хранить в памяти при ленивой загрузке.
+
+        Сжатие файла (gzip, lzma, bz2) определяется по первым байтам. Поддерживаются компактный формат (см. save_to_disk), который читается
+        построчно по мере распаковки, и прежний формат {"books": [{...}, ...]}.
+        Компактный файл без сжатия разбивается на диапазоны байт, которые разбираются и проверяются параллельно в workers процессах (см. modules.parallel_load).
+        Индексы строятся один раз после разбора всех записей (см. BookIndexBase.add_many).
+
+        При ленивой загрузке файл только сканируется для построения индекса смещений записей по ID (который сохраняется рядом с файлом БД
+        и используется, пока файл не изменится), а книги создаются при обращении к ним (см. modules.lazy_load). Поиск, статистика
+        и подсказки при первом вызове загружают все книги. Записи проверяются при обращении к ним, а не при загрузке.
 
         Исключения:
         JsonDecodeError - если не содержит валидный JSON
+        BookRecordError - если запись о книге некорректна (с номером записи и строки файла)
         TypeError, KeyError, ValueError - если структура файла не соответствует ожидаемой структуре
         '''
+        import json
         dec = json.JSONDecoder()
 
-        with open(path, "r") as f:
-            source = dec.decode(f.read())
-
-        if not isinstance(source, dict) or not isinstance(source['books'], list):
-            raise TypeError
-        
         storage = BookStorage(path)
-        books : list[dict[str, object]] = source['books']
-        for book in books:
-            b = Book.deserialize(book)
-            storage._nextId = max(storage._nextId, b.id)
-            storage._instances[b.id] = b
+        size = os.path.getsize(path)
+        with open(path, 'rb') as raw:
+            codec = codec_by_magic(raw.read(6))
+            raw.seek(0)
+            with open_for_read(raw) as f:
+                first_line = f.readline()
+                if first_line.startswith(BookStorage._ROWS_HEADER_START):
+                    #заголовок компактного формата становится корректным JSON, если закрыть список строк
+                    header = dec.decode(first_line + ']}')
+                    if header['format'] != 2 or header['columns'] != Book.ROW_COLUMNS:
+                        raise ValueError
+                    workers = BookStorage._load_workers(codec, size, workers)
+                    if lazy and codec == 'json':
+                        storage._open_lazy(path, len(first_line.encode('utf-8')), cache_size, progress)
+                    elif workers > 1:
+                        storage._load_rows_parallel(path, len(first_line.encode('utf-8')), workers, progress)
+                    else:
+                        storage._load_rows(f, raw, progress)
+                else:
+                    source = dec.decode(first_line + f.read())
+                    if not isinstance(source, dict) or not isinstance(source['books'], list):
+                        raise TypeError
+                    books : list[dict[str, object]] = source['books']
+                    loaded : list[Book] = []
+                    for i, book in enumerate(books):
+                        try:
+                            loaded.append(Book.deserialize(book))
+                        except (TypeError, KeyError, ValueError) as e:
+                            raise BookRecordError(i, None, f'{type(e).__name__}: {e}') from e
+                        if progress is not None and i % 10000 == 0:
+                            progress(i, len(books))
+                    storage._load_books(loaded)
+
+        if progress is not None:
+            progress(size, size)
 
         storage._nextId += 1
 
         return storage
+
+    _PARALLEL_MIN_BYTES = 16 << 20
+    '''Размер файла, начиная с которого он по умолчанию разбирается в нескольких процессах (примерно 200 тыс. книг)'''
+    _PARALLEL_MIN_CPUS = 4
+    '''
+    Минимальное число ядер, при котором файл по умолчанию разбирается в нескольких процессах.
+    Индексы строятся в основном процессе, поэтому на одном-двух ядрах запуск процессов и передача записей не окупаются.
+    '''
+
+    @staticmethod
+    def _load_workers(codec: str, size: int, workers: int | None) -> int:
+        '''Число процессов для разбора компактного файла'''
+        #сжатый файл нельзя читать с произвольной позиции
+        if codec != 'json':
+            return 1
+        if workers is None:
+            cpus = os.cpu_count() or 1
+            workers = cpus if size >= BookStorage._PARALLEL_MIN_BYTES and cpus >= BookStorage._PARALLEL_MIN_CPUS else 1
+        return workers
+
+    def _load_rows(self: Self, f: TextIO, raw: BinaryIO, progress: Callable[[int, int], None] | None) -> None:
+        '''Загрузить записи компактного формата, следующие за заголовком, в этом потоке'''
+        import json
+        dec = json.JSONDecoder()
+        size = os.fstat(raw.fileno()).st_size
+        books : list[Book] = []
+        for i, line in enumerate(f):
+            line = line.rstrip('\n').rstrip(',')
+            if line == ']}':
+                break
+            try:
+                books.append(Book.deserialize_row(dec.decode(line)))
+            except (TypeError, ValueError) as e:
+                #первая запись находится на второй строке файла
+                raise BookRecordError(i, i + 2, f'{type(e).__name__}: {e}') from e
+            if progress is not None and i % 10000 == 0:
+                progress(raw.tell(), size)
+        else:
+            #файл закончился до конца списка книг
+            raise ValueError
+        self._load_books(books)
+
+    def _load_rows_parallel(self: Self, path: str, body_start: int, workers: int, progress: Callable[[int, int], None] | None) -> None:
+        '''Загрузить записи компактного формата, разобранные в нескольких процессах'''
+        from modules.parallel_load import decode_parallel
+        size = os.path.getsize(path)
+        statuses = _STATUS_BY_VALUE
+        books : list[Book] = []
+        title_tokens : Counter[str] = Counter()
+        author_tokens : Counter[str] = Counter()
+        for result in decode_parallel(path, body_start, workers):
+            for id, title, author, year, status in result.rows:
+                book = Book(id, title, author, year)
+                book.status = statuses[status]
+                books.append(book)
+            title_tokens.update(result.title_tokens)
+            author_tokens.update(result.author_tokens)
+            if result.error is not None:
+                raise BookRecordError(len(books), len(books) + 2, result.error)
+            if result.closed:
+                break
+            if progress is not None:
+                progress(result.end, size)
+        else:
+            #файл закончился до конца списка книг
+            raise ValueError
+        #слова названий и авторов уже подсчитаны в дочерних процессах
+        self._title_prefixes.add_counts(title_tokens)
+        self._author_prefixes.add_counts(author_tokens)
+        self._load_books(books, (self._title_prefixes, self._author_prefixes))
+
+    def _open_lazy(self: Self, path: str, body_start: int, cache_size: int, progress: Callable[[int, int], None] | None) -> None:
+        '''Подключить книги компактного файла без сжатия для ленивой загрузки вместо загрузки всех книг'''
+        from modules.lazy_load import LazyBookSource, OffsetIndex, sidecar_path
+        raw = open(path, 'rb')
+        try:
+            index = OffsetIndex.open(raw, body_start, sidecar_path(path), progress)
+        except:
+            raw.close()
+            raise
+        self._lazy = LazyBookSource(raw, index, cache_size)
+        if len(index) > 0:
+            self._nextId = max(self._nextId, index.ids[-1])
+
+    def _load_books(self: Self, books: list[Book], counted: Collection[BookIndexBase] = ()) -> None:
+        '''Добавить загруженные с диска книги (см. _add_instances)'''
+        if len(books) > 0:
+            self._nextId = max(self._nextId, max(book.id for book in books))
+        self._add_instances(books, counted)
     
 class BookSearchConditionBase(abc.ABC):
     '''Базовый класс условия поиска книг'''
@@ -256,17 +975,120 @@ class DefaultBookSearchCondition(BookSearchConditionBase):
     Условие поиска книг
     '''
     def __init__(self) -> None:
-        self.by_title_pattern : re.Pattern[str] | None = None
-        self.by_author_pattern : re.Pattern[str] | None = None
+        self._title_match : Callable[[str], bool] | None = None
+        self._author_match : Callable[[str], bool] | None = None
+        self.by_title_pattern = None
+        self.by_author_pattern = None
         self.by_year_pattern : int | None = None
+        self.by_year_min : int | None = None
+        self.by_year_max : int | None = None
+        self.by_title_substring_key : str | None = None
+        self.by_author_substring_key : str | None = None
+        self.by_status_value : BookStatus | None = None
+
+    @property
+    def by_title_pattern(self: Self) -> re.Pattern[str] | None:
+        '''Регулярное выражение для названия книги (см. by_title)'''
+        return self._by_title_pattern
+
+    @by_title_pattern.setter
+    def by_title_pattern(self: Self, pattern: re.Pattern[str] | None) -> None:
+        #выражение анализируется один раз, а не при проверке каждой книги
+        self._by_title_pattern = pattern
+        self._title_match = None if pattern is None else fullmatch_predicate(pattern)
+
+    @property
+    def title_predicate(self: Self) -> Callable[[str], bool] | None:
+        '''
+        Функция, проверяющая название книги, если единственное условие на название - регулярное выражение (см. by_title). Иначе None.
+        '''
+        if self.by_title_substring_key is not None:
+            return None
+        return self._title_match
+
+    @property
+    def by_author_pattern(self: Self) -> re.Pattern[str] | None:
+        '''Регулярное выражение для автора книги (см. by_author)'''
+        return self._by_author_pattern
+
+    @by_author_pattern.setter
+    def by_author_pattern(self: Self, pattern: re.Pattern[str] | None) -> None:
+        self._by_author_pattern = pattern
+        self._author_match = None if pattern is None else fullmatch_predicate(pattern)
 
     def matches(self: Self, book: Book) -> bool:
+        #нормализуем строки книги, только если задан поиск по подстроке
+        title_key = normalize_search_key(book.title) if self.by_title_substring_key is not None else ''
+        author_key = normalize_search_key(book.author) if self.by_author_substring_key is not None else ''
+        return self.matches_keys(book, title_key, author_key)
+
+    def matches_keys(self: Self, book: Book, title_key: str, author_key: str) -> bool:
+        '''
+        Проверить, соответствует ли книга условию, используя заранее вычисленные ключи поиска.
+
+        Аргументы:
+        book : Book -- проверяемая книга.
+        title_key : str -- нормализованное название книги (см. normalize_search_key).
+        author_key : str -- нормализованный автор книги (см. normalize_search_key).
+        '''
+        return self.matches_author(book.author, author_key) and self.matches_except_author(book, title_key)
+
+    @property
+    def has_author_condition(self: Self) -> bool:
+        '''Задано ли условие на автора книги'''
+        return self.by_author_substring_key is not None or self.by_author_pattern is not None
+
+    def matches_author(self: Self, author: str, author_key: str) -> bool:
+        '''
+        Проверить только условия на автора книги.
+
+        Аргументы:
+        author : str -- автор книги.
+        author_key : str -- нормализованный автор книги (см. normalize_search_key).
+        '''
         return (
-            (self.by_author_pattern is None or self.by_author_pattern.fullmatch(book.author) is not None)
-            and
-            (self.by_title_pattern is None or self.by_title_pattern.fullmatch(book.title) is not None)
+            (self.by_author_substring_key is None or self.by_author_substring_key in author_key)
             and
+            (self._author_match is None or self._author_match(author))
+        )
+
+    @property
+    def has_year_condition(self: Self) -> bool:
+        '''Задано ли условие на год издания книги'''
+        return self.by_year_pattern is not None or self.by_year_min is not None or self.by_year_max is not None
+
+    def matches_except_author(self: Self, book: Book, title_key: str) -> bool:
+        '''
+        Проверить все условия, кроме условий на автора книги.
+
+        Аргументы:
+        book : Book -- проверяемая книга.
+        title_key : str -- нормализованное название книги (см. normalize_search_key).
+        '''
+        return (
             (self.by_year_pattern is None or self.by_year_pattern == book.year)
+            and
+            (self.by_year_min is None or self.by_year_min <= book.year)
+            and
+            (self.by_year_max is None or book.year <= self.by_year_max)
+            and
+            (self.by_status_value is None or self.by_status_value == book.status)
+            and
+            self.matches_title(book, title_key)
+        )
+
+    def matches_title(self: Self, book: Book, title_key: str) -> bool:
+        '''
+        Проверить только условия на название книги.
+
+        Аргументы:
+        book : Book -- проверяемая книга.
+        title_key : str -- нормализованное название книги (см. normalize_search_key).
+        '''
+        return (
+            (self.by_title_substring_key is None or self.by_title_substring_key in title_key)
+            and
+            (self._title_match is None or self._title_match(book.title))
         )
 
     def by_title(self: Self, pattern: re.Pattern[str]) -> Self:
@@ -288,6 +1110,26 @@ class DefaultBookSearchCondition(BookSearchConditionBase):
         '''
         self.by_author_pattern = pattern
         return self
+
+    def by_title_substring(self: Self, text: str) -> Self:
+        '''
+        Задать условие поиска по части названия книги без учёта регистра (и различия "ё"/"е").
+
+        Аргументы:
+        text : str - подстрока. Если нормализованное название книги содержит нормализованную подстроку, то книга входит в результат поиска.
+        '''
+        self.by_title_substring_key = normalize_search_key(text)
+        return self
+
+    def by_author_substring(self: Self, text: str) -> Self:
+        '''
+        Задать условие поиска по части имени автора книги без учёта регистра (и различия "ё"/"е").
+
+        Аргументы:
+        text : str - подстрока. Если нормализованный автор книги содержит нормализованную подстроку, то книга входит в результат поиска.
+        '''
+        self.by_author_substring_key = normalize_search_key(text)
+        return self
     
     def by_year(self: Self, year: int) -> Self:
         '''
@@ -297,4 +1139,26 @@ class DefaultBookSearchCondition(BookSearchConditionBase):
         year : int - год публикации. Если год публикации книги совпадает с этим, то книга входит в результат поиска
         '''
         self.by_year_pattern = year
+        return self
+
+    def by_year_range(self: Self, min: int | None = None, max: int | None = None) -> Self:
+        '''
+        Задать условие поиска по диапазону годов публикации книги
+
+        Аргументы:
+        min : int | None - минимальный год публикации (включительно). Если None, то не ограничен.
+        max : int | None - максимальный год публикации (включительно). Если None, то не ограничен.
+        '''
+        self.by_year_min = min
+        self.by_year_max = max
+        return self
+
+    def by_status(self: Self, status: BookStatus) -> Self:
+        '''
+        Задать условие поиска по статусу книги
+
+        Аргументы:
+        status : BookStatus - статус. Если статус книги совпадает с этим, то книга входит в результат поиска
+        '''
+        self.by_status_value = status
         return self
\ No newline at end of file
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+from typing import Self, Iterator, TextIO
+from collections import deque
+import contextlib
+import itertools
+import json
+import os
+import queue
+import socket
+import threading
+
+from modules.books import Book, BookStorage
+from modules.events import WeakSubscriber
+
+type ChangeRecord = dict[str, object]
+'''
+Запись ленты изменений:
+{"seq": номер, "op": "add" или "update", "book": книга в порядке Book.ROW_COLUMNS} или {"seq": номер, "op": "delete", "id": ID книги}.
+'''
+
+_TAIL_BYTES = 1 << 16
+'''Сколько байт с конца файла ленты читается при поиске последней записи'''
+
+def _encode(records: list[ChangeRecord]) -> str:
+    '''Записи ленты по одной в формате JSON на строку'''
+    return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+
+def _open_log(path: str) -> tuple[TextIO, int]:
+    '''
+    Открывает файл ленты для дописывания и возвращает его вместе с номером последней записи (0, если записей нет).
+    Неполная последняя строка (запись, прерванная аварийным завершением) отбрасывается.
+    '''
+    last = 0
+    with open(path, 'a+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - _TAIL_BYTES))
+        tail = f.read()
+        #всё после последнего перевода строки - неполная запись
+        complete = tail.rfind(b'\n') + 1
+        if complete < len(tail):
+            f.truncate(size - len(tail) + complete)
+        #первая строка могла попасть в прочитанный хвост не целиком, но последняя всегда полная
+        lines = tail[:complete].splitlines()
+        if lines:
+            last = json.loads(lines[-1])['seq']
+    return open(path, 'a', encoding='utf-8'), last
+
+def read_feed(path: str, after: int = 0) -> Iterator[ChangeRecord]:
+    '''
+    Читает записи ленты из файла по порядку, начиная с первой записи с номером больше after.
+
+    Аргументы:
+    path : str -- путь до файла ленты (см. ChangeFeed).
+    after : int -- номер последней уже обработанной потребителем записи (0, чтобы прочитать ленту с начала).
+    '''
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            #запись, которую ещё дописывают, будет прочитана при следующем чтении
+            if not line.endswith('\n'):
+                return
+            record = json.loads(line)
+            if record['seq'] > after:
+                yield record
+
+class ChangeFeed:
+    '''
+    Упорядоченная лента изменений BookStorage: добавления, смены статуса и удаления книг с возрастающими номерами записей.
+    Лента дописывается в файл (если задан путь), и потребители могут читать её из файла (см. read_feed)
+    или получать через Unix-сокет (см. ChangeFeedServer), продолжая с номера последней обработанной записи.
+    '''
+    def __init__(self, storage: BookStorage, path: str | None = None, history: int = 100_000) -> None:
+        '''
+        storage : BookStorage -- хранилище, изменения которого публикуются.
+        path : str | None -- путь до файла ленты. Если файл существует, записи дописываются в конец, а нумерация продолжается.
+        history : int -- сколько последних записей хранить в памяти для потребителей, продолжающих чтение (если файл не задан).
+        '''
+        self._lock = threading.Lock()
+        self._file : TextIO | None = None
+        self._sequence = 0
+        if path is not None:
+            self._file, self._sequence = _open_log(path)
+        self._path = path
+        self._history : deque[ChangeRecord] = deque(maxlen=history)
+        '''Последние записи ленты'''
+        self._listeners : list[queue.SimpleQueue[list[ChangeRecord]]] = []
+
+        self._storage = storage
+        storage.books_added_event += WeakSubscriber(self.__on_added)
+        storage.books_status_changed_event += WeakSubscriber(self.__on_status_changed)
+        storage.books_deleted_event += WeakSubscriber(self.__on_deleted)
+
+    @property
+    def sequence(self: Self) -> int:
+        '''Номер последней опубликованной записи (0, если записей ещё не было)'''
+        return self._sequence
+
+    def __on_added(self: Self, books: list[Book]) -> None:
+        self._publish([{'op': 'add', 'book': book.serialize_row()} for book in books])
+
+    def __on_status_changed(self: Self, books: list[Book]) -> None:
+        self._publish([{'op': 'update', 'book': book.serialize_row()} for book in books])
+
+    def __on_deleted(self: Self, books: list[Book]) -> None:
+        self._publish([{'op': 'delete', 'id': book.id} for book in books])
+
+    def _publish(self: Self, records: list[ChangeRecord]) -> None:
+        '''Пронумеровать записи и опубликовать их одной пачкой'''
+        with self._lock:
+            for record in records:
+                self._sequence += 1
+                record['seq'] = self._sequence
+            if self._file is not None:
+                self._file.write(_encode(records))
+                self._file.flush()
+            self._history.extend(records)
+            for listener in self._listeners:
+                listener.put(records)
+
+    def records_after(self: Self, after: int, until: int | None = None) -> Iterator[ChangeRecord] | None:
+        '''
+        Возвращает записи с номерами больше after (и не больше until, если задан) по порядку
+        или None, если часть этих записей уже недоступна (записи вытеснены из памяти, а файл ленты не задан, обрезан или заменён).
+
+        Аргументы:
+        after : int -- номер последней обработанной записи.
+        until : int | None -- номер последней возвращаемой записи.
+        '''
+        if until is None:
+            #номер берётся под блокировкой, чтобы запись с этим номером уже была в файле
+            with self._lock:
+                until = self._sequence
+        if self._path is not None:
+            records = read_feed(self._path, after)
+            #записи продолжают after, только если первая прочитанная запись идёт сразу за ним
+            first = next(records, None)
+            if first is None:
+                return None if after < until else iter(())
+            if first['seq'] != after + 1:
+                return None
+            return itertools.takewhile(lambda record: record['seq'] <= until, itertools.chain((first,), records)) # type: ignore
+        with self._lock:
+            history = list(self._history)
+        first = history[0]['seq'] if history else self._sequence + 1
+        if after + 1 < first: # type: ignore
+            return None
+        return iter([record for record in history if after < record['seq'] <= until]) # type: ignore
+
+    def listen(self: Self) -> tuple[queue.SimpleQueue[list[ChangeRecord]], int]:
+        '''
+        Подписаться на новые записи. Возвращает очередь, в которую попадают пачки записей, опубликованных после подписки,
+        и номер последней записи, опубликованной до неё.
+        '''
+        listener : queue.SimpleQueue[list[ChangeRecord]] = queue.SimpleQueue()
+        with self._lock:
+            self._listeners.append(listener)
+            return listener, self._sequence
+
+    def unlisten(self: Self, listener: queue.SimpleQueue[list[ChangeRecord]]) -> None:
+        '''Отписать очередь, полученную из listen'''
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def close(self: Self) -> None:
+        '''Перестать публиковать изменения и закрыть файл ленты'''
+        self._storage.books_added_event -= WeakSubscriber(self.__on_added)
+        self._storage.books_status_changed_event -= WeakSubscriber(self.__on_status_changed)
+        self._storage.books_deleted_event -= WeakSubscriber(self.__on_deleted)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for listener in self._listeners:
+                listener.put([])
+
+class ChangeFeedError(ValueError):
+    '''Лента изменений не может выдать записи, начиная с запрошенного номера.'''
+    pass
+
+class ChangeFeedServer:
+    '''
+    Передаёт ленту изменений потребителям через Unix-сокет в отдельных потоках.
+    Потребитель подключается и отправляет строку {"after": номер последней обработанной записи},
+    после чего получает пропущенные записи и затем новые записи по мере публикации, по одной в формате JSON на строку.
+    Если пропущенные записи недоступны, потребитель получает строку {"error": описание}, и соединение закрывается.
+    '''
+    def __init__(self, feed: ChangeFeed, path: str) -> None:
+        '''
+        feed : ChangeFeed -- публикуемая лента.
+        path : str -- путь до Unix-сокета. Существующий файл сокета заменяется.
+        '''
+        self._feed = feed
+        self._path = path
+        self._socket : socket.socket | None = None
+        self._clients : list[tuple[socket.socket, queue.SimpleQueue[list[ChangeRecord]]]] = []
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._thread = threading.Thread(target=self.__accept, name='change-feed', daemon=True)
+
+    def start(self: Self) -> Self:
+        '''Начать принимать подключения'''
+        if os.path.exists(self._path):
+            os.remove(self._path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self._path)
+        self._socket.listen()
+        self._thread.start()
+        return self
+
+    def stop(self: Self) -> None:
+        '''Закрыть сокет и все подключения'''
+        if self._socket is None:
+            return
+        self._stopping = True
+        #shutdown прерывает ожидание подключения, но не на всех платформах и может завершиться ошибкой,
+        #поэтому ожидание дополнительно прерывается подключением к самому сокету
+        with contextlib.suppress(OSError):
+            self._socket.shutdown(socket.SHUT_RDWR)
+        with contextlib.suppress(OSError), socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wake:
+            wake.connect(self._path)
+        self._thread.join()
+        self._socket.close()
+        self._socket = None
+        with self._lock:
+            for conn, listener in self._clients:
+                listener.put([])
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+    def __accept(self: Self) -> None:
+        assert self._socket is not None
+        while True:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+            if self._stopping:
+                conn.close()
+                return
+            threading.Thread(target=self.__serve, args=(conn,), name='change-feed-client', daemon=True).start()
+
+    def __serve(self: Self, conn: socket.socket) -> None:
+        feed = self._feed
+        listener, last = feed.listen()
+        with self._lock:
+            self._clients.append((conn, listener))
+        try:
+            with conn, conn.makefile('rb') as reader, conn.makefile('w', encoding='utf-8') as writer:
+                request = json.loads(reader.readline())
+                after = request['after']
+                #записи, опубликованные во время отправки пропущенных, попадут в очередь и будут отправлены следом
+                backlog = feed.records_after(after, last) if 0 <= after <= last else None
+                if backlog is None:
+                    writer.write(_encode([{'error': f'Записи после {after} недоступны, последняя запись ленты: {last}'}]))
+                    return
+                sent = after
+                for record in backlog:
+                    writer.write(_encode([record]))
+                    sent = record['seq'] # type: ignore
+                writer.flush()
+                while True:
+                    records = listener.get()
+                    if not records:
+                        return
+                    writer.write(_encode([record for record in records if record['seq'] > sent])) # type: ignore
+                    writer.flush()
+                    sent = records[-1]['seq'] # type: ignore
+        except (OSError, ValueError, KeyError):
+            #потребитель отключился или прислал некорректный запрос
+            pass
+        finally:
+            feed.unlisten(listener)
+            with self._lock:
+                self._clients.remove((conn, listener))
+
+def follow(path: str, after: int = 0) -> Iterator[ChangeRecord]:
+    '''
+    Подключается к ChangeFeedServer и возвращает записи ленты с номерами больше after по мере их публикации.
+    Чтобы продолжить после переподключения, достаточно передать номер последней обработанной записи.
+
+    Аргументы:
+    path : str -- путь до Unix-сокета ленты.
+    after : int -- номер последней обработанной записи (0, чтобы получить ленту с начала).
+
+    Исключения:
+    ChangeFeedError -- если записи после after недоступны.
+    '''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        conn.sendall(_encode([{'after': after}]).encode('utf-8'))
+        with conn.makefile('r', encoding='utf-8') as reader:
+            for line in reader:
+                record = json.loads(line)
+                if 'error' in record:
+                    raise ChangeFeedError(record['error'])
+                yield record
+
+if __name__ == '__main__':
+    #простой потребитель ленты: печатает записи, полученные через сокет
+    import argparse
+    parser = argparse.ArgumentParser(description='Вывести записи ленты изменений из Unix-сокета')
+    parser.add_argument('socket', help='путь до Unix-сокета ленты')
+    parser.add_argument('--after', type=int, default=0, help='номер последней уже обработанной записи')
+    args = parser.parse_args()
+    try:
+        for record in follow(args.socket, args.after):
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+    except KeyboardInterrupt:
+        pass
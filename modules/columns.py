@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from typing import Self, TYPE_CHECKING
+
+from modules.indexes import BookIndexBase
+
+if TYPE_CHECKING:
+    import numpy
+    from modules.books import Book, BookStatus
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+class NumericColumns(BookIndexBase):
+    '''
+    Числовые поля книг (год издания и статус) в массивах NumPy, индексированных по ID книги.
+    Позволяет проверять условия на год и статус сразу для всех книг векторными операциями.
+    Используется, только если установлен NumPy (см. create_numeric_columns).
+    '''
+    def __init__(self, np: object) -> None:
+        '''
+        np : object -- модуль numpy.
+        '''
+        self._np : numpy = np # type: ignore
+        self._size = 0
+        '''Число используемых элементов массивов (максимальный ID книги + 1)'''
+        self._alive : numpy.ndarray = self._np.zeros(0, dtype=bool)
+        '''Есть ли в хранилище книга с этим ID'''
+        self._year : numpy.ndarray = self._np.zeros(0, dtype=self._np.int64)
+        self._status : numpy.ndarray = self._np.zeros(0, dtype=self._np.int8)
+        self.usable = True
+        '''Можно ли использовать столбцы для поиска. False, если год издания одной из книг не помещается в int64.'''
+
+    def _reserve(self: Self, size: int) -> None:
+        '''Увеличить массивы (вдвое, чтобы добавление книг было O(1) в среднем) до размера не меньше size'''
+        if size <= len(self._alive):
+            return
+        capacity = max(size, 2 * len(self._alive), 1024)
+        np = self._np
+        for name in ('_alive', '_year', '_status'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self: Self, book: Book) -> None:
+        id = book.id
+        if id < 0:
+            raise ValueError
+        self._reserve(id + 1)
+        self._size = max(self._size, id + 1)
+        self._alive[id] = True
+        self._status[id] = book.status.value
+        if _INT64_MIN <= book.year <= _INT64_MAX:
+            self._year[id] = book.year
+        else:
+            self.usable = False
+
+    def add_many(self: Self, books: list[Book]) -> None:
+        if len(books) == 0:
+            return
+        years = [book.year for book in books]
+        if min(years) < _INT64_MIN or max(years) > _INT64_MAX:
+            super().add_many(books)
+            return
+        np = self._np
+        ids = np.fromiter((book.id for book in books), dtype=np.int64, count=len(books))
+        if ids.min() < 0:
+            raise ValueError
+        size = int(ids.max()) + 1
+        self._reserve(size)
+        self._size = max(self._size, size)
+        self._alive[ids] = True
+        self._year[ids] = np.array(years, dtype=np.int64)
+        self._status[ids] = np.fromiter((book.status.value for book in books), dtype=np.int8, count=len(books))
+
+    def remove(self: Self, book: Book) -> None:
+        self._alive[book.id] = False
+
+    def update_status(self: Self, book: Book, old_status: BookStatus) -> None:
+        self._status[book.id] = book.status.value
+
+    def select(self: Self, year: int | None = None, year_min: int | None = None, year_max: int | None = None, status: BookStatus | None = None) -> list[int]:
+        '''
+        Возвращает по возрастанию ID книг, удовлетворяющих всем заданным условиям.
+
+        Аргументы:
+        year : int | None -- год издания.
+        year_min : int | None -- минимальный год издания (включительно).
+        year_max : int | None -- максимальный год издания (включительно).
+        status : BookStatus | None -- статус книги.
+        '''
+        np = self._np
+        n = self._size
+        mask = self._alive[:n].copy()
+        years = self._year[:n]
+        #все годы в столбце помещаются в int64, поэтому условия за его пределами проверяются без массивов
+        if (year is not None and not _INT64_MIN <= year <= _INT64_MAX) or (year_min is not None and year_min > _INT64_MAX) or (year_max is not None and year_max < _INT64_MIN):
+            return []
+        if year is not None:
+            mask &= years == year
+        if year_min is not None:
+            mask &= years >= max(year_min, _INT64_MIN)
+        if year_max is not None:
+            mask &= years <= min(year_max, _INT64_MAX)
+        if status is not None:
+            mask &= self._status[:n] == status.value
+        return np.flatnonzero(mask).tolist()
+
+_numpy_missing = False
+'''Не удалось ли импортировать NumPy (чтобы не искать модуль при создании каждого хранилища)'''
+
+def numpy_module() -> object | None:
+    '''
+    Возвращает модуль numpy или None, если NumPy не установлен.
+    '''
+    global _numpy_missing
+    if _numpy_missing:
+        return None
+    try:
+        import numpy
+    except ImportError:
+        _numpy_missing = True
+        return None
+    return numpy
+
+def create_numeric_columns() -> NumericColumns | None:
+    '''
+    Возвращает пустой NumericColumns или None, если NumPy не установлен.
+    '''
+    np = numpy_module()
+    return NumericColumns(np) if np is not None else None
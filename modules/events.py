@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing import Callable, Self
 from weakref import WeakMethod
 
+from modules.metrics import instrument_method
+
 class WeakSubscriber[*TArgs](WeakMethod[Callable[[*TArgs], None]]):
     '''
     Слабый подписчик события (Event)
@@ -59,4 +61,7 @@ class Event[*TArgs]:
                 purge = purge or not sub.alive
         
         if purge:
-            self._subscribers = [x for x in self._subscribers if not isinstance(x, WeakSubscriber) or x.alive]
\ No newline at end of file
+            self._subscribers = [x for x in self._subscribers if not isinstance(x, WeakSubscriber) or x.alive]
+
+#событие вызывается очень часто, поэтому при выключенном сборе метрик вызывается без обёртки
+instrument_method(Event, '__call__', 'event.call')
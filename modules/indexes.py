@@ -0,0 +1,689 @@
+from __future__ import annotations
+
+from typing import Self, Callable, TYPE_CHECKING
+from array import array
+from collections import Counter
+import abc
+import bisect
+import heapq
+import math
+
+from modules.text import normalize_search_key, tokenize, split_words, count_tokens
+
+if TYPE_CHECKING:
+    import numpy
+    from modules.books import Book, BookStatus
+
+class BookIndexBase(abc.ABC):
+    '''
+    Базовый класс вспомогательного индекса, который BookStorage обновляет при каждом изменении набора книг.
+    '''
+
+    @abc.abstractmethod
+    def add(self: Self, book: Book) -> None:
+        '''Учесть добавленную в хранилище книгу'''
+        pass
+
+    @abc.abstractmethod
+    def remove(self: Self, book: Book) -> None:
+        '''Учесть удалённую из хранилища книгу'''
+        pass
+
+    def add_many(self: Self, books: list[Book]) -> None:
+        '''
+        Учесть сразу много добавленных книг (например, загруженных с диска).
+        По умолчанию добавляет книги по одной; индексы, которые можно построить быстрее целиком, переопределяют этот метод.
+        '''
+        for book in books:
+            self.add(book)
+
+    def update_status(self: Self, book: Book, old_status: BookStatus) -> None:
+        '''
+        Учесть изменение статуса книги. К моменту вызова book.status уже содержит новый статус.
+        По умолчанию ничего не делает.
+        '''
+        pass
+
+class SearchKeysIndex(BookIndexBase):
+    '''
+    Нормализованные ключи поиска (см. normalize_search_key) для названия каждой книги.
+    Ключи вычисляются один раз при добавлении книги, а не при каждом поиске.
+    Ключи авторов хранятся в AuthorDictionary - по одному на каждого автора.
+    '''
+    def __init__(self) -> None:
+        self.title_keys : dict[int, str] = {}
+        '''Нормализованные названия книг по ID книги'''
+
+    def add(self: Self, book: Book) -> None:
+        self.title_keys[book.id] = normalize_search_key(book.title)
+
+    def add_many(self: Self, books: list[Book]) -> None:
+        #одинаковые названия нормализуются один раз и хранят один экземпляр ключа
+        keys : dict[str, str] = {}
+        title_keys = self.title_keys
+        for book in books:
+            title = book.title
+            key = keys.get(title)
+            if key is None:
+                key = keys[title] = normalize_search_key(title)
+            title_keys[book.id] = key
+
+    def remove(self: Self, book: Book) -> None:
+        del self.title_keys[book.id]
+
+class AuthorDictionary(BookIndexBase):
+    '''
+    Словарное кодирование авторов: каждому различному автору соответствует целочисленный код.
+    При добавлении книги её автор заменяется на единственный экземпляр строки с тем же значением,
+    так что книги одного автора не хранят копии строки. Для каждого автора хранится нормализованный ключ поиска,
+    поэтому условие на автора можно проверить один раз для каждого автора, а не для каждой книги.
+    '''
+    def __init__(self) -> None:
+        self._codes : dict[str, int] = {}
+        '''Код по автору'''
+        self.authors : list[str | None] = []
+        '''Автор по коду. None для освободившихся кодов.'''
+        self.keys : list[str | None] = []
+        '''Нормализованный автор по коду. None для освободившихся кодов.'''
+        self._refs : list[int] = []
+        '''Число книг автора по коду'''
+        self._free : list[int] = []
+        '''Освободившиеся коды'''
+        self.book_codes : list[int | None] = []
+        '''Код автора по ID книги. ID книг в хранилище идут подряд, поэтому список почти не содержит пропусков.'''
+
+    def add(self: Self, book: Book) -> None:
+        if book.id < 0:
+            raise ValueError
+        code = self._codes.get(book.author)
+        if code is None:
+            code = self.__new_code(book.author)
+        self._refs[code] += 1
+        book.author = self.authors[code] # type: ignore
+
+        if book.id >= len(self.book_codes):
+            self.book_codes.extend([None] * (book.id + 1 - len(self.book_codes)))
+        self.book_codes[book.id] = code
+
+    def add_many(self: Self, books: list[Book]) -> None:
+        if len(books) == 0:
+            return
+        top = max(book.id for book in books)
+        if min(book.id for book in books) < 0:
+            raise ValueError
+        book_codes = self.book_codes
+        if top >= len(book_codes):
+            book_codes.extend([None] * (top + 1 - len(book_codes)))
+        codes = self._codes
+        refs = self._refs
+        authors = self.authors
+        for book in books:
+            code = codes.get(book.author)
+            if code is None:
+                code = self.__new_code(book.author)
+            refs[code] += 1
+            book.author = authors[code] # type: ignore
+            book_codes[book.id] = code
+
+    def __new_code(self: Self, author: str) -> int:
+        '''Выделить код для нового автора'''
+        key = normalize_search_key(author)
+        if len(self._free) > 0:
+            code = self._free.pop()
+            self.authors[code] = author
+            self.keys[code] = key
+        else:
+            code = len(self.authors)
+            self.authors.append(author)
+            self.keys.append(key)
+            self._refs.append(0)
+        self._codes[author] = code
+        return code
+
+    def remove(self: Self, book: Book) -> None:
+        code = self.book_codes[book.id]
+        assert code is not None
+        self.book_codes[book.id] = None
+        self._refs[code] -= 1
+        if self._refs[code] == 0:
+            del self._codes[book.author]
+            self.authors[code] = None
+            self.keys[code] = None
+            self._free.append(code)
+
+    def __len__(self: Self) -> int:
+        '''Число различных авторов'''
+        return len(self._codes)
+
+    def code_of(self: Self, author: str) -> int | None:
+        '''Код автора или None, если книг этого автора нет'''
+        return self._codes.get(author)
+
+    def select(self: Self, predicate: Callable[[str, str], bool]) -> bytearray:
+        '''
+        Проверяет условие для каждого различного автора.
+        Возвращает массив флагов по коду автора: 1, если predicate(автор, нормализованный автор) истинно.
+
+        Аргументы:
+        predicate : Callable[[str, str], bool] -- условие на автора и его нормализованное имя.
+        '''
+        flags = bytearray(len(self.authors))
+        for code, author in enumerate(self.authors):
+            if author is not None and predicate(author, self.keys[code]): # type: ignore
+                flags[code] = 1
+        return flags
+
+class DuplicateIndex(BookIndexBase):
+    '''
+    Хэш-индекс книг по нормализованным названию, автору и году издания (см. normalize_search_key).
+    Позволяет за O(1) найти книги, совпадающие с новой, и за один проход найти все группы повторяющихся книг.
+    Использует ключи SearchKeysIndex и AuthorDictionary, поэтому должен добавляться после них (и удаляться раньше них).
+    '''
+    def __init__(self, search_keys: SearchKeysIndex, authors: AuthorDictionary) -> None:
+        '''
+        search_keys : SearchKeysIndex -- нормализованные названия книг.
+        authors : AuthorDictionary -- нормализованные авторы.
+        '''
+        self._search_keys = search_keys
+        self._authors = authors
+        self._books : dict[tuple[str, str, int], Book | list[Book]] = {}
+        '''Книги по ключу. Список только для повторяющихся книг, чтобы не создавать его для каждой книги.'''
+        self.duplicate_count = 0
+        '''Число книг, совпадающих с более ранней книгой'''
+
+    def _key(self: Self, book: Book) -> tuple[str, str, int]:
+        '''Ключ книги хранилища из уже вычисленных нормализованных названия и автора'''
+        return self._search_keys.title_keys[book.id], self._authors.keys[self._authors.book_codes[book.id]], book.year # type: ignore
+
+    @staticmethod
+    def key_of(title: str, author: str, year: int) -> tuple[str, str, int]:
+        '''Ключ для книги с указанными полями'''
+        return normalize_search_key(title), normalize_search_key(author), year
+
+    def add(self: Self, book: Book) -> None:
+        key = self._key(book)
+        existing = self._books.get(key)
+        if existing is None:
+            self._books[key] = book
+            return
+        if isinstance(existing, list):
+            existing.append(book)
+        else:
+            self._books[key] = [existing, book]
+        self.duplicate_count += 1
+
+    def add_many(self: Self, books: list[Book]) -> None:
+        title_keys = self._search_keys.title_keys
+        author_keys = self._authors.keys
+        book_codes = self._authors.book_codes
+        index = self._books
+        for book in books:
+            key = (title_keys[book.id], author_keys[book_codes[book.id]], book.year) # type: ignore
+            existing = index.get(key)
+            if existing is None:
+                index[key] = book
+                continue
+            if isinstance(existing, list):
+                existing.append(book)
+            else:
+                index[key] = [existing, book]
+            self.duplicate_count += 1
+
+    def remove(self: Self, book: Book) -> None:
+        key = self._key(book)
+        existing = self._books[key]
+        if not isinstance(existing, list):
+            del self._books[key]
+            return
+        existing.remove(book)
+        if len(existing) == 1:
+            self._books[key] = existing[0]
+        self.duplicate_count -= 1
+
+    def find(self: Self, key: tuple[str, str, int]) -> list[Book]:
+        '''
+        Возвращает книги с указанным ключом (см. key_of) в порядке добавления.
+
+        Аргументы:
+        key : tuple[str, str, int] -- нормализованные название, автор и год издания.
+        '''
+        existing = self._books.get(key)
+        if existing is None:
+            return []
+        return list(existing) if isinstance(existing, list) else [existing]
+
+    def groups(self: Self) -> list[list[Book]]:
+        '''Возвращает все группы из двух и более совпадающих книг (книги каждой группы - в порядке добавления)'''
+        return [list(books) for books in self._books.values() if isinstance(books, list)]
+
+class StatusIndex(BookIndexBase):
+    '''
+    Книги, сгруппированные по статусу. Позволяет получить все книги с заданным статусом за O(k), где k - число таких книг.
+    '''
+    def __init__(self) -> None:
+        self._by_status : dict[BookStatus, dict[int, Book]] = {}
+
+    def add(self: Self, book: Book) -> None:
+        self._by_status.setdefault(book.status, {})[book.id] = book
+
+    def add_many(self: Self, books: list[Book]) -> None:
+        by_status = self._by_status
+        for book in books:
+            by_status.setdefault(book.status, {})[book.id] = book
+
+    def remove(self: Self, book: Book) -> None:
+        del self._by_status[book.status][book.id]
+
+    def update_status(self: Self, book: Book, old_status: BookStatus) -> None:
+        del self._by_status[old_status][book.id]
+        self.add(book)
+
+    def books(self: Self, status: BookStatus) -> dict[int, Book]:
+        '''
+        Возвращает книги с указанным статусом по их ID. Возвращаемый словарь нельзя изменять.
+        '''
+        return self._by_status.get(status, {})
+
+class TokenPrefixIndex(BookIndexBase):
+    '''
+    Префиксный индекс слов одного строкового поля книги для автодополнения.
+    Хранит отсортированный массив различных слов и число книг, в которых встречается каждое слово.
+    '''
+    def __init__(self, field: Callable[[Book], str]) -> None:
+        '''
+        Аргументы:
+        field : Callable[[Book], str] -- функция, возвращающая индексируемое поле книги.
+        '''
+        self._field = field
+        self._counts : dict[str, int] = {}
+        '''Число книг, содержащих слово'''
+        self._sorted : list[str] = []
+        '''Отсортированные слова'''
+        self._pending : set[str] = set()
+        '''Новые слова, ещё не вставленные в отсортированный массив'''
+        self._top : dict[str, list[tuple[int, str]]] = {}
+        '''
+        Лучшие слова коротких префиксов в виде отсортированных ключей (-число книг, слово).
+        Список префикса строится при первом запросе и затем поддерживается при изменении числа книг.
+        '''
+        self._bounds : dict[str, tuple[int, str] | None] = {}
+        '''
+        Ключ, меньше которого ключи всех слов в списке префикса (None, если в списке все слова с этим префиксом).
+        Слова с меньшими ключами всегда есть в списке, поэтому его начало - точный ответ на запрос.
+        '''
+
+    SHORT_PREFIX = 2
+    '''Максимальная длина префикса, для которого хранится список лучших слов (слов с более длинным префиксом немного)'''
+    TOP_SIZE = 32
+    '''Размер списка лучших слов префикса'''
+
+    def add(self: Self, book: Book) -> None:
+        for token in set(tokenize(self._field(book))):
+            count = self._counts.get(token, 0)
+            self._counts[token] = count + 1
+            if count == 0:
+                self._pending.add(token)
+            if self._top:
+                self._update_top(token, count, count + 1)
+
+    def add_many(self: Self, books: list[Book]) -> None:
+        self.add_counts(count_tokens(map(self._field, books)))
+
+    def add_counts(self: Self, added: dict[str, int]) -> None:
+        '''
+        Учесть добавленные книги по уже подсчитанному числу книг с каждым словом (см. count_tokens),
+        например, подсчитанному в процессах параллельной загрузки.
+        '''
+        counts = self._counts
+        for token, n in added.items():
+            count = counts.get(token, 0)
+            counts[token] = count + n
+            if count == 0:
+                self._pending.add(token)
+        #списки лучших слов строятся заново при следующем запросе
+        self._top.clear()
+        self._bounds.clear()
+
+    def remove(self: Self, book: Book) -> None:
+        for token in set(tokenize(self._field(book))):
+            count = self._counts[token] - 1
+            if self._top:
+                self._update_top(token, count + 1, count)
+            if count > 0:
+                self._counts[token] = count
+                continue
+            del self._counts[token]
+            if token in self._pending:
+                self._pending.remove(token)
+            else:
+                del self._sorted[bisect.bisect_left(self._sorted, token)]
+
+    def _merge_pending(self: Self) -> None:
+        '''Вставить новые слова в отсортированный массив'''
+        if len(self._pending) == 0:
+            return
+        #после загрузки БД новых слов много, и пересортировать всё дешевле, чем вставлять по одному
+        if len(self._pending) > 16 and len(self._pending) > len(self._sorted) // 16:
+            self._sorted = sorted(self._counts)
+        else:
+            for token in self._pending:
+                bisect.insort(self._sorted, token)
+        self._pending.clear()
+
+    def complete(self: Self, prefix: str, limit: int = 10) -> list[str]:
+        '''
+        Возвращает до limit слов, начинающихся с prefix, в порядке убывания числа книг с этим словом.
+
+        Аргументы:
+        prefix : str -- начало слова (нормализуется так же, как слова в индексе).
+        limit : int -- максимальное число подсказок.
+        '''
+        prefix = normalize_search_key(prefix)
+        if len(prefix) > self.SHORT_PREFIX or limit > self.TOP_SIZE:
+            counts = self._counts
+            return heapq.nsmallest(limit, self._matching(prefix), key=lambda t: (-counts[t], t))
+
+        top = self._top.get(prefix)
+        #в списке меньше limit слов, но есть слова за его границей - список строится заново
+        if top is None or (len(top) < limit and self._bounds[prefix] is not None):
+            top = self._build_top(prefix)
+        return [token for _, token in top[:limit]]
+
+    def _matching(self: Self, prefix: str) -> list[str]:
+        '''Все слова, начинающиеся с prefix'''
+        self._merge_pending()
+        matching : list[str] = []
+        for i in range(bisect.bisect_left(self._sorted, prefix), len(self._sorted)):
+            token = self._sorted[i]
+            if not token.startswith(prefix):
+                break
+            matching.append(token)
+        return matching
+
+    def _build_top(self: Self, prefix: str) -> list[tuple[int, str]]:
+        '''Построить список лучших слов префикса по всем словам с этим префиксом'''
+        counts = self._counts
+        keys = sorted((-counts[token], token) for token in self._matching(prefix))
+        bound = None
+        if len(keys) > self.TOP_SIZE:
+            bound = keys[self.TOP_SIZE]
+            del keys[self.TOP_SIZE:]
+        self._top[prefix] = keys
+        self._bounds[prefix] = bound
+        return keys
+
+    def _update_top(self: Self, token: str, old: int, new: int) -> None:
+        '''Обновить списки лучших слов префиксов token после изменения числа книг с old на new'''
+        for length in range(min(self.SHORT_PREFIX, len(token)) + 1):
+            prefix = token[:length]
+            keys = self._top.get(prefix)
+            if keys is None:
+                continue
+            if old > 0:
+                i = bisect.bisect_left(keys, (-old, token))
+                if i < len(keys) and keys[i] == (-old, token):
+                    del keys[i]
+            bound = self._bounds[prefix]
+            #слово за границей списка остаётся за ней, пока его ключ не меньше границы
+            if new > 0 and (bound is None or (-new, token) < bound):
+                bisect.insort(keys, (-new, token))
+                if len(keys) > self.TOP_SIZE:
+                    self._bounds[prefix] = keys[self.TOP_SIZE]
+                    del keys[self.TOP_SIZE:]
+
+class BookStatistics(BookIndexBase):
+    '''
+    Статистика по книгам хранилища, обновляемая за O(1) при каждом изменении:
+    число книг по статусам, число книг по годам издания и по авторам.
+    '''
+    def __init__(self) -> None:
+        self._total = 0
+        self._by_status : dict[BookStatus, int] = {}
+        self._by_year : dict[int, int] = {}
+        self._by_author : dict[str, int] = {}
+
+    @staticmethod
+    def _increment[K](counter: dict[K, int], key: K, delta: int) -> None:
+        '''Изменить счётчик на delta, удаляя нулевые счётчики'''
+        value = counter.get(key, 0) + delta
+        if value == 0:
+            del counter[key]
+        else:
+            counter[key] = value
+
+    def add(self: Self, book: Book) -> None:
+        self._total += 1
+        self._increment(self._by_status, book.status, 1)
+        self._increment(self._by_year, book.year, 1)
+        self._increment(self._by_author, book.author, 1)
+
+    def add_many(self: Self, books: list[Book]) -> None:
+        self._total += len(books)
+        for counter, added in ((self._by_status, Counter(book.status for book in books)),
+                               (self._by_year, Counter(book.year for book in books)),
+                               (self._by_author, Counter(book.author for book in books))):
+            for key, n in added.items():
+                counter[key] = counter.get(key, 0) + n # type: ignore
+
+    def remove(self: Self, book: Book) -> None:
+        self._total -= 1
+        self._increment(self._by_status, book.status, -1)
+        self._increment(self._by_year, book.year, -1)
+        self._increment(self._by_author, book.author, -1)
+
+    def update_status(self: Self, book: Book, old_status: BookStatus) -> None:
+        self._increment(self._by_status, old_status, -1)
+        self._increment(self._by_status, book.status, 1)
+
+    @property
+    def total(self: Self) -> int:
+        '''Общее число книг'''
+        return self._total
+
+    def count_by_status(self: Self, status: BookStatus) -> int:
+        '''Число книг с указанным статусом'''
+        return self._by_status.get(status, 0)
+
+    def books_per_year(self: Self) -> dict[int, int]:
+        '''Число книг по годам издания, упорядоченное по году'''
+        return dict(sorted(self._by_year.items()))
+
+    def authors_count(self: Self) -> int:
+        '''Число различных авторов'''
+        return len(self._by_author)
+
+    def books_by_author(self: Self, author: str) -> int:
+        '''Число книг указанного автора'''
+        return self._by_author.get(author, 0)
+
+    def top_authors(self: Self, limit: int = 10) -> list[tuple[str, int]]:
+        '''
+        Возвращает до limit авторов с наибольшим числом книг в виде пар (автор, число книг).
+
+        Аргументы:
+        limit : int -- максимальное число авторов.
+        '''
+        return heapq.nsmallest(limit, self._by_author.items(), key=lambda item: (-item[1], item[0]))
+
+class KeywordIndex(BookIndexBase):
+    '''
+    Инвертированный индекс слов названия и автора книг (см. tokenize) для ранжированного поиска по ключевым словам (BM25).
+    Для каждого слова хранятся массивы ID книг, содержащих слово, и числа вхождений слова в книгу.
+    Удалённые книги убираются из массивов не сразу, а при перестройке, когда их становится больше, чем оставшихся.
+    Использует ключи SearchKeysIndex, поэтому должен добавляться после него (и удаляться раньше него).
+    '''
+    K1 = 1.2
+    '''Насыщение вклада повторяющегося слова'''
+    B = 0.75
+    '''Степень нормализации по длине книги (числу слов в названии и авторе)'''
+
+    def __init__(self, search_keys: SearchKeysIndex, np: object | None = None) -> None:
+        '''
+        search_keys : SearchKeysIndex -- нормализованные названия книг.
+        np : object | None -- модуль numpy для векторного подсчёта оценок или None.
+        '''
+        self._search_keys = search_keys
+        self._np = np
+        self._ids : dict[str, array[int]] = {}
+        '''ID книг по слову'''
+        self._counts : dict[str, bytearray] = {}
+        '''Число вхождений слова в книгу (не больше 255) в том же порядке, что и self._ids'''
+        self._frequencies : dict[str, int] = {}
+        '''Число оставшихся (не удалённых) книг со словом'''
+        self._lengths = array('q')
+        '''Число слов книги по ID. 0 для удалённых книг и книг без слов.'''
+        self._author_tokens : dict[str, list[str]] = {}
+        '''Слова автора (авторы повторяются, поэтому разбиваются на слова один раз)'''
+        self._author_books : dict[str, int] = {}
+        '''Число книг автора в индексе. Слова автора забываются вместе с его последней книгой.'''
+        self._books = 0
+        self._total_length = 0
+        self._dead = 0
+        '''Число элементов массивов, относящихся к удалённым книгам'''
+        self._live = 0
+        '''Число элементов массивов, относящихся к оставшимся книгам'''
+
+    def _tokens(self: Self, book: Book) -> list[str]:
+        '''Слова названия и автора книги (с повторами)'''
+        author_tokens = self._author_tokens.get(book.author)
+        if author_tokens is None:
+            author_tokens = self._author_tokens[book.author] = tokenize(book.author)
+        #название уже нормализовано в SearchKeysIndex
+        return split_words(self._search_keys.title_keys[book.id]) + author_tokens
+
+    def add(self: Self, book: Book) -> None:
+        id = book.id
+        if id < 0:
+            raise ValueError
+        tokens = self._tokens(book)
+        author = book.author
+        if len(tokens) == 0:
+            #книга без слов не попадает в индекс, поэтому слова её автора хранятся, только если у него есть другие книги
+            if author not in self._author_books:
+                del self._author_tokens[author]
+            return
+        self._author_books[author] = self._author_books.get(author, 0) + 1
+        if id >= len(self._lengths):
+            self._lengths.frombytes(bytes(self._lengths.itemsize * (id + 1 - len(self._lengths))))
+        self._lengths[id] = len(tokens)
+        self._books += 1
+        self._total_length += len(tokens)
+        counts = dict.fromkeys(tokens, 1)
+        if len(counts) != len(tokens):
+            for token in counts:
+                counts[token] = tokens.count(token)
+        self._live += len(counts)
+        ids_by_token = self._ids
+        frequencies = self._frequencies
+        for token, count in counts.items():
+            ids = ids_by_token.get(token)
+            if ids is None:
+                ids = ids_by_token[token] = array('q')
+                self._counts[token] = bytearray()
+            ids.append(id)
+            self._counts[token].append(min(count, 255))
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+    def remove(self: Self, book: Book) -> None:
+        id = book.id
+        if id >= len(self._lengths) or self._lengths[id] == 0:
+            return
+        tokens = set(self._tokens(book))
+        author = book.author
+        author_books = self._author_books[author] - 1
+        if author_books > 0:
+            self._author_books[author] = author_books
+        else:
+            del self._author_books[author]
+            del self._author_tokens[author]
+        self._books -= 1
+        self._total_length -= self._lengths[id]
+        self._lengths[id] = 0
+        self._live -= len(tokens)
+        self._dead += len(tokens)
+        for token in tokens:
+            frequency = self._frequencies[token] - 1
+            if frequency > 0:
+                self._frequencies[token] = frequency
+            else:
+                #все книги со словом удалены - массивы слова больше не нужны
+                del self._frequencies[token]
+                self._dead -= len(self._ids.pop(token))
+                del self._counts[token]
+        if self._dead > self._live:
+            self._compact()
+
+    def _compact(self: Self) -> None:
+        '''Убрать удалённые книги из массивов всех слов'''
+        lengths = self._lengths
+        for token, ids in self._ids.items():
+            counts = self._counts[token]
+            keep = [i for i, id in enumerate(ids) if lengths[id] != 0]
+            self._ids[token] = array('q', (ids[i] for i in keep))
+            self._counts[token] = bytearray(counts[i] for i in keep)
+        self._dead = 0
+
+    def search(self: Self, query: str, limit: int = 10) -> list[tuple[int, float]]:
+        '''
+        Возвращает до limit пар (ID книги, оценка) для книг, содержащих хотя бы одно слово запроса, в порядке убывания оценки BM25.
+        Книги с равной оценкой упорядочены по возрастанию ID. Лучшие книги выбираются кучей, без сортировки всех найденных.
+
+        Аргументы:
+        query : str -- слова запроса через пробел (или любые другие разделители), без учёта регистра и различия "ё"/"е".
+        limit : int -- максимальное число книг.
+        '''
+        if self._books == 0 or limit < 1:
+            return []
+        k1, b = self.K1, self.B
+        #вклад слова: idf * tf * (k1 + 1) / (tf + k1 * (1 - b) + k1 * b * длина / средняя длина)
+        base = k1 * (1 - b)
+        per_length = k1 * b * self._books / self._total_length
+        weights : list[tuple[str, float]] = []
+        for token in dict.fromkeys(tokenize(query)):
+            frequency = self._frequencies.get(token)
+            if frequency is not None:
+                weights.append((token, math.log(1 + (self._books - frequency + 0.5) / (frequency + 0.5)) * (k1 + 1)))
+        if len(weights) == 0:
+            return []
+        if self._np is not None:
+            return self._search_vectorized(weights, base, per_length, limit)
+
+        lengths = self._lengths
+        scores : dict[int, float] = {}
+        get = scores.get
+        for token, weight in weights:
+            for id, count in zip(self._ids[token], self._counts[token]):
+                length = lengths[id]
+                if length != 0:
+                    scores[id] = get(id, 0.0) + weight * count / (count + base + per_length * length)
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _search_vectorized(self: Self, weights: list[tuple[str, float]], base: float, per_length: float, limit: int) -> list[tuple[int, float]]:
+        '''То же, что search, с подсчётом оценок всех книг векторными операциями NumPy'''
+        np : numpy = self._np # type: ignore
+        #массивы копируются: представление без копирования запретило бы дописывать в них, пока оно существует
+        lengths = np.array(self._lengths, dtype=np.int64)
+        all_ids = []
+        all_contributions = []
+        for token, weight in weights:
+            ids = np.array(self._ids[token], dtype=np.int64)
+            counts = np.frombuffer(self._counts[token], dtype=np.uint8).copy()
+            book_lengths = lengths[ids]
+            contributions = weight * counts / (counts + base + per_length * book_lengths)
+            contributions[book_lengths == 0] = 0
+            all_ids.append(ids)
+            all_contributions.append(contributions)
+        #оценки всех слов суммируются одним проходом
+        ids = np.concatenate(all_ids)
+        scores = np.bincount(ids, weights=np.concatenate(all_contributions), minlength=len(lengths))
+        #найденные книги - только книги из массивов слов запроса, поэтому остальные элементы scores не просматриваются;
+        #книга, совпавшая с несколькими словами, встречается в ids несколько раз и до отбора должна остаться одна
+        found = np.unique(ids)
+        found_scores = scores[found]
+        if len(found_scores) > limit:
+            #книги с оценкой, равной оценке последней из limit лучших, остаются, чтобы порядок при равенстве не зависел от выбора
+            threshold = -np.partition(-found_scores, limit - 1)[limit - 1]
+            found = found[found_scores >= threshold]
+        found = found[scores[found] > 0]
+        order = np.lexsort((found, -scores[found]))[:limit]
+        return list(zip(found[order].tolist(), scores[found[order]].tolist()))
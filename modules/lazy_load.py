@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+from typing import Self, Callable, Iterator, BinaryIO
+from array import array
+from collections import OrderedDict
+import heapq
+import json
+import os
+import struct
+import sys
+import threading
+import weakref
+
+from modules.books import Book, BookRecordError
+
+_SIDECAR_MAGIC = b'BOOKOFF' + (b'L' if sys.byteorder == 'little' else b'B')
+'''Начало файла индекса смещений (порядок байт массивов зависит от платформы)'''
+_SIDECAR_HEADER = struct.Struct('<qqq')
+'''Размер и время изменения (в наносекундах) файла БД, для которого построен индекс, и число записей'''
+
+def sidecar_path(path: str) -> str:
+    '''Путь до файла индекса смещений для файла БД path'''
+    return path + '.offsets'
+
+class OffsetIndex:
+    '''
+    Смещения записей компактного файла БД без сжатия (см. BookStorage.save_to_disk) по ID книг.
+    Хранит три массива (ID по возрастанию, смещения и длины строк записей), т.е. 24 байта на книгу.
+    '''
+    def __init__(self, ids: array[int], offsets: array[int], lengths: array[int]) -> None:
+        self.ids = ids
+        '''ID книг по возрастанию'''
+        self.offsets = offsets
+        '''Смещение строки записи в файле'''
+        self.lengths = lengths
+        '''Длина строки записи в байтах (вместе с запятой и переводом строки)'''
+
+    def __len__(self: Self) -> int:
+        return len(self.ids)
+
+    def position(self: Self, id: int) -> int:
+        '''Номер записи с указанным ID в массивах или -1, если такой записи нет'''
+        import bisect
+        i = bisect.bisect_left(self.ids, id)
+        return i if i < len(self.ids) and self.ids[i] == id else -1
+
+    @staticmethod
+    def build(raw: BinaryIO, body_start: int, progress: Callable[[int, int], None] | None = None) -> OffsetIndex:
+        '''
+        Строит индекс одним проходом по файлу. Записи только разбиваются на строки и ID, целиком они разбираются при обращении.
+
+        Аргументы:
+        raw : BinaryIO -- файл БД.
+        body_start : int -- позиция первой записи (сразу после строки заголовка).
+        progress : Callable[[int, int], None] | None -- функция, периодически вызываемая с прочитанным числом байт и размером файла.
+
+        Исключения:
+        BookRecordError -- если строка записи не начинается с ID книги или ID повторяется.
+        ValueError -- если файл закончился до конца списка книг.
+        '''
+        size = os.fstat(raw.fileno()).st_size
+        ids, offsets, lengths = array('q'), array('q'), array('q')
+        raw.seek(body_start)
+        position = body_start
+        for i, line in enumerate(raw):
+            if line.rstrip(b'\r\n') == b']}':
+                break
+            try:
+                ids.append(int(line[1:line.index(b',')]))
+            except ValueError as e:
+                raise BookRecordError(i, i + 2, f'{type(e).__name__}: {e}') from e
+            offsets.append(position)
+            lengths.append(len(line))
+            position += len(line)
+            if progress is not None and i % 10000 == 0:
+                progress(position, size)
+        else:
+            raise ValueError
+
+        #файлы, записанные save_to_disk, уже упорядочены по ID
+        if any(ids[i] >= ids[i + 1] for i in range(len(ids) - 1)):
+            order = sorted(range(len(ids)), key=ids.__getitem__)
+            ids = array('q', (ids[i] for i in order))
+            offsets = array('q', (offsets[i] for i in order))
+            lengths = array('q', (lengths[i] for i in order))
+            for i in range(len(ids) - 1):
+                if ids[i] == ids[i + 1]:
+                    raise BookRecordError(order[i + 1], order[i + 1] + 2, f'ValueError: повторяющийся ID {ids[i]}')
+        return OffsetIndex(ids, offsets, lengths)
+
+    def save(self: Self, path: str, size: int, mtime_ns: int) -> None:
+        '''
+        Записать индекс в файл path атомарно.
+
+        Аргументы:
+        path : str -- путь до файла индекса.
+        size : int -- размер файла БД.
+        mtime_ns : int -- время изменения файла БД.
+        '''
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_SIDECAR_MAGIC)
+            f.write(_SIDECAR_HEADER.pack(size, mtime_ns, len(self.ids)))
+            self.ids.tofile(f)
+            self.offsets.tofile(f)
+            self.lengths.tofile(f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str, size: int, mtime_ns: int) -> OffsetIndex | None:
+        '''
+        Читает индекс из файла path. Возвращает None, если файла нет, он повреждён или построен для другой версии файла БД.
+
+        Аргументы:
+        path : str -- путь до файла индекса.
+        size : int -- размер файла БД.
+        mtime_ns : int -- время изменения файла БД.
+        '''
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(_SIDECAR_MAGIC)) != _SIDECAR_MAGIC:
+                    return None
+                stored_size, stored_mtime, count = _SIDECAR_HEADER.unpack(f.read(_SIDECAR_HEADER.size))
+                if stored_size != size or stored_mtime != mtime_ns:
+                    return None
+                arrays = []
+                for _ in range(3):
+                    values = array('q')
+                    values.fromfile(f, count)
+                    arrays.append(values)
+        except (OSError, EOFError, struct.error):
+            return None
+        return OffsetIndex(*arrays)
+
+    @staticmethod
+    def open(raw: BinaryIO, body_start: int, sidecar: str, progress: Callable[[int, int], None] | None = None) -> OffsetIndex:
+        '''
+        Читает индекс из файла sidecar, если он построен для текущей версии файла БД, иначе строит индекс и сохраняет его в sidecar.
+
+        Аргументы:
+        raw : BinaryIO -- файл БД.
+        body_start : int -- позиция первой записи (сразу после строки заголовка).
+        sidecar : str -- путь до файла индекса.
+        progress : Callable[[int, int], None] | None -- функция, периодически вызываемая с прочитанным числом байт и размером файла.
+        '''
+        stat = os.fstat(raw.fileno())
+        index = OffsetIndex.load(sidecar, stat.st_size, stat.st_mtime_ns)
+        if index is None:
+            index = OffsetIndex.build(raw, body_start, progress)
+            try:
+                index.save(sidecar, stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                #без записанного индекса файл будет просто просканирован заново при следующем запуске
+                pass
+        return index
+
+class LazyBookSource:
+    '''
+    Книги файла БД, которые создаются из записей только при обращении к ним (см. BookStorage.load_from_disk с lazy=True).
+    Последние cache_size созданных книг хранятся в LRU-кэше. Пока на книгу есть ссылки (например, из открытого меню),
+    повторное обращение возвращает тот же экземпляр, даже если он уже вытеснен из кэша.
+    Книги, перенесённые в хранилище или удалённые из него (см. detach), источник больше не возвращает.
+    '''
+    def __init__(self, raw: BinaryIO, index: OffsetIndex, cache_size: int) -> None:
+        '''
+        raw : BinaryIO -- открытый файл БД. Источник читает его до конца работы, поэтому замена файла при сохранении не мешает чтению.
+        index : OffsetIndex -- индекс смещений записей файла.
+        cache_size : int -- максимальное число книг в кэше.
+        '''
+        self._raw = raw
+        #файл нужен и снимкам хранилища, поэтому закрывается вместе с последней ссылкой на источник
+        weakref.finalize(self, raw.close)
+        self._read_lock = threading.Lock()
+        '''Защищает позицию в файле от чтения из нескольких потоков'''
+        self.index = index
+        self._cache : OrderedDict[int, Book] = OrderedDict()
+        self._cache_size = cache_size
+        self._materialized : weakref.WeakValueDictionary[int, Book] = weakref.WeakValueDictionary()
+        '''Созданные книги, на которые ещё есть ссылки'''
+        self._detached : set[int] = set()
+        '''ID книг, которых уже нет в источнике. Множество общее со снимками (см. snapshot), поэтому оно не изменяется, а заменяется копией.'''
+        self._detached_shared = False
+        '''Входит ли множество _detached в какой-либо снимок'''
+        self.decoded_count = 0
+        '''Число разобранных записей'''
+
+    def __len__(self: Self) -> int:
+        '''Число книг источника'''
+        return len(self.index) - len(self._detached)
+
+    def __contains__(self: Self, id: int) -> bool:
+        return id not in self._detached and self.index.position(id) >= 0
+
+    def read_line(self: Self, position: int) -> bytes:
+        '''Строка записи с указанным номером без запятой и перевода строки'''
+        with self._read_lock:
+            self._raw.seek(self.index.offsets[position])
+            line = self._raw.read(self.index.lengths[position])
+        return line.rstrip(b'\r\n').rstrip(b',')
+
+    def decode(self: Self, position: int) -> Book:
+        '''
+        Создаёт новый экземпляр книги из записи с указанным номером, не используя кэш.
+
+        Исключения:
+        BookRecordError -- если запись некорректна.
+        '''
+        try:
+            book = Book.deserialize_row(json.loads(self.read_line(position)))
+        except (TypeError, ValueError) as e:
+            raise BookRecordError(position, None, f'{type(e).__name__}: {e}') from e
+        self.decoded_count += 1
+        return book
+
+    def peek(self: Self, id: int) -> Book | None:
+        '''Уже созданный экземпляр книги с указанным ID или None'''
+        if id in self._detached:
+            return None
+        return self._materialized.get(id)
+
+    def get(self: Self, id: int) -> Book:
+        '''
+        Возвращает книгу с указанным ID, при необходимости разобрав её запись.
+
+        Исключения:
+        KeyError -- если книги с таким ID нет в источнике.
+        BookRecordError -- если запись книги некорректна.
+        '''
+        book = self._cache.get(id)
+        if book is not None:
+            self._cache.move_to_end(id)
+            return book
+        book = self.peek(id)
+        if book is None:
+            position = self.index.position(id)
+            if position < 0 or id in self._detached:
+                raise KeyError(id)
+            book = self.decode(position)
+            self._materialized[id] = book
+        self._cache[id] = book
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return book
+
+    def detach(self: Self, id: int) -> None:
+        '''Убрать книгу из источника (после переноса в хранилище или удаления)'''
+        #множество копируется только при первом изменении после снятия снимка
+        if self._detached_shared:
+            self._detached = set(self._detached)
+            self._detached_shared = False
+        self._detached.add(id)
+        self._cache.pop(id, None)
+        self._materialized.pop(id, None)
+
+    def ids(self: Self) -> Iterator[int]:
+        '''Обходит ID книг источника по возрастанию'''
+        detached = self._detached
+        return (id for id in self.index.ids if id not in detached)
+
+    def books(self: Self) -> Iterator[Book]:
+        '''Обходит книги источника по возрастанию ID, используя уже созданные экземпляры'''
+        detached = self._detached
+        for position, id in enumerate(self.index.ids):
+            if id in detached:
+                continue
+            book = self._materialized.get(id)
+            yield book if book is not None else self.decode(position)
+
+    def snapshot(self: Self) -> LazySourceView:
+        '''Возвращает неизменяемый снимок набора книг источника за O(1)'''
+        self._detached_shared = True
+        return LazySourceView(self, self._detached)
+
+class LazySourceView:
+    '''
+    Набор книг LazyBookSource на момент снятия снимка (см. StorageSnapshot).
+    Книги создаются заново из записей файла, поэтому не зависят от последующих изменений хранилища.
+    '''
+    def __init__(self, source: LazyBookSource, detached: set[int]) -> None:
+        '''
+        source : LazyBookSource -- источник книг.
+        detached : set[int] -- ID книг, которых не было в источнике на момент снятия снимка. Источник больше не изменяет это множество.
+        '''
+        self._source = source
+        self._detached = detached
+
+    def __len__(self: Self) -> int:
+        return len(self._source.index) - len(self._detached)
+
+    def get(self: Self, id: int) -> Book | None:
+        '''Книга с указанным ID или None, если её не было в источнике на момент снятия снимка'''
+        position = self._source.index.position(id)
+        if position < 0 or id in self._detached:
+            return None
+        return self._source.decode(position)
+
+    def positions(self: Self) -> Iterator[tuple[int, int]]:
+        '''Обходит ID книг по возрастанию вместе с номерами их записей'''
+        detached = self._detached
+        return ((id, position) for position, id in enumerate(self._source.index.ids) if id not in detached)
+
+    def books(self: Self) -> Iterator[Book]:
+        '''Обходит книги по возрастанию ID'''
+        decode = self._source.decode
+        return (decode(position) for _, position in self.positions())
+
+    def encoded_rows(self: Self) -> Iterator[tuple[int, str]]:
+        '''Обходит ID книг по возрастанию вместе с записями в компактном виде, как они записаны в файле (без разбора)'''
+        read_line = self._source.read_line
+        return ((id, read_line(position).decode('utf-8')) for id, position in self.positions())
+
+class LazyBookList:
+    '''
+    Список книг по ID, которые запрашиваются из хранилища только при обращении к элементу (например, при отображении страницы списка).
+    Поддерживает замену элементов на None (удалённые книги) и замену всего списка, как это делает LibraryManagerBooksListMenu.
+    '''
+    def __init__(self, ids: array[int], lookup: Callable[[int], Book | None]) -> None:
+        '''
+        ids : array[int] -- ID книг списка по порядку.
+        lookup : Callable[[int], Book | None] -- функция, возвращающая книгу по ID (или None, если книги уже нет).
+        '''
+        self._ids = ids
+        self._lookup = lookup
+        self._removed : set[int] = set()
+        '''Позиции, заменённые на None'''
+
+    def __len__(self: Self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self: Self, position: int) -> Book | None:
+        if position in self._removed:
+            return None
+        return self._lookup(self._ids[position])
+
+    def __setitem__(self: Self, position: int | slice, value: Book | list[Book] | None) -> None:
+        if isinstance(position, slice):
+            if position != slice(None) or not isinstance(value, list):
+                raise TypeError('поддерживается только замена всего списка')
+            self._ids = array('q', (book.id for book in value))
+            self._removed.clear()
+            return
+        if value is not None:
+            raise TypeError('элементы списка можно только заменять на None')
+        self._removed.add(position)
+
+    def __iter__(self: Self) -> Iterator[Book | None]:
+        for position in range(len(self._ids)):
+            yield self[position]
+
+    def ids(self: Self) -> list[int | None]:
+        '''ID книг по позициям (None на месте удалённых) без обращения к хранилищу'''
+        removed = self._removed
+        return [None if position in removed else id for position, id in enumerate(self._ids)]
+
+    def compact(self: Self) -> None:
+        '''Убрать позиции, заменённые на None, без обращения к хранилищу'''
+        removed = self._removed
+        self._ids = array('q', (id for position, id in enumerate(self._ids) if position not in removed))
+        removed.clear()
+
+def merge_ids(*sources: Iterator[int]) -> array[int]:
+    '''Объединяет возрастающие последовательности ID в один массив по возрастанию'''
+    return array('q', heapq.merge(*sources))
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import Self
+import threading
+import os
+
+from modules.books import BookStorage
+from modules.events import Event
+
+class BackgroundStorageLoader:
+    '''
+    Загружает BookStorage с диска в фоновом потоке.
+    Пока идёт загрузка, можно узнать её прогресс, а операции, которым нужны данные, ждут готовности через result.
+    '''
+    def __init__(self, path: str, lazy: bool = False, cache_size: int = 10000) -> None:
+        '''
+        path : str -- путь до файла БД.
+        lazy : bool -- загружать ли книги лениво (см. BookStorage.load_from_disk).
+        cache_size : int -- сколько последних книг хранить в памяти при ленивой загрузке.
+        '''
+        self._path = path
+        self._lazy = lazy
+        self._cache_size = cache_size
+        self._ready = threading.Event()
+        self._storage : BookStorage | None = None
+        self._error : str | None = None
+        self._missing = False
+        self._loaded = 0
+        self._total = 0
+        self._thread = threading.Thread(target=self.__load, name='storage-loader', daemon=True)
+        self.loaded_event = Event[BookStorage]()
+        '''
+        Вызывается с загруженным (или новым пустым) хранилищем до того, как оно станет доступно через result:
+        в потоке загрузки или, если файла БД нет, в потоке, вызвавшем start.
+        '''
+
+    def start(self: Self) -> Self:
+        '''Начать загрузку. Если файла БД нет, то загрузка сразу завершается пустым хранилищем.'''
+        if not os.path.exists(self._path):
+            self.__load()
+        else:
+            self._thread.start()
+        return self
+
+    def __load(self: Self) -> None:
+        try:
+            try:
+                self._storage = BookStorage.load_from_disk(self._path, self.__on_progress, lazy=self._lazy, cache_size=self._cache_size)
+            except FileNotFoundError:
+                #при первом запуске файла БД ещё нет, это не ошибка
+                self._missing = True
+                self._storage = BookStorage(self._path)
+            except Exception:
+                import traceback
+                self._error = traceback.format_exc()
+                self._storage = BookStorage(self._path)
+            self.loaded_event(self._storage)
+        finally:
+            self._ready.set()
+
+    def __on_progress(self: Self, loaded: int, total: int) -> None:
+        self._loaded = loaded
+        self._total = total
+
+    @property
+    def done(self: Self) -> bool:
+        '''Завершена ли загрузка'''
+        return self._ready.is_set()
+
+    @property
+    def progress(self: Self) -> tuple[int, int]:
+        '''Число загруженных книг и общее число книг в файле (0, если файл ещё не прочитан)'''
+        return self._loaded, self._total
+
+    @property
+    def missing(self: Self) -> bool:
+        '''Не было ли файла БД (в этом случае result возвращает новое пустое хранилище)'''
+        return self._missing
+
+    def take_error(self: Self) -> str | None:
+        '''
+        Возвращает описание ошибки загрузки, если файл не удалось загрузить (в этом случае result возвращает новое пустое хранилище).
+        Описание возвращается только при первом вызове, чтобы ошибка была показана пользователю один раз.
+        '''
+        error = self._error
+        self._error = None
+        return error
+
+    def wait(self: Self, timeout: float | None = None) -> bool:
+        '''
+        Ждать завершения загрузки не дольше timeout секунд (без ограничения, если None).
+        Возвращает True, если загрузка завершена.
+        '''
+        return self._ready.wait(timeout)
+
+    def result(self: Self) -> BookStorage:
+        '''Дождаться завершения загрузки и вернуть хранилище'''
+        self._ready.wait()
+        assert self._storage is not None
+        return self._storage
@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing import Self, Callable
 import abc
 
+from modules.metrics import instrumented
+
 class MenuEntryBase(abc.ABC):
     """Базовый абстрактный класс пункта меню."""
 
@@ -40,6 +42,7 @@ class MenuHostBase(abc.ABC):
     def __init__(self) -> None:
         self.menuStack : list[MenuBase] = []
     
+    @instrumented('menu.push')
     def push(self: Self, menu: MenuBase) -> None:
         """Добавить меню на вершину стека открытых меню. Меню на вершине стека отображается контекстом.
         
@@ -47,6 +50,7 @@ class MenuHostBase(abc.ABC):
         """
         self.menuStack.append(menu)
 
+    @instrumented('menu.pop')
     def pop(self: Self) -> None:
         """Убрать меню с вершины стека открытых меню. Меню на вершине стека отображается контекстом."""
         self.menuStack.pop()
@@ -54,6 +58,14 @@ class MenuHostBase(abc.ABC):
     def current(self: Self) -> MenuBase:
         """Получить текущее меню на вершине стека открытых меню."""
         return self.menuStack[-1]
+
+    @instrumented('menu.select')
+    def select(self: Self, entry: MenuEntryBase) -> None:
+        """Выполнить выбранный пользователем пункт меню в этом контексте.
+        
+        entry : MenuEntryBase -- выбранный пункт меню.
+        """
+        entry.on_selected(self)
     
     @abc.abstractmethod
     def run(self: Self, enterAt: MenuBase | None = None) -> None:
@@ -75,7 +87,7 @@ class MenuHostBase(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def input[T](self: Self, prompt: str, convert: Callable[[str], T], validate: Callable[[T], bool], errorMessage: str) -> T | None:
+    def input[T](self: Self, prompt: str, convert: Callable[[str], T], validate: Callable[[T], bool], errorMessage: str, suggest: Callable[[str], list[str]] | None = None) -> T | None:
         '''
         Получить ввод от пользователя в текущем контексте.
 
@@ -84,5 +96,6 @@ class MenuHostBase(abc.ABC):
         convert : Callable[[str], T] -- функция-конвертер для преобразования входной строки к желаемому типу. Может поднимать исключение ValueError.
         validate : Callable[[T], bool] -- функция-валидатор для валидации преобразованного значения. Должна возвращать True, если значение валидно, False иначе.
         errorMessage : str -- сообщение, которое будет выведено, если будет поднято исключение ValueError или validate вернёт False.
+        suggest : Callable[[str], list[str]] | None -- функция, возвращающая варианты дополнения для начала слова. Если указана, контекст может предлагать пользователю подсказки.
         '''
         pass
\ No newline at end of file
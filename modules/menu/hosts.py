@@ -1,10 +1,30 @@
 from __future__ import annotations
 
-from typing import Self, Callable
+from typing import Self, Callable, TYPE_CHECKING
+import shutil
+import sys
+
 from .core import MenuBase, MenuEntryBase, MenuHostBase
+from modules import metrics
+
+if TYPE_CHECKING:
+    from .replay import SessionRecorder
 
 class SimpleConsoleMenuHost(MenuHostBase):
-    """Реализация MenuHost, выводящая пункты меню построчно в консоль и предлагающая пользователю ввести номер пункта."""
+    """Реализация MenuHost, выводящая пункты меню построчно в консоль и предлагающая пользователю ввести номер пункта.
+    Меню выводится одним буферизованным вызовом записи. Если пунктов больше, чем помещается в терминал, выводится только часть пунктов, которую можно прокручивать."""
+    def __init__(self, max_lines: int | None = None, recorder: SessionRecorder | None = None) -> None:
+        """
+        max_lines : int | None -- максимальное число строк в выводе меню. Если None, то используется высота терминала,
+                                  а если вывод перенаправлен не в терминал, то меню выводится целиком.
+        recorder : SessionRecorder | None -- если указан, то выбранные пункты и принятый ввод записываются в файл сессии.
+        """
+        super().__init__()
+        self._max_lines = max_lines
+        self._recorder = recorder
+        self._last_frame : str | None = None
+        '''Последнее выведенное меню. None, если после него в консоль выводилось что-то ещё.'''
+
     def run(self: Self, enterAt: MenuBase | None = None) -> None:
         if enterAt is not None:
             self.menuStack.clear()
@@ -13,35 +33,103 @@ class SimpleConsoleMenuHost(MenuHostBase):
         while len(self.menuStack) > 0:
             currentMenu : MenuBase = self.current()
             currentMenuEntries : list[MenuEntryBase] = currentMenu.entries
+            offset = 0
 
             while True:
-                print()
-                print(currentMenu.text)
-                for i in range(0, len(currentMenuEntries)):
-                    print(i+1, ". ", currentMenuEntries[i].text)
+                text = currentMenu.text
+                offset = max(0, min(offset, len(currentMenuEntries) - 1))
+                visible = self.__visible_entries_count(text, len(currentMenuEntries))
+                #повторно выводим меню, только если оно изменилось или после него выводилось что-то ещё
+                frame = self.__compose_frame(text, currentMenuEntries, offset, visible)
+                if frame != self._last_frame:
+                    self.__write(frame)
+                    self._last_frame = frame
+
+                user_input = input("Введите номер пункта: ")
+                #прокрутка пунктов, которые не поместились в терминал
+                if visible < len(currentMenuEntries) and user_input.strip() in ('+', '-'):
+                    offset += visible if user_input.strip() == '+' else -visible
+                    continue
                 try:
-                    user_input = input("Введите номер пункта: ")
                     option = int(user_input)
                     if option < 1 or option > len(currentMenuEntries):
                         raise ValueError
                 except ValueError:
-                    print(user_input, " - некорректный номер пункта.") # type: ignore
+                    self.__write(f'{user_input}  - некорректный номер пункта.\n')
                     continue
-                currentMenuEntries[option - 1].on_selected(self)
+                self._last_frame = None
+                entry = currentMenuEntries[option - 1]
+                if self._recorder is not None:
+                    self._recorder.selected(option, entry)
+                self.select(entry)
                 break
 
+    def __visible_entries_count(self: Self, text: str, entries_count: int) -> int:
+        """Число пунктов, которые помещаются в терминал вместе с текстом меню, подсказкой о прокрутке и приглашением ввода"""
+        max_lines = self._max_lines
+        if max_lines is None:
+            #у перенаправленного вывода нет высоты, get_terminal_size вернул бы 24 строки по умолчанию
+            if not sys.stdout.isatty():
+                return entries_count
+            max_lines = shutil.get_terminal_size().lines
+        available = max_lines - text.count('\n') - 4
+        if entries_count <= available:
+            return entries_count
+        return max(1, available - 1)
+
+    @staticmethod
+    def __compose_frame(text: str, entries: list[MenuEntryBase], offset: int, visible: int) -> str:
+        """Сформировать вывод меню с пунктами [offset, offset + visible) одной строкой"""
+        lines = ['', text]
+        end = min(offset + visible, len(entries))
+        for i in range(offset, end):
+            lines.append(f'{i + 1} .  {entries[i].text}')
+        if visible < len(entries):
+            lines.append(f'Показаны пункты {offset + 1}-{end} из {len(entries)}. Введите "+" или "-" для прокрутки.')
+        return '\n'.join(lines) + '\n'
+
+    def __write(self: Self, text: str) -> None:
+        """Вывести текст одним вызовом записи"""
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
     def message(self: Self, message: str):
-        print(message)
+        self._last_frame = None
+        self.__write(message + '\n')
 
-    def input[T](self: Self, prompt: str, convert: Callable[[str], T], validate: Callable[[T], bool], errorMessage: str) -> T | None:
+    def input[T](self: Self, prompt: str, convert: Callable[[str], T], validate: Callable[[T], bool], errorMessage: str, suggest: Callable[[str], list[str]] | None = None) -> T | None:
+        self._last_frame = None
         while True:
             try:
-                user_input = input(prompt)
+                #ожидание ввода не входит в замеры времени выполнения пункта меню
+                with metrics.waiting():
+                    user_input = input(prompt)
+                #ввод, оканчивающийся на "?", - запрос подсказок для последнего слова
+                if suggest is not None and user_input.endswith('?'):
+                    self.__print_suggestions(user_input[:-1], suggest)
+                    continue
                 result : T = convert(user_input)
                 if not validate(result):
                     raise ValueError
+                if self._recorder is not None:
+                    self._recorder.entered(user_input)
                 return result
             except ValueError:
-                print(errorMessage)
+                self.__write(errorMessage + '\n')
             except KeyboardInterrupt:
-                return None
\ No newline at end of file
+                if self._recorder is not None:
+                    self._recorder.entered(None)
+                return None
+
+    def __print_suggestions(self: Self, text: str, suggest: Callable[[str], list[str]]) -> None:
+        '''Вывести варианты дополнения последнего слова в text'''
+        words = text.split()
+        if len(words) == 0 or text[-1].isspace():
+            head, last = text, ''
+        else:
+            head, last = text[:len(text) - len(words[-1])], words[-1]
+        suggestions = suggest(last)
+        if len(suggestions) == 0:
+            self.__write('Нет подсказок.\n')
+            return
+        self.__write('Подсказки:\n' + ''.join(f'    {head}{suggestion}\n' for suggestion in suggestions))
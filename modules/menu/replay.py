@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+from typing import Self, Callable, TextIO
+import abc
+import json
+import random
+import time
+
+from .core import MenuBase, MenuEntryBase, MenuHostBase
+from .static import StaticMenuEntry, MenuEntryBack
+from modules.metrics import MetricsRegistry
+
+class SessionRecorder:
+    """Записывает действия пользователя (выбранные пункты меню и ввод) в файл сессии для последующего воспроизведения (см. ReplayMenuHost).
+    Файл сессии содержит по одному действию в формате JSON на строку: {"select": номер пункта} или {"input": строка или null при отмене}."""
+    def __init__(self, path: str) -> None:
+        """
+        path : str -- путь до файла сессии. Существующий файл перезаписывается.
+        """
+        self._file : TextIO = open(path, 'w', encoding='utf-8')
+
+    def __write(self: Self, action: dict[str, object]) -> None:
+        #каждое действие сразу попадает в файл, чтобы сессия сохранилась и при аварийном завершении
+        self._file.write(json.dumps(action, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def selected(self: Self, option: int, entry: MenuEntryBase) -> None:
+        """Записать выбор пункта меню с номером option (с единицы)"""
+        self.__write({'select': option, 'text': entry.text})
+
+    def entered(self: Self, text: str | None) -> None:
+        """Записать принятый ввод пользователя (None, если ввод отменён)"""
+        self.__write({'input': text})
+
+    def close(self: Self) -> None:
+        """Закрыть файл сессии"""
+        self._file.close()
+
+class SessionSourceBase(abc.ABC):
+    """Источник действий для ReplayMenuHost."""
+
+    @abc.abstractmethod
+    def next_selection(self: Self, menu: MenuBase, entries: list[MenuEntryBase]) -> int | None:
+        """Возвращает номер (с единицы) выбираемого пункта меню или None, если сессия закончилась."""
+        pass
+
+    @abc.abstractmethod
+    def next_input(self: Self, prompt: str) -> str | None:
+        """Возвращает вводимую строку или None, если ввод отменяется (или сессия закончилась)."""
+        pass
+
+class SessionMismatchError(ValueError):
+    """Записанная сессия не соответствует меню, в котором она воспроизводится."""
+    pass
+
+class RecordedSession(SessionSourceBase):
+    """Действия из файла сессии (см. SessionRecorder)."""
+    def __init__(self, path: str) -> None:
+        """
+        path : str -- путь до файла сессии.
+        """
+        with open(path, encoding='utf-8') as f:
+            self._actions : list[dict[str, object]] = [json.loads(line) for line in f if line.strip()]
+        self._position = 0
+
+    def __next(self: Self, kind: str) -> dict[str, object] | None:
+        """Следующее действие, которое должно быть действием указанного вида"""
+        if self._position >= len(self._actions):
+            return None
+        action = self._actions[self._position]
+        if kind not in action:
+            raise SessionMismatchError(f'Действие {self._position + 1} сессии: ожидается {kind}, записано {action}')
+        self._position += 1
+        return action
+
+    def next_selection(self: Self, menu: MenuBase, entries: list[MenuEntryBase]) -> int | None:
+        action = self.__next('select')
+        if action is None:
+            return None
+        option = action['select']
+        if not isinstance(option, int) or option < 1 or option > len(entries):
+            raise SessionMismatchError(f'Действие {self._position} сессии: в меню нет пункта {option}')
+        return option
+
+    def next_input(self: Self, prompt: str) -> str | None:
+        action = self.__next('input')
+        if action is None:
+            return None
+        text = action['input']
+        return text if isinstance(text, str) else None
+
+class RandomSession(SessionSourceBase):
+    """Синтетическая сессия из случайных действий с фиксированным зерном.
+    Вводимые значения подбираются по тексту приглашения ввода."""
+    def __init__(self, actions: int, seed: int = 42, words: list[str] | None = None, max_id: int = 1000) -> None:
+        """
+        actions : int -- число выборов пунктов меню в сессии.
+        seed : int -- зерно генератора случайных чисел.
+        words : list[str] | None -- слова для ввода названий и авторов.
+        max_id : int -- максимальный вводимый ID книги.
+        """
+        self._remaining = actions
+        self._rng = random.Random(seed)
+        self._words = words if words is not None else ['война', 'мир', 'толстой', 'пушкин', 'сад']
+        self._max_id = max_id
+
+    def next_selection(self: Self, menu: MenuBase, entries: list[MenuEntryBase]) -> int | None:
+        if self._remaining <= 0:
+            return None
+        self._remaining -= 1
+        return self._rng.randint(1, len(entries))
+
+    def next_input(self: Self, prompt: str) -> str | None:
+        rng = self._rng
+        #небольшая доля отмен ввода, как у реального пользователя
+        if rng.random() < 0.05:
+            return None
+        lowered = prompt.lower()
+        if 'подтверждения' in lowered:
+            #массовое удаление быстро опустошило бы каталог
+            return 'нет'
+        if 'id' in lowered:
+            return str(rng.randint(0, self._max_id))
+        if 'год' in lowered:
+            return str(rng.randint(1800, 2024))
+        if 'страниц' in lowered:
+            return str(rng.randint(5, 50))
+        if 'статус' in lowered:
+            return str(rng.randint(1, 2))
+        return ' '.join(rng.choices(self._words, k=rng.randint(1, 2)))
+
+class ReplayMenuHost(MenuHostBase):
+    """Реализация MenuHost без консоли, которая выполняет действия из источника сессии (записанной или синтетической) без задержек.
+    Для каждого действия замеряется время отображения меню и выполнения выбранного пункта."""
+    def __init__(self, source: SessionSourceBase, restart: bool = False) -> None:
+        """
+        source : SessionSourceBase -- источник действий.
+        restart : bool -- открывать начальное меню заново, если оно закрыто, а сессия ещё не закончилась (для синтетических сессий).
+        """
+        super().__init__()
+        self._source = source
+        self._restart = restart
+        self.latency = MetricsRegistry()
+        """Время выполнения действий по их названиям (меню и пункт)"""
+        self.actions = 0
+        """Число выполненных действий"""
+        self.messages = 0
+        """Число выведенных сообщений"""
+        self.cancelled_inputs = 0
+        """Число отменённых (в т.ч. некорректных) вводов"""
+        self.seconds = 0.0
+        """Суммарное время выполнения действий"""
+
+    @staticmethod
+    def _action_name(menu: MenuBase, entry: MenuEntryBase) -> str:
+        """Название действия для статистики: текст статичных пунктов или тип пункта (например, для пунктов книг)"""
+        label = entry.text if isinstance(entry, (StaticMenuEntry, MenuEntryBack)) else type(entry).__name__
+        return f'{type(menu).__name__}: {label}'
+
+    def run(self: Self, enterAt: MenuBase | None = None) -> None:
+        if enterAt is not None:
+            self.menuStack.clear()
+            self.push(enterAt)
+        root = enterAt if enterAt is not None else self.current()
+
+        while True:
+            if len(self.menuStack) == 0:
+                if not self._restart:
+                    return
+                self.push(root)
+
+            start = time.perf_counter()
+            menu = self.current()
+            #то же, что делает консольный контекст при отображении меню
+            menu.text
+            entries = menu.entries
+            for entry in entries:
+                entry.text
+            elapsed = time.perf_counter() - start
+
+            #время выбора действия источником не входит в замер
+            option = self._source.next_selection(menu, entries)
+            if option is None:
+                return
+            entry = entries[option - 1]
+            start = time.perf_counter()
+            self.select(entry)
+            elapsed += time.perf_counter() - start
+
+            self.latency.record(self._action_name(menu, entry), elapsed)
+            self.actions += 1
+            self.seconds += elapsed
+
+    def message(self: Self, message: str) -> None:
+        self.messages += 1
+
+    def input[T](self: Self, prompt: str, convert: Callable[[str], T], validate: Callable[[T], bool], errorMessage: str, suggest: Callable[[str], list[str]] | None = None) -> T | None:
+        text = self._source.next_input(prompt)
+        if text is not None:
+            try:
+                result = convert(text)
+                if validate(result):
+                    return result
+            except ValueError:
+                pass
+        #некорректный ввод консольный контекст запросил бы заново, здесь он считается отменой
+        self.cancelled_inputs += 1
+        return None
+
+    def report(self: Self) -> dict[str, object]:
+        """Возвращает число действий, пропускную способность (действий в секунду) и перцентили времени каждого действия"""
+        return {
+            'actions': self.actions,
+            'seconds': self.seconds,
+            'actions_per_s': self.actions / self.seconds if self.seconds > 0 else 0.0,
+            'messages': self.messages,
+            'cancelled_inputs': self.cancelled_inputs,
+            'latency': self.latency.to_json()
+        }
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from typing import Self, Callable, Iterator
+import contextlib
+import functools
+import math
+import os
+import threading
+import time
+
+class LatencyHistogram:
+    '''
+    Гистограмма времени выполнения операции с логарифмическими корзинами (4 корзины на каждое удвоение, от 1 мкс).
+    Занимает фиксированную память независимо от числа замеров.
+    '''
+    _MIN_SECONDS = 1e-6
+    _BUCKETS_PER_OCTAVE = 4
+    _BUCKETS = 4 * 28
+    '''Корзины покрывают диапазон от 1 мкс до ~268 с, более долгие замеры попадают в последнюю корзину'''
+
+    def __init__(self) -> None:
+        self.count = 0
+        '''Число замеров'''
+        self.sum = 0.0
+        '''Суммарное время всех замеров в секундах'''
+        self._buckets = [0] * LatencyHistogram._BUCKETS
+
+    @staticmethod
+    def _bucket_of(seconds: float) -> int:
+        '''Номер корзины для указанного времени'''
+        if seconds <= LatencyHistogram._MIN_SECONDS:
+            return 0
+        i = int(math.log2(seconds / LatencyHistogram._MIN_SECONDS) * LatencyHistogram._BUCKETS_PER_OCTAVE) + 1
+        return min(i, LatencyHistogram._BUCKETS - 1)
+
+    @staticmethod
+    def _upper_bound(bucket: int) -> float:
+        '''Верхняя граница корзины в секундах'''
+        return LatencyHistogram._MIN_SECONDS * 2 ** (bucket / LatencyHistogram._BUCKETS_PER_OCTAVE)
+
+    def record(self: Self, seconds: float) -> None:
+        '''Учесть замер длительностью seconds секунд'''
+        self.count += 1
+        self.sum += seconds
+        self._buckets[self._bucket_of(seconds)] += 1
+
+    def percentile(self: Self, q: float) -> float:
+        '''
+        Возвращает оценку сверху для q-го перцентиля (0 < q <= 100) в секундах с точностью до корзины.
+        Возвращает 0, если замеров нет.
+        '''
+        if self.count == 0:
+            return 0.0
+        rank = math.ceil(self.count * q / 100)
+        seen = 0
+        for i, n in enumerate(self._buckets):
+            seen += n
+            if seen >= rank:
+                return self._upper_bound(i)
+        return self._upper_bound(len(self._buckets) - 1)
+
+class MetricsRegistry:
+    '''
+    Набор гистограмм времени выполнения по именам операций.
+    Замеры можно записывать из разных потоков (например, основного и потока автосохранения).
+    '''
+    def __init__(self) -> None:
+        self.histograms : dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self: Self, name: str, seconds: float) -> None:
+        '''Учесть замер операции name длительностью seconds секунд'''
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def to_json(self: Self) -> dict[str, dict[str, float]]:
+        '''Возвращает число вызовов, суммарное время и перцентили p50/p95/p99 каждой операции'''
+        with self._lock:
+            return self.__to_json()
+
+    def __to_json(self: Self) -> dict[str, dict[str, float]]:
+        return {
+            name: {
+                'count': h.count,
+                'sum_s': h.sum,
+                'p50_s': h.percentile(50),
+                'p95_s': h.percentile(95),
+                'p99_s': h.percentile(99)
+            }
+            for name, h in sorted(self.histograms.items())
+        }
+
+    def to_prometheus(self: Self) -> str:
+        '''Возвращает метрики в текстовом формате Prometheus (тип summary)'''
+        with self._lock:
+            return self.__to_prometheus()
+
+    def __to_prometheus(self: Self) -> str:
+        lines = [
+            '# HELP library_operation_duration_seconds Duration of instrumented operations.',
+            '# TYPE library_operation_duration_seconds summary'
+        ]
+        for name, h in sorted(self.histograms.items()):
+            for q in (50, 95, 99):
+                lines.append(f'library_operation_duration_seconds{{op="{name}",quantile="{q / 100}"}} {h.percentile(q)}')
+            lines.append(f'library_operation_duration_seconds_sum{{op="{name}"}} {h.sum}')
+            lines.append(f'library_operation_duration_seconds_count{{op="{name}"}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self: Self, path: str) -> None:
+        '''
+        Атомарно записать метрики в файл. Формат Prometheus, если расширение файла .prom или .txt, иначе JSON.
+
+        Аргументы:
+        path : str -- путь до файла.
+        '''
+        if os.path.splitext(path)[1] in ('.prom', '.txt'):
+            content = self.to_prometheus()
+        else:
+            import json
+            content = json.dumps(self.to_json(), indent=2, ensure_ascii=False)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+_registry : MetricsRegistry | None = None
+'''Текущий набор метрик. None, если сбор метрик выключен.'''
+
+_hot_methods : list[tuple[type, str, Callable[..., object], str]] = []
+'''Методы, обёртка для замеров которых устанавливается только при включённом сборе метрик (см. instrument_method)'''
+
+_waited = threading.local()
+'''Суммарное время ожидания в блоках waiting в текущем потоке (атрибут seconds)'''
+
+def enable() -> MetricsRegistry:
+    '''Включить сбор метрик. Возвращает набор, в который будут записываться замеры.'''
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+        for cls, attr, method, name in _hot_methods:
+            setattr(cls, attr, instrumented(name)(method))
+    return _registry
+
+def disable() -> None:
+    '''Выключить сбор метрик и забыть собранные данные'''
+    global _registry
+    _registry = None
+    for cls, attr, method, _ in _hot_methods:
+        setattr(cls, attr, method)
+
+def registry() -> MetricsRegistry | None:
+    '''Текущий набор метрик или None, если сбор метрик выключен'''
+    return _registry
+
+def instrumented[**P, R](name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    '''
+    Декоратор, замеряющий время выполнения функции под именем name, если сбор метрик включён.
+    Когда сбор выключен, обёртка только вызывает исходную функцию.
+    '''
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            reg = _registry
+            if reg is None:
+                return func(*args, **kwargs)
+            waited = getattr(_waited, 'seconds', 0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                #ожидание внутри операции (например, ввода пользователя) не входит в её время
+                reg.record(name, time.perf_counter() - start - (getattr(_waited, 'seconds', 0.0) - waited))
+        return wrapper
+    return decorator
+
+def instrument_method(cls: type, attr: str, name: str) -> None:
+    '''
+    Замерять время выполнения метода cls.attr под именем name, пока сбор метрик включён.
+    В отличие от instrumented, когда сбор выключен, метод вызывается без обёртки - для методов, вызываемых очень часто.
+
+    Аргументы:
+    cls : type -- класс, которому принадлежит метод.
+    attr : str -- имя метода.
+    name : str -- имя операции.
+    '''
+    method = cls.__dict__[attr]
+    _hot_methods.append((cls, attr, method, name))
+    if _registry is not None:
+        setattr(cls, attr, instrumented(name)(method))
+
+@contextlib.contextmanager
+def waiting() -> Iterator[None]:
+    '''
+    Время выполнения блока (например, ожидания ввода пользователя) не учитывается в замерах операций,
+    внутри которых он выполняется в этом потоке.
+    '''
+    if _registry is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _waited.seconds = getattr(_waited, 'seconds', 0.0) + time.perf_counter() - start
+
+def install_dump_signal(path: str) -> None:
+    '''
+    Записывать метрики в файл path по сигналу SIGUSR1 (если платформа его поддерживает).
+
+    Аргументы:
+    path : str -- путь до файла (см. MetricsRegistry.dump).
+    '''
+    import signal
+    if not hasattr(signal, 'SIGUSR1'):
+        return
+
+    def on_signal(*args: object) -> None:
+        reg = _registry
+        if reg is not None:
+            #запись выполняется в отдельном потоке: сигнал мог прервать основной поток, когда тот держит блокировку набора метрик в record
+            threading.Thread(target=reg.dump, args=(path,), name='metrics-dump').start()
+
+    signal.signal(signal.SIGUSR1, on_signal)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Iterator, TYPE_CHECKING
+import os
+
+from modules.books import Book
+from modules.text import count_tokens
+
+if TYPE_CHECKING:
+    import multiprocessing.context
+
+MIN_RANGE_BYTES = 1 << 20
+'''Минимальный размер одного диапазона файла: на меньших диапазонах передача результатов между процессами дороже разбора'''
+
+class DecodedRange:
+    '''
+    Результат разбора одного диапазона байт файла БД в компактном формате.
+    '''
+    def __init__(self) -> None:
+        self.rows : list[tuple[int, str, str, int, int]] = []
+        '''Проверенные записи диапазона (см. Book.validate_row) до первой ошибки'''
+        self.error : str | None = None
+        '''Описание ошибки в записи, следующей за self.rows, или None, если ошибок нет'''
+        self.closed = False
+        '''Встретился ли в диапазоне конец списка книг'''
+        self.end = 0
+        '''Позиция в файле, до которой разобран диапазон'''
+        self.title_tokens : dict[str, int] = {}
+        '''Число записей диапазона с каждым словом названия (см. count_tokens)'''
+        self.author_tokens : dict[str, int] = {}
+        '''Число записей диапазона с каждым словом автора'''
+
+def split_ranges(start: int, end: int, parts: int) -> list[tuple[int, int]]:
+    '''
+    Разбивает диапазон байт [start, end) на не более чем parts диапазонов размером не меньше MIN_RANGE_BYTES (кроме случая, когда весь диапазон меньше).
+
+    Аргументы:
+    start : int -- начало диапазона.
+    end : int -- конец диапазона (не включая).
+    parts : int -- желаемое число диапазонов.
+    '''
+    parts = max(1, min(parts, (end - start) // MIN_RANGE_BYTES))
+    step = (end - start + parts - 1) // parts
+    return [(s, min(s + step, end)) for s in range(start, end, step)] if end > start else [(start, end)]
+
+def decode_range(path: str, start: int, end: int) -> DecodedRange:
+    '''
+    Разбирает и проверяет записи компактного формата (по одной на строку), строки которых начинаются в диапазоне байт [start, end),
+    и подсчитывает слова названий и авторов для префиксных индексов, чтобы основной процесс не разбивал их на слова сам.
+    Выполняется в дочернем процессе, поэтому не бросает исключения на некорректных данных, а возвращает описание ошибки.
+
+    Аргументы:
+    path : str -- путь до файла БД без сжатия.
+    start : int -- начало диапазона. Должно быть не меньше конца строки заголовка.
+    end : int -- конец диапазона (не включая).
+    '''
+    import json
+    dec = json.JSONDecoder()
+    result = DecodedRange()
+    rows = result.rows
+    validate = Book.validate_row
+
+    with open(path, 'rb') as f:
+        #строка, начавшаяся до start, принадлежит предыдущему диапазону
+        f.seek(start - 1)
+        position = start - 1 + len(f.readline())
+        for line in f:
+            if position >= end:
+                break
+            position += len(line)
+            line = line.rstrip(b'\r\n').rstrip(b',')
+            if line == b']}':
+                result.closed = True
+                break
+            try:
+                rows.append(validate(dec.decode(line.decode('utf-8'))))
+            except (TypeError, ValueError) as e:
+                result.error = f'{type(e).__name__}: {e}'
+                break
+        result.end = position
+    result.title_tokens = count_tokens(row[1] for row in rows)
+    result.author_tokens = count_tokens(row[2] for row in rows)
+    return result
+
+def decode_parallel(path: str, body_start: int, workers: int) -> Iterator[DecodedRange]:
+    '''
+    Разбирает записи файла БД в компактном формате без сжатия в workers процессах.
+    Возвращает результаты диапазонов по порядку их расположения в файле.
+
+    Аргументы:
+    path : str -- путь до файла БД.
+    body_start : int -- позиция первой записи (сразу после строки заголовка).
+    workers : int -- число процессов.
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = split_ranges(body_start, os.path.getsize(path), workers * 4)
+    with ProcessPoolExecutor(workers, mp_context=process_context()) as executor:
+        yield from executor.map(decode_range, [path] * len(ranges), [s for s, _ in ranges], [e for _, e in ranges])
+
+def process_context() -> multiprocessing.context.BaseContext:
+    '''
+    Способ запуска дочерних процессов: forkserver, если платформа его поддерживает, иначе spawn.
+    fork не используется: загрузка выполняется в фоновом потоке, а fork многопоточного процесса может привести к взаимной блокировке в дочернем процессе.
+    Дочерние процессы импортируют главный модуль приложения, поэтому его код должен выполняться только под if __name__ == '__main__'.
+    '''
+    import multiprocessing
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Callable
+import re
+
+#разбор регулярного выражения в дерево операций - внутренний модуль re, поэтому без него анализ просто отключается
+try:
+    from re import _parser, _constants # type: ignore
+except ImportError:
+    _parser = None
+    _constants = None
+
+_MAX_LITERALS = 3
+'''Сколько самых длинных обязательных подстрок проверять перед запуском регулярного выражения'''
+
+def _is_dot_star(item: tuple[object, object]) -> bool:
+    '''Является ли элемент разобранного выражения конструкцией .* (жадной или ленивой)'''
+    op, av = item
+    if op is not _constants.MAX_REPEAT and op is not _constants.MIN_REPEAT:
+        return False
+    low, high, sub = av # type: ignore
+    return low == 0 and high == _constants.MAXREPEAT and list(sub) == [(_constants.ANY, None)]
+
+def _collect_literals(items: list[tuple[object, object]], out: list[str]) -> None:
+    '''Добавить в out подстроки, которые обязательно содержит любая строка, соответствующая последовательности items'''
+    run : list[str] = []
+    for op, av in items:
+        if op is _constants.LITERAL:
+            run.append(chr(av)) # type: ignore
+            continue
+        #подряд идущие символы образуют одну подстроку, любая другая конструкция её прерывает
+        if run:
+            out.append(''.join(run))
+            run = []
+        if op is _constants.SUBPATTERN:
+            _, add_flags, _, sub = av # type: ignore
+            if not add_flags & re.IGNORECASE:
+                _collect_literals(list(sub), out)
+        elif op is _constants.MAX_REPEAT or op is _constants.MIN_REPEAT or op is _constants.POSSESSIVE_REPEAT:
+            low, _, sub = av # type: ignore
+            if low >= 1:
+                _collect_literals(list(sub), out)
+        elif op is _constants.ATOMIC_GROUP:
+            _collect_literals(list(av), out) # type: ignore
+        #остальные конструкции (альтернативы, классы символов, проверки и т.д.) не дают обязательных подстрок
+    if run:
+        out.append(''.join(run))
+
+def required_literals(pattern: re.Pattern[str]) -> list[str] | None:
+    '''
+    Возвращает подстроки, которые содержит любая строка, полностью соответствующая pattern (см. re.Pattern.fullmatch).
+    Возвращает None, если выражение нельзя проанализировать (например, поиск без учёта регистра).
+
+    Аргументы:
+    pattern : re.Pattern[str] -- скомпилированное регулярное выражение.
+    '''
+    if _parser is None or not isinstance(pattern.pattern, str):
+        return None
+    parsed = _parser.parse(pattern.pattern, pattern.flags)
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    literals : list[str] = []
+    _collect_literals(list(parsed), literals)
+    return literals
+
+def fullmatch_predicate(pattern: re.Pattern[str]) -> Callable[[str], bool]:
+    '''
+    Возвращает функцию, проверяющую, соответствует ли строка pattern целиком, - быстрее, чем pattern.fullmatch для каждой строки.
+    Выражение вида .*подстрока.* заменяется на проверку вхождения подстроки, а для остальных выражений
+    строки без обязательных подстрок выражения отбрасываются до запуска регулярного выражения.
+
+    Аргументы:
+    pattern : re.Pattern[str] -- скомпилированное регулярное выражение.
+    '''
+    fullmatch = pattern.fullmatch
+    literals = required_literals(pattern)
+    if not literals:
+        return lambda text: fullmatch(text) is not None
+
+    items = list(_parser.parse(pattern.pattern, pattern.flags))
+    if len(items) >= 3 and _is_dot_star(items[0]) and _is_dot_star(items[-1]) and all(op is _constants.LITERAL for op, _ in items[1:-1]):
+        literal = literals[0]
+        #без DOTALL точка не соответствует переводу строки
+        if pattern.flags & re.DOTALL:
+            return lambda text: literal in text
+        #переводы строки внутри самой подстроки допустимы, поэтому такое выражение проверяется ниже через fullmatch
+        if '\n' not in literal:
+            return lambda text: literal in text and '\n' not in text
+
+    #длинные подстроки реже встречаются, поэтому отсекают больше строк
+    checks = sorted(set(literals), key=len, reverse=True)[:_MAX_LITERALS]
+    if len(checks) == 1:
+        first = checks[0]
+        return lambda text: first in text and fullmatch(text) is not None
+    if len(checks) == 2:
+        first, second = checks
+        return lambda text: first in text and second in text and fullmatch(text) is not None
+
+    def predicate(text: str) -> bool:
+        for literal in checks:
+            if literal not in text:
+                return False
+        return fullmatch(text) is not None
+    return predicate
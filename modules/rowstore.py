@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Self, Iterator, Iterable
+
+class ChunkedRowStore[T]:
+    '''
+    Массив записей по целочисленному индексу, разбитый на блоки по CHUNK_SIZE записей, с копированием при записи.
+    Снимок (см. snapshot) снимается за O(1): он ссылается на те же блоки, что и хранилище,
+    а хранилище копирует блок (и список блоков) перед первым изменением после снятия снимка.
+    Поэтому снимок никогда не меняется, и читать его можно из любого потока без блокировок.
+    '''
+    CHUNK_SIZE = 1024
+
+    def __init__(self) -> None:
+        self._chunks : list[list[T | None]] = []
+        '''Блоки записей'''
+        self._owned : list[bool] = []
+        '''Принадлежит ли блок только хранилищу (т.е. не входит ни в один снимок)'''
+        self._shared = False
+        '''Входит ли список блоков в какой-либо снимок'''
+        self._count = 0
+
+    def __len__(self: Self) -> int:
+        '''Число записей'''
+        return self._count
+
+    def get(self: Self, index: int) -> T | None:
+        '''Возвращает запись по индексу или None, если записи нет'''
+        chunk = index // self.CHUNK_SIZE
+        if index < 0 or chunk >= len(self._chunks):
+            return None
+        return self._chunks[chunk][index % self.CHUNK_SIZE]
+
+    def _writable_chunk(self: Self, chunk: int) -> list[T | None]:
+        '''Возвращает блок, который можно изменять, при необходимости скопировав его'''
+        if self._shared:
+            self._chunks = list(self._chunks)
+            self._owned = [False] * len(self._chunks)
+            self._shared = False
+        while chunk >= len(self._chunks):
+            self._chunks.append([None] * self.CHUNK_SIZE)
+            self._owned.append(True)
+        if not self._owned[chunk]:
+            self._chunks[chunk] = list(self._chunks[chunk])
+            self._owned[chunk] = True
+        return self._chunks[chunk]
+
+    def set(self: Self, index: int, value: T) -> None:
+        '''
+        Записать значение по индексу.
+
+        Аргументы:
+        index : int -- неотрицательный индекс записи.
+        value : T -- новое значение.
+        '''
+        if index < 0:
+            raise IndexError(index)
+        chunk = self._writable_chunk(index // self.CHUNK_SIZE)
+        if chunk[index % self.CHUNK_SIZE] is None:
+            self._count += 1
+        chunk[index % self.CHUNK_SIZE] = value
+
+    def set_many(self: Self, items: Iterable[tuple[int, T]]) -> None:
+        '''
+        Записать значения по индексам. Быстрее, чем вызывать set для каждого значения, если индексы идут по возрастанию.
+
+        Аргументы:
+        items : Iterable[tuple[int, T]] -- пары (неотрицательный индекс, новое значение).
+        '''
+        size = self.CHUNK_SIZE
+        current = -1
+        chunk : list[T | None] = []
+        count = self._count
+        for index, value in items:
+            if index < 0:
+                raise IndexError(index)
+            if index // size != current:
+                current = index // size
+                chunk = self._writable_chunk(current)
+            if chunk[index % size] is None:
+                count += 1
+            chunk[index % size] = value
+        self._count = count
+
+    def delete(self: Self, index: int) -> None:
+        '''
+        Удалить запись по индексу.
+
+        Исключения:
+        KeyError -- если записи с таким индексом нет.
+        '''
+        if self.get(index) is None:
+            raise KeyError(index)
+        self._writable_chunk(index // self.CHUNK_SIZE)[index % self.CHUNK_SIZE] = None
+        self._count -= 1
+
+    def snapshot(self: Self) -> RowStoreView[T]:
+        '''Возвращает неизменяемый снимок текущего состояния за O(1)'''
+        self._shared = True
+        return RowStoreView(self._chunks, self._count)
+
+class RowStoreView[T]:
+    '''
+    Неизменяемый снимок ChunkedRowStore.
+    '''
+    def __init__(self, chunks: list[list[T | None]], count: int) -> None:
+        self._chunks = chunks
+        self._count = count
+
+    def __len__(self: Self) -> int:
+        '''Число записей'''
+        return self._count
+
+    def __iter__(self: Self) -> Iterator[T]:
+        '''Обходит записи в порядке возрастания индекса'''
+        for chunk in self._chunks:
+            for value in chunk:
+                if value is not None:
+                    yield value
+
+    def get(self: Self, index: int) -> T | None:
+        '''Возвращает запись по индексу или None, если записи нет'''
+        chunk = index // ChunkedRowStore.CHUNK_SIZE
+        if index < 0 or chunk >= len(self._chunks):
+            return None
+        return self._chunks[chunk][index % ChunkedRowStore.CHUNK_SIZE]
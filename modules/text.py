@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Iterable
+from collections import Counter
+import itertools
+import unicodedata
+import re
+
+def normalize_search_key(text: str, fold_yo: bool = True) -> str:
+    '''
+    Преобразует строку в ключ для поиска без учёта регистра: NFKC-нормализация, casefold, повторная NFKC-нормализация
+    (casefold может вернуть ненормализованную последовательность, например, для "ǰ") и (опционально) замена "ё" на "е".
+
+    Аргументы:
+    text : str -- исходная строка.
+    fold_yo : bool -- заменять ли "ё" на "е".
+    '''
+    key = unicodedata.normalize('NFKC', unicodedata.normalize('NFKC', text).casefold())
+    if fold_yo:
+        key = key.replace('ё', 'е')
+    return key
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def tokenize(text: str) -> list[str]:
+    '''
+    Разбивает строку на нормализованные (см. normalize_search_key) слова.
+
+    Аргументы:
+    text : str -- исходная строка.
+    '''
+    return _TOKEN_RE.findall(normalize_search_key(text))
+
+def split_words(key: str) -> list[str]:
+    '''
+    Разбивает уже нормализованную строку (см. normalize_search_key) на слова так же, как tokenize.
+
+    Аргументы:
+    key : str -- нормализованная строка.
+    '''
+    return _TOKEN_RE.findall(key)
+
+def count_tokens(values: Iterable[str]) -> Counter[str]:
+    '''
+    Возвращает для каждого нормализованного слова (см. tokenize) число строк values, в которых оно встречается.
+    Одинаковые строки (например, имена одного автора) разбиваются на слова один раз.
+
+    Аргументы:
+    values : Iterable[str] -- исходные строки.
+    '''
+    tokens_of : dict[str, list[str]] = {}
+    def tokens(value: str) -> list[str]:
+        result = tokens_of.get(value)
+        if result is None:
+            result = tokens_of[value] = list(set(tokenize(value)))
+        return result
+    return Counter(itertools.chain.from_iterable(map(tokens, values)))
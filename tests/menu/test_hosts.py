@@ -0,0 +1,42 @@
+import unittest
+from unittest import mock
+from modules.menu.hosts import SimpleConsoleMenuHost
+from modules.menu.static import StaticMenu, StaticMenuEntry, MenuEntryBack
+from typing import Self
+import contextlib
+import io
+
+class SimpleConsoleMenuHostTestSuite(unittest.TestCase):
+    def run_host(self: Self, host: SimpleConsoleMenuHost, menu: StaticMenu, inputs: list[str]) -> str:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), mock.patch('builtins.input', side_effect=inputs):
+            host.run(menu)
+        return out.getvalue()
+
+    def test_unchanged_frame_skipped(self: Self):
+        menu = StaticMenu('Меню', [MenuEntryBack()])
+        out = self.run_host(SimpleConsoleMenuHost(), menu, ['5', '1'])
+
+        self.assertEqual(out.count('Меню'), 1)
+        self.assertIn('5  - некорректный номер пункта.', out)
+
+    def test_scroll(self: Self):
+        selected : list[int] = []
+        entries = [StaticMenuEntry(f'Пункт {i}', lambda host, i=i: (selected.append(i), host.pop())) for i in range(20)]
+        out = self.run_host(SimpleConsoleMenuHost(max_lines=10), StaticMenu('Меню', entries), ['+', '20'])
+
+        self.assertIn('1 .  Пункт 0', out)
+        self.assertNotIn('20 .  Пункт 19', out.split('Показаны пункты')[0])
+        self.assertIn('Показаны пункты 6-10 из 20.', out)
+        self.assertEqual(selected, [19])
+
+    def test_redirected_output_not_limited(self: Self):
+        entries = [StaticMenuEntry(f'Пункт {i}', lambda host: host.pop()) for i in range(50)]
+        out = self.run_host(SimpleConsoleMenuHost(), StaticMenu('Меню', entries), ['50'])
+
+        #вывод не в терминал не обрезается по высоте терминала
+        self.assertIn('50 .  Пункт 49', out)
+        self.assertNotIn('Показаны пункты', out)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+from modules.menu.hosts import SimpleConsoleMenuHost
+from modules.menu.replay import SessionRecorder, RecordedSession, RandomSession, ReplayMenuHost, SessionMismatchError
+from modules.menu.static import StaticMenu, StaticMenuEntry, MenuEntryBack
+from modules.menu.input import converter_int, validator_always
+from typing import Self
+import contextlib
+import io
+import os
+
+class ReplayMenuHostTestSuite(unittest.TestCase):
+    def make_menu(self: Self, values: list[int]) -> StaticMenu:
+        def add(host) -> None:
+            value = host.input('Введите число: ', converter_int, validator_always, 'Нужно число!')
+            if value is not None:
+                values.append(value)
+        return StaticMenu('Меню', [StaticMenuEntry('Добавить', add), MenuEntryBack()])
+
+    def test_record_and_replay(self: Self):
+        recorded : list[int] = []
+        recorder = SessionRecorder('session.jsonl')
+        with contextlib.redirect_stdout(io.StringIO()), mock.patch('builtins.input', side_effect=['1', 'x', '5', '1', KeyboardInterrupt, '2']):
+            SimpleConsoleMenuHost(recorder=recorder).run(self.make_menu(recorded))
+        recorder.close()
+
+        replayed : list[int] = []
+        host = ReplayMenuHost(RecordedSession('session.jsonl'))
+        host.run(self.make_menu(replayed))
+
+        self.assertEqual(recorded, [5])
+        self.assertEqual(replayed, [5])
+        self.assertEqual(host.actions, 3)
+        self.assertEqual(host.latency.histograms['StaticMenu: Добавить'].count, 2)
+
+        os.remove('session.jsonl')
+
+    def test_mismatch(self: Self):
+        with open('session.jsonl', 'w') as f:
+            f.write('{"select": 3}\n')
+
+        host = ReplayMenuHost(RecordedSession('session.jsonl'))
+        self.assertRaises(SessionMismatchError, lambda: host.run(self.make_menu([])))
+
+        os.remove('session.jsonl')
+
+    def test_random_session(self: Self):
+        host = ReplayMenuHost(RandomSession(200, seed=1), restart=True)
+        host.run(self.make_menu([]))
+
+        self.assertEqual(host.actions, 200)
+        self.assertGreater(host.report()['actions_per_s'], 0) # type: ignore
@@ -0,0 +1,53 @@
+import unittest
+from modules.books import BookStorage
+from modules.autosave import AutosaveService
+from typing import Self
+import os
+import time
+
+class AutosaveServiceTestSuite(unittest.TestCase):
+    def tearDown(self: Self):
+        if os.path.exists('t'):
+            os.remove('t')
+
+    def test_coalesce(self: Self):
+        storage = BookStorage('t')
+        autosave = AutosaveService(storage, 0.2, 10).start()
+
+        #серия изменений без пауз дольше interval сохраняется один раз
+        for i in range(5):
+            storage.new_book('title', 'author', i)
+            time.sleep(0.02)
+        time.sleep(0.6)
+        autosave.stop()
+
+        self.assertEqual(autosave.saves_count, 1)
+        self.assertFalse(storage.has_unsaved_changes)
+        self.assertEqual(BookStorage.load_from_disk('t').books_count, 5)
+
+    def test_max_delay(self: Self):
+        storage = BookStorage('t')
+        autosave = AutosaveService(storage, 0.2, 0.3).start()
+
+        #изменения идут чаще interval, но сохранение всё равно происходит через max_delay
+        deadline = time.monotonic() + 0.8
+        i = 0
+        while time.monotonic() < deadline:
+            storage.new_book('title', 'author', i)
+            i += 1
+            time.sleep(0.05)
+        autosave.stop()
+
+        self.assertGreaterEqual(autosave.saves_count, 1)
+
+    def test_no_changes(self: Self):
+        storage = BookStorage('t')
+        autosave = AutosaveService(storage, 0.05, 0.1).start()
+        time.sleep(0.2)
+        autosave.stop()
+
+        self.assertEqual(autosave.saves_count, 0)
+        self.assertFalse(os.path.exists('t'))
+
+if __name__ == '__main__':
+    unittest.main()
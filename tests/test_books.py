@@ -1,5 +1,5 @@
 import unittest
-from modules.books import Book, DefaultBookSearchCondition, BookStatus, BookStorage
+from modules.books import Book, DefaultBookSearchCondition, BookStatus, BookStorage, BookRecordError
 from typing import Self
 import os
 import re
@@ -69,6 +69,35 @@ class BookStorageTestSuite(unittest.TestCase):
         b = Book(5, 'title', 'author', 255)
         self.assertRaises(KeyError, lambda: storage.remove_book(b))
 
+    def test_remove_books(self: Self):
+        storage = BookStorage('t')
+        b = [storage.new_book('title', 'author', 255 + i) for i in range(4)]
+        events : list[list[Book]] = []
+        storage.books_deleted_event += events.append
+
+        self.assertEqual(storage.remove_books([b[0].id, b[2].id, b[0].id]), [b[0], b[2]])
+        self.assertEqual(storage.remove_books(DefaultBookSearchCondition().by_year(258)), [b[3]])
+        self.assertRaises(KeyError, lambda: storage.remove_books([b[1].id, b[0].id]))
+
+        self.assertEqual(events, [[b[0], b[2]], [b[3]]])
+        self.assertEqual(storage.all_books(), [b[1]])
+        self.assertEqual(storage.statistics.total, 1)
+
+    def test_set_status_many(self: Self):
+        storage = BookStorage('t')
+        b = [storage.new_book('title', 'author', 255 + i) for i in range(3)]
+        storage.set_status(b[1], BookStatus.loaned)
+        events : list[list[Book]] = []
+        storage.books_status_changed_event += events.append
+
+        self.assertEqual(storage.set_status_many([book.id for book in b], BookStatus.loaned), [b[0], b[2]])
+        self.assertRaises(KeyError, lambda: storage.set_status_many([b[0].id, 100], BookStatus.in_storage))
+
+        self.assertEqual(events, [[b[0], b[2]]])
+        self.assertEqual(b[0].status, BookStatus.loaned)
+        self.assertCountEqual(storage.books_with_status(BookStatus.loaned), b)
+        self.assertEqual(storage.statistics.count_by_status(BookStatus.loaned), 3)
+
     def test_books_count(self: Self):
         storage = BookStorage('t')
         b = storage.new_book('title', 'author', 255)
@@ -97,6 +126,220 @@ class BookStorageTestSuite(unittest.TestCase):
 
         self.assertCountEqual(storage.find_books(DefaultBookSearchCondition().by_year(256)), [b[1]])
 
+    def test_find_books_by_author(self: Self):
+        storage = BookStorage('t')
+        b = [
+            storage.new_book('Война и мир', 'Лев Толстой', 1869),
+            storage.new_book('Аэлита', 'Алексей Толстой', 1923),
+            storage.new_book('Руслан и Людмила', 'Пушкин', 1820)
+        ]
+        storage.remove_book(b[1])
+        b.append(storage.new_book('Воскресение', 'Лев Толстой', 1899))
+
+        self.assertIs(b[0].author, b[3].author)
+        self.assertCountEqual(storage.find_books(DefaultBookSearchCondition().by_author_substring('толстой')), [b[0], b[3]])
+        self.assertCountEqual(storage.find_books(DefaultBookSearchCondition().by_author_substring('толстой').by_year(1899)), [b[3]])
+        self.assertEqual(storage.find_books(DefaultBookSearchCondition().by_author_substring('алексей')), [])
+
+    def test_complete(self: Self):
+        storage = BookStorage('t')
+        b = storage.new_book('Война и мир', 'Лев Толстой', 1869)
+        storage.new_book('Воскресение', 'Лев Толстой', 1899)
+
+        self.assertEqual(['война', 'воскресение'], storage.complete_title('во'))
+        self.assertEqual(['лев'], storage.complete_author('Л'))
+
+        storage.remove_book(b)
+
+        self.assertEqual(['воскресение'], storage.complete_title('во'))
+
+    def test_set_status(self: Self):
+        storage = BookStorage('t')
+        b = storage.new_book('title', 'author', 255)
+
+        storage.set_status(b, BookStatus.loaned)
+
+        self.assertEqual(b.status, BookStatus.loaned)
+        self.assertRaises(KeyError, lambda: storage.set_status(Book(b.id, 'title', 'author', 255), BookStatus.loaned))
+
+    def test_books_with_status(self: Self):
+        storage = BookStorage('t')
+        b = [
+            storage.new_book('title', 'author', 255),
+            storage.new_book('title', 'author', 256),
+            storage.new_book('title', 'author', 257)
+        ]
+        storage.set_status(b[0], BookStatus.loaned)
+        storage.set_status(b[2], BookStatus.loaned)
+        storage.remove_book(b[2])
+
+        self.assertCountEqual(storage.books_with_status(BookStatus.loaned), [b[0]])
+        self.assertCountEqual(storage.books_with_status(BookStatus.in_storage), [b[1]])
+
+        storage.set_status(b[0], BookStatus.in_storage)
+
+        self.assertCountEqual(storage.books_with_status(BookStatus.loaned), [])
+
+    def test_statistics(self: Self):
+        storage = BookStorage('t')
+        b = [
+            storage.new_book('title', 'author', 255),
+            storage.new_book('title', 'author', 256),
+            storage.new_book('title', 'other', 256)
+        ]
+        storage.set_status(b[0], BookStatus.loaned)
+        storage.remove_book(b[1])
+
+        stats = storage.statistics
+        self.assertEqual(stats.total, 2)
+        self.assertEqual(stats.count_by_status(BookStatus.loaned), 1)
+        self.assertEqual(stats.count_by_status(BookStatus.in_storage), 1)
+        self.assertEqual(stats.books_per_year(), {255: 1, 256: 1})
+        self.assertEqual(stats.top_authors(), [('author', 1), ('other', 1)])
+
+    def test_statistics_after_load(self: Self):
+        storage = BookStorage('t')
+        storage.set_status(storage.new_book('title', 'author', 255), BookStatus.loaned)
+        storage.save_to_disk()
+
+        storage = BookStorage.load_from_disk('t')
+
+        self.assertEqual(storage.statistics.count_by_status(BookStatus.loaned), 1)
+        self.assertEqual(storage.statistics.books_by_author('author'), 1)
+
+        os.remove('t')
+
+    def test_indexes_after_load(self: Self):
+        #индексы, построенные целиком при загрузке, должны совпадать с построенными по одной книге
+        storage = BookStorage('t')
+        for i in range(300):
+            book = storage.new_book(f'Книга {i % 7} том {i % 3}', f'Автор {i % 11}', 1900 + i % 5)
+            if i % 4 == 0:
+                storage.set_status(book, BookStatus.loaned)
+        storage.save_to_disk()
+
+        loaded = BookStorage.load_from_disk('t')
+
+        self.assertEqual(loaded.complete_title('т'), storage.complete_title('т'))
+        self.assertEqual(loaded.complete_author('а'), storage.complete_author('а'))
+        self.assertEqual(loaded.statistics.top_authors(), storage.statistics.top_authors())
+        self.assertEqual(loaded.statistics.books_per_year(), storage.statistics.books_per_year())
+        self.assertEqual(loaded.duplicate_count, storage.duplicate_count)
+        self.assertEqual(len(loaded.books_with_status(BookStatus.loaned)), 75)
+        self.assertEqual([b.id for b in loaded.find_books(DefaultBookSearchCondition().by_author_substring('автор 1').by_year(1901))],
+                         [b.id for b in storage.find_books(DefaultBookSearchCondition().by_author_substring('автор 1').by_year(1901))])
+
+        os.remove('t')
+
+    def test_snapshot(self: Self):
+        storage = BookStorage('t')
+        b = [storage.new_book('title', 'author', i) for i in range(3)]
+
+        #изменения после снятия снимка не должны быть видны в снимке
+        snapshot = storage.snapshot()
+        storage.set_status(b[0], BookStatus.loaned)
+        storage.remove_book(b[1])
+        storage.new_book('title', 'author', 3)
+
+        self.assertEqual(snapshot.books_count, 3)
+        self.assertEqual([book.year for book in snapshot.books()], [0, 1, 2])
+        self.assertEqual(snapshot.find_book_by_id(0).status, BookStatus.in_storage)
+        self.assertEqual(b[0].status, BookStatus.loaned)
+        self.assertIs(snapshot.find_book_by_id(2), b[2])
+        self.assertEqual(list(snapshot.serialize_rows()), [Book(i, 'title', 'author', i).serialize_row() for i in range(3)])
+        self.assertEqual(snapshot.find_books(DefaultBookSearchCondition().by_status(BookStatus.loaned)), [])
+
+        self.assertEqual(storage.books_count, 3)
+        self.assertEqual(storage.snapshot().find_book_by_id(0).status, BookStatus.loaned)
+        self.assertRaises(KeyError, lambda: storage.snapshot().find_book_by_id(1))
+
+    def test_unsaved_changes(self: Self):
+        storage = BookStorage('t')
+        self.assertFalse(storage.has_unsaved_changes)
+
+        storage.new_book('title', 'author', 255)
+        self.assertTrue(storage.has_unsaved_changes)
+
+        storage.save_to_disk()
+        self.assertFalse(storage.has_unsaved_changes)
+        self.assertFalse(os.path.exists('t.tmp'))
+
+        os.remove('t')
+
+    def test_save_load_empty(self: Self):
+        storage = BookStorage('t')
+        storage.save_to_disk()
+
+        storage = BookStorage.load_from_disk('t')
+
+        self.assertEqual(storage.books_count, 0)
+
+        os.remove('t')
+
+    def test_save_load_compressed(self: Self):
+        for path in ['t.json.gz', 't.json.xz', 't.json.bz2']:
+            storage = BookStorage(path)
+            b = storage.new_book('Война и мир', 'Лев Толстой', 1869)
+            storage.set_status(b, BookStatus.loaned)
+            storage.save_to_disk()
+
+            with open(path, 'rb') as f:
+                self.assertFalse(f.read().startswith(b'{'))
+
+            storage = BookStorage.load_from_disk(path)
+            loaded = storage.find_book_by_id(b.id)
+            self.assertEqual(loaded.title, 'Война и мир')
+            self.assertEqual(loaded.author, 'Лев Толстой')
+            self.assertEqual(loaded.status, BookStatus.loaned)
+
+            os.remove(path)
+
+    def test_load_legacy_format(self: Self):
+        with open('t', 'w') as f:
+            f.write('{"books": [{"id": 3, "title": "title", "author": "author", "year": 255, "status": 1}]}')
+
+        storage = BookStorage.load_from_disk('t')
+
+        self.assertEqual(storage.find_book_by_id(3).status, BookStatus.loaned)
+        self.assertEqual(storage.new_book('title', 'author', 256).id, 4)
+
+        os.remove('t')
+
+    def test_load_truncated(self: Self):
+        storage = BookStorage('t')
+        storage.new_book('title', 'author', 255)
+        storage.new_book('title', 'author', 256)
+        storage.save_to_disk()
+
+        with open('t') as f:
+            lines = f.readlines()
+        with open('t', 'w') as f:
+            f.writelines(lines[:2])
+
+        self.assertRaises(ValueError, lambda: BookStorage.load_from_disk('t'))
+
+        os.remove('t')
+
+    def test_load_invalid_record(self: Self):
+        storage = BookStorage('t')
+        for i in range(3):
+            storage.new_book('title', 'author', 255 + i)
+        storage.save_to_disk()
+
+        with open('t') as f:
+            lines = f.readlines()
+        lines[3] = lines[3].replace('"author"', '7')
+        with open('t', 'w') as f:
+            f.writelines(lines)
+
+        for workers in (1, 2):
+            with self.assertRaises(BookRecordError) as context:
+                BookStorage.load_from_disk('t', workers=workers)
+            self.assertEqual(context.exception.record, 2)
+            self.assertEqual(context.exception.line, 4)
+
+        os.remove('t')
+
     def test_save_load(self: Self):
         storage = BookStorage('t')
         bl = [
@@ -156,6 +399,64 @@ class DefaultBookSearchConditionTestSuite(unittest.TestCase):
         f = storage.find_books(DefaultBookSearchCondition().by_year(16))
         self.assertEqual(0, len(f))
 
+    def test_by_title_substring(self: Self):
+        storage = BookStorage('t')
+        b = [
+            storage.new_book('Война и мир', 'Толстой', 1869)
+        ]
+
+        f = storage.find_books(DefaultBookSearchCondition().by_title_substring('ВОЙНА'))
+        self.assertCountEqual(b, f)
+        f = storage.find_books(DefaultBookSearchCondition().by_title_substring('и м'))
+        self.assertCountEqual(b, f)
+        f = storage.find_books(DefaultBookSearchCondition().by_title_substring('мир!'))
+        self.assertEqual(0, len(f))
+
+    def test_by_year_range(self: Self):
+        storage = BookStorage('t')
+        b = [storage.new_book('Книга', 'Автор', 1900 + i) for i in range(10)]
+        storage.set_status(b[3], BookStatus.loaned)
+        storage.remove_book(b[4])
+        cond = DefaultBookSearchCondition().by_year_range(1902, 1905)
+
+        self.assertEqual(storage.find_books(cond), [b[2], b[3], b[5]])
+        self.assertEqual([book for book in storage.all_books() if cond.matches(book)], [b[2], b[3], b[5]])
+        self.assertEqual(storage.find_books(cond.by_status(BookStatus.loaned)), [b[3]])
+        self.assertEqual(storage.find_books(DefaultBookSearchCondition().by_year_range(max=1901).by_title_substring('книга')), b[:2])
+
+    def test_by_author_substring(self: Self):
+        storage = BookStorage('t')
+        b = [
+            storage.new_book('Ёлка', 'Лев Толстой', 1869)
+        ]
+
+        f = storage.find_books(DefaultBookSearchCondition().by_author_substring('толстой'))
+        self.assertCountEqual(b, f)
+        f = storage.find_books(DefaultBookSearchCondition().by_title_substring('елка'))
+        self.assertCountEqual(b, f)
+        f = storage.find_books(DefaultBookSearchCondition().by_author_substring('пушкин'))
+        self.assertEqual(0, len(f))
+
+    def test_substring_matches_without_storage(self: Self):
+        b = Book(0, 'Ёлка', 'Лев Толстой', 1869)
+
+        self.assertTrue(DefaultBookSearchCondition().by_author_substring('ТОЛСТОЙ').by_title_substring('елк').matches(b))
+        self.assertFalse(DefaultBookSearchCondition().by_author_substring('пушкин').matches(b))
+
+    def test_by_status(self: Self):
+        storage = BookStorage('t')
+        b = [
+            storage.new_book('title', 'author', 15),
+            storage.new_book('title', 'author', 16)
+        ]
+        storage.set_status(b[1], BookStatus.loaned)
+
+        f = storage.find_books(DefaultBookSearchCondition().by_status(BookStatus.loaned))
+        self.assertCountEqual([b[1]], f)
+        f = storage.find_books(DefaultBookSearchCondition().by_status(BookStatus.loaned).by_year(15))
+        self.assertEqual(0, len(f))
+        self.assertTrue(DefaultBookSearchCondition().by_status(BookStatus.in_storage).matches(b[0]))
+
     def test_mixed(self: Self):
         storage = BookStorage('t')
         b = [
@@ -167,5 +468,45 @@ class DefaultBookSearchConditionTestSuite(unittest.TestCase):
         f = storage.find_books(DefaultBookSearchCondition().by_author(re.compile('author')).by_title(re.compile('title')).by_year(16))
         self.assertEqual(0, len(f))
 
+    def test_duplicates(self: Self):
+        storage = BookStorage('t')
+        a = storage.new_book('Ёлка', 'Лев Толстой', 1869)
+        b = storage.new_book('елка', 'лев толстой', 1869)
+        storage.new_book('Ёлка', 'Лев Толстой', 1870)
+
+        self.assertEqual(storage.find_duplicates('ЁЛКА', 'Лев толстой', 1869), [a, b])
+        self.assertEqual(storage.find_duplicates('Ёлка', 'Пушкин', 1869), [])
+        self.assertEqual(storage.duplicate_groups(), [[a, b]])
+        self.assertEqual(storage.duplicate_count, 1)
+
+        storage.remove_book(a)
+        self.assertEqual(storage.find_duplicates('Ёлка', 'Лев Толстой', 1869), [b])
+        self.assertEqual(storage.duplicate_groups(), [])
+
+    def test_import_books(self: Self):
+        storage = BookStorage('t')
+        existing = storage.new_book('title', 'author', 1)
+        added_events : list[list[Book]] = []
+        storage.books_added_event += added_events.append
+
+        added = storage.import_books([('Title', 'Author', 1), ('other', 'author', 2), ('other', 'author', 2)])
+        self.assertEqual([(b.title, b.year) for b in added], [('other', 2)])
+        self.assertEqual(added_events, [added])
+        self.assertEqual(storage.books_count, 2)
+
+        added = storage.import_books([('title', 'author', 1)], skip_duplicates=False)
+        self.assertEqual(storage.duplicate_groups(), [[existing, added[0]]])
+
+    def test_search_keywords(self: Self):
+        storage = BookStorage('t')
+        a = storage.new_book('Война и мир', 'Лев Толстой', 1869)
+        b = storage.new_book('Мир', 'Пушкин', 1)
+
+        self.assertEqual(storage.search_keywords('мир толстой'), [a, b])
+        #после построения индекс обновляется при изменениях
+        c = storage.new_book('Мир толстой книги', 'Толстой', 1)
+        storage.remove_book(a)
+        self.assertEqual(storage.search_keywords('мир толстой'), [c, b])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
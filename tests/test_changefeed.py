@@ -0,0 +1,95 @@
+import unittest
+from modules.books import BookStorage, BookStatus
+from modules.changefeed import ChangeFeed, ChangeFeedServer, ChangeFeedError, read_feed, follow
+from typing import Self
+import os
+import tempfile
+
+class ChangeFeedTestSuite(unittest.TestCase):
+    def test_records(self: Self):
+        storage = BookStorage('t')
+        feed = ChangeFeed(storage)
+        a = storage.new_book('a', 'x', 1)
+        b = storage.new_book('b', 'y', 2)
+        storage.set_status_many([a.id, b.id], BookStatus.loaned)
+        storage.remove_book(a)
+
+        records = list(feed.records_after(0))
+        self.assertEqual([r['seq'] for r in records], [1, 2, 3, 4, 5])
+        self.assertEqual([r['op'] for r in records], ['add', 'add', 'update', 'update', 'delete'])
+        self.assertEqual(records[0]['book'], [a.id, 'a', 'x', 1, BookStatus.in_storage.serialize()])
+        self.assertEqual(records[2]['book'][4], BookStatus.loaned.serialize())
+        self.assertEqual(records[4]['id'], a.id)
+        self.assertEqual([r['seq'] for r in feed.records_after(3)], [4, 5])
+        feed.close()
+
+    def test_history_overflow(self: Self):
+        storage = BookStorage('t')
+        feed = ChangeFeed(storage, history=2)
+        for i in range(3):
+            storage.new_book('t', 'a', i)
+
+        self.assertIsNone(feed.records_after(0))
+        self.assertEqual([r['seq'] for r in feed.records_after(1)], [2, 3])
+
+    def test_file_resume(self: Self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, 'feed')
+            storage = BookStorage('t')
+            feed = ChangeFeed(storage, path)
+            book = storage.new_book('a', 'x', 1)
+            feed.close()
+            #запись, прерванная аварийным завершением
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('{"seq": 2, "op"')
+
+            feed = ChangeFeed(storage, path)
+            self.assertEqual(feed.sequence, 1)
+            storage.remove_book(book)
+            feed.close()
+
+            self.assertEqual([(r['seq'], r['op']) for r in read_feed(path)], [(1, 'add'), (2, 'delete')])
+            self.assertEqual([r['seq'] for r in read_feed(path, 1)], [2])
+
+    def test_file_gap(self: Self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, 'feed')
+            storage = BookStorage('t')
+            feed = ChangeFeed(storage, path)
+            for i in range(3):
+                storage.new_book('t', 'a', i)
+            #ротация файла ленты: первая запись удалена
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(lines[1:])
+
+            self.assertIsNone(feed.records_after(0))
+            self.assertEqual([r['seq'] for r in feed.records_after(1)], [2, 3])
+            self.assertEqual([r['seq'] for r in feed.records_after(1, 2)], [2])
+            self.assertEqual(list(feed.records_after(3)), [])
+            feed.close()
+
+    def test_socket(self: Self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, 'feed.sock')
+            storage = BookStorage('t')
+            feed = ChangeFeed(storage)
+            server = ChangeFeedServer(feed, path).start()
+            for i in range(3):
+                storage.new_book('t', 'a', i)
+
+            records = follow(path, 1)
+            self.assertEqual(next(records)['seq'], 2)
+            self.assertEqual(next(records)['seq'], 3)
+            storage.new_book('t', 'a', 4)
+            self.assertEqual(next(records)['book'][3], 4)
+            records.close()
+
+            with self.assertRaises(ChangeFeedError):
+                next(follow(path, 10))
+            server.stop()
+            feed.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from modules.books import Book, BookStatus
+from modules.columns import create_numeric_columns
+from typing import Self
+
+@unittest.skipIf(create_numeric_columns() is None, 'NumPy не установлен')
+class NumericColumnsTestSuite(unittest.TestCase):
+    def test_select(self: Self):
+        columns = create_numeric_columns()
+        assert columns is not None
+        books = [Book(i, 'title', 'author', 1900 + i) for i in range(3000)]
+        for book in books:
+            columns.add(book)
+        books[5].status = BookStatus.loaned
+        columns.update_status(books[5], BookStatus.in_storage)
+        columns.remove(books[6])
+
+        self.assertEqual(columns.select(year=1905), [5])
+        self.assertEqual(columns.select(year_min=1904, year_max=1907), [4, 5, 7])
+        self.assertEqual(columns.select(year_max=1906, status=BookStatus.loaned), [5])
+        self.assertEqual(columns.select(year_min=1 << 70), [])
+        self.assertEqual(len(columns.select(year_min=-(1 << 70))), 2999)
+
+    def test_year_out_of_range(self: Self):
+        columns = create_numeric_columns()
+        assert columns is not None
+        columns.add(Book(0, 'title', 'author', 1 << 70))
+
+        self.assertFalse(columns.usable)
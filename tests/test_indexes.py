@@ -0,0 +1,175 @@
+import unittest
+import random
+from modules.books import Book
+from modules.indexes import TokenPrefixIndex, AuthorDictionary, SearchKeysIndex, KeywordIndex
+from modules.columns import numpy_module
+from typing import Self
+
+class TokenPrefixIndexTestSuite(unittest.TestCase):
+    def test_complete_by_frequency(self: Self):
+        index = TokenPrefixIndex(lambda book: book.author)
+        index.add(Book(0, 'a', 'Лев Толстой', 1))
+        index.add(Book(1, 'b', 'Алексей Толстой', 1))
+        index.add(Book(2, 'c', 'Тол Тоши', 1))
+
+        self.assertEqual(['толстой', 'тол', 'тоши'], index.complete('То'))
+        self.assertEqual(['толстой'], index.complete('тол', 1))
+        self.assertEqual([], index.complete('пушкин'))
+
+    def test_remove(self: Self):
+        index = TokenPrefixIndex(lambda book: book.title)
+        b = Book(0, 'Война и мир', 'a', 1)
+        index.add(b)
+        index.complete('в')
+        index.add(Book(1, 'Вишнёвый сад', 'a', 1))
+
+        self.assertEqual(['вишневый', 'война'], index.complete('в'))
+
+        index.remove(b)
+
+        self.assertEqual(['вишневый'], index.complete('в'))
+
+    def test_many_new_tokens(self: Self):
+        index = TokenPrefixIndex(lambda book: book.title)
+        for i in range(100):
+            index.add(Book(i, f'слово{i:03}', 'a', 1))
+
+        self.assertEqual(['слово000', 'слово001'], index.complete('слово00', 2))
+
+    def test_short_prefix_lists(self: Self):
+        #списки лучших слов коротких префиксов должны совпадать с полным перебором после добавлений и удалений
+        rng = random.Random(1)
+        index = TokenPrefixIndex(lambda book: book.title)
+        books : list[Book] = []
+        def expected(prefix: str, limit: int) -> list[str]:
+            counts : dict[str, int] = {}
+            for book in books:
+                for token in set(book.title.split()):
+                    if token.startswith(prefix):
+                        counts[token] = counts.get(token, 0) + 1
+            return sorted(counts, key=lambda t: (-counts[t], t))[:limit]
+
+        for i in range(3000):
+            if books and rng.random() < 0.4:
+                index.remove(books.pop(rng.randrange(len(books))))
+            else:
+                book = Book(i, ' '.join(f'с{rng.randint(0, 80)}' for _ in range(3)), 'a', 1)
+                books.append(book)
+                index.add(book)
+            if i % 100 == 0:
+                for prefix in ('', 'с', 'с1', 'с12'):
+                    self.assertEqual(expected(prefix, 10), index.complete(prefix), prefix)
+
+class KeywordIndexTestSuite(unittest.TestCase):
+    def _index(self: Self, books: list[Book], np: object | None) -> KeywordIndex:
+        keys = SearchKeysIndex()
+        index = KeywordIndex(keys, np)
+        for book in books:
+            keys.add(book)
+            index.add(book)
+        return index
+
+    def _check_ranking(self: Self, np: object | None):
+        books = [
+            Book(0, 'Война и мир', 'Лев Толстой', 1),
+            Book(1, 'Анна Каренина', 'Лев Толстой', 1),
+            Book(2, 'Мир', 'Пушкин', 1),
+            Book(3, 'Война миров', 'Уэллс', 1),
+            Book(4, 'Мир мир мир', 'Автор', 1)
+        ]
+        index = self._index(books, np)
+
+        #редкие слова весят больше: "война" и "толстой" встречаются в двух книгах, "мир" - в трёх
+        self.assertEqual([id for id, _ in index.search('война мир толстой')], [0, 3, 1, 4, 2])
+        self.assertEqual([id for id, _ in index.search('ТОЛСТОЙ', 1)], [1])
+        self.assertEqual(index.search('пастернак'), [])
+
+        index.remove(books[0])
+        index.remove(books[4])
+        self.assertEqual([id for id, _ in index.search('мир толстой')], [2, 1])
+        index.remove(books[2])
+        self.assertEqual([id for id, _ in index.search('мир')], [])
+
+    def test_ranking(self: Self):
+        self._check_ranking(None)
+
+    @unittest.skipIf(numpy_module() is None, 'NumPy не установлен')
+    def test_ranking_vectorized(self: Self):
+        self._check_ranking(numpy_module())
+
+    def test_author_tokens_released(self: Self):
+        books = [Book(i, f'книга {i}', f'автор {i % 3}', 1) for i in range(6)] + [Book(6, '', '', 1)]
+        index = self._index(books, None)
+        self.assertEqual(len(index._author_tokens), 3)
+
+        for book in books[:3]:
+            index.remove(book)
+        self.assertEqual(len(index._author_tokens), 3)
+        for book in books[3:]:
+            index.remove(book)
+        #слова автора забываются вместе с его последней книгой
+        self.assertEqual(index._author_tokens, {})
+        self.assertEqual(index.search('автор'), [])
+
+    def _check_limit(self: Self, np: object | None):
+        books = [Book(i, 'Война и мир', 'Лев Толстой', 1) for i in range(5)]
+        books += [Book(i, 'Мир', 'Пушкин', 1) for i in range(5, 25)]
+        index = self._index(books, np)
+
+        #книги 0-4 совпадают с тремя словами, но должны занимать в результате по одному месту
+        self.assertEqual([id for id, _ in index.search('война мир толстой', 10)], list(range(10)))
+
+    def test_limit(self: Self):
+        self._check_limit(None)
+
+    @unittest.skipIf(numpy_module() is None, 'NumPy не установлен')
+    def test_limit_vectorized(self: Self):
+        self._check_limit(numpy_module())
+
+    @unittest.skipIf(numpy_module() is None, 'NumPy не установлен')
+    def test_same_scores(self: Self):
+        words = ['война', 'мир', 'сад', 'дом', 'толстой', 'чехов']
+        books = [Book(i, f'{words[i % 6]} {words[i % 5]}', f'{words[i % 4]} {words[i % 3]}', 1) for i in range(500)]
+        python = self._index(books, None)
+        vectorized = self._index(books, numpy_module())
+
+        self.assertEqual(python.search('война мир чехов', 50), vectorized.search('война мир чехов', 50))
+
+class AuthorDictionaryTestSuite(unittest.TestCase):
+    def test_shared_strings(self: Self):
+        index = AuthorDictionary()
+        a = Book(0, 'a', ''.join(['Лев ', 'Толстой']), 1)
+        b = Book(1, 'b', ''.join(['Лев ', 'Толстой']), 1)
+        self.assertIsNot(a.author, b.author)
+        index.add(a)
+        index.add(b)
+
+        self.assertIs(a.author, b.author)
+        self.assertEqual(1, len(index))
+        self.assertEqual(index.book_codes[0], index.book_codes[1])
+
+    def test_release_codes(self: Self):
+        index = AuthorDictionary()
+        a = Book(0, 'a', 'Пушкин', 1)
+        b = Book(1, 'b', 'Гоголь', 1)
+        index.add(a)
+        index.add(b)
+        code = index.code_of('Пушкин')
+        index.remove(a)
+
+        self.assertIsNone(index.code_of('Пушкин'))
+        self.assertEqual(1, len(index))
+        index.add(Book(2, 'c', 'Лермонтов', 1))
+        self.assertEqual(code, index.code_of('Лермонтов'))
+
+    def test_select(self: Self):
+        index = AuthorDictionary()
+        index.add(Book(0, 'a', 'Лев Толстой', 1))
+        index.add(Book(1, 'b', 'Пушкин', 1))
+        flags = index.select(lambda author, key: 'толст' in key)
+
+        self.assertEqual(1, flags[index.code_of('Лев Толстой')]) # type: ignore
+        self.assertEqual(0, flags[index.code_of('Пушкин')]) # type: ignore
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from modules.books import BookStorage, BookStatus, DefaultBookSearchCondition
+from modules.lazy_load import OffsetIndex, sidecar_path
+from typing import Self
+import os
+import tempfile
+
+class LazyLoadTestSuite(unittest.TestCase):
+    def setUp(self: Self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'db.json')
+        storage = BookStorage(self.path)
+        for i in range(100):
+            storage.new_book(f'title {i}', f'author {i % 7}', 1900 + i)
+        storage.save_to_disk()
+
+    def tearDown(self: Self):
+        self._dir.cleanup()
+
+    def test_lookup(self: Self):
+        storage = BookStorage.load_from_disk(self.path, lazy=True, cache_size=2)
+        lazy = storage._lazy
+
+        self.assertEqual(storage.books_count, 100)
+        self.assertEqual(lazy.decoded_count, 0)
+        book = storage.find_book_by_id(42)
+        self.assertEqual((book.title, book.year), ('title 42', 1942))
+        self.assertTrue(storage.has_book_with_id(99))
+        self.assertFalse(storage.has_book_with_id(100))
+        with self.assertRaises(KeyError):
+            storage.find_book_by_id(100)
+
+        #пока на книгу есть ссылка, возвращается тот же экземпляр, даже после вытеснения из кэша
+        for id in range(3):
+            storage.find_book_by_id(id)
+        self.assertEqual(len(lazy._cache), 2)
+        self.assertIs(storage.find_book_by_id(42), book)
+        self.assertEqual(lazy.decoded_count, 4)
+
+    def test_changes(self: Self):
+        storage = BookStorage.load_from_disk(self.path, lazy=True)
+        book = storage.find_book_by_id(5)
+        storage.set_status(book, BookStatus.loaned)
+        storage.remove_book(storage.find_book_by_id(6))
+        storage.remove_books([7, 8])
+        new = storage.new_book('new', 'author', 2000)
+
+        self.assertEqual(new.id, 100)
+        self.assertEqual(storage.books_count, 98)
+        self.assertFalse(storage.has_book_with_id(7))
+        self.assertIs(storage.find_book_by_id(5), book)
+        self.assertEqual(len(storage.all_books()), 98)
+        with self.assertRaises(KeyError):
+            storage.set_status(storage.snapshot().find_book_by_id(9), BookStatus.loaned)
+
+        storage.save_to_disk()
+        loaded = BookStorage.load_from_disk(self.path)
+        self.assertEqual(loaded.books_count, 98)
+        self.assertEqual(loaded.find_book_by_id(5).status, BookStatus.loaned)
+        self.assertEqual(loaded.find_book_by_id(100).title, 'new')
+        self.assertEqual(loaded.find_book_by_id(99).title, 'title 99')
+
+    def test_snapshot_shares_detached(self: Self):
+        storage = BookStorage.load_from_disk(self.path, lazy=True)
+        storage.remove_books([1])
+        snapshot = storage.snapshot()
+        #снимок не копирует множество удалённых книг, копию делает источник при следующем изменении
+        self.assertIs(snapshot._lazy._detached, storage._lazy._detached)
+
+        storage.remove_books([2])
+
+        self.assertIsNot(snapshot._lazy._detached, storage._lazy._detached)
+        self.assertIsNotNone(snapshot.find_book_by_id(2))
+        with self.assertRaises(KeyError):
+            snapshot.find_book_by_id(1)
+        self.assertFalse(storage.has_book_with_id(2))
+
+    def test_list_compact(self: Self):
+        storage = BookStorage.load_from_disk(self.path, lazy=True)
+        books = storage.all_books()
+        for position in range(0, 100, 2):
+            books[position] = None
+        books.compact()
+
+        self.assertEqual(storage._lazy.decoded_count, 0)
+        self.assertEqual(books.ids(), list(range(1, 100, 2)))
+        self.assertEqual(books[0].title, 'title 1')
+
+    def test_materialize(self: Self):
+        storage = BookStorage.load_from_disk(self.path, lazy=True)
+        book = storage.find_book_by_id(3)
+        found = storage.find_books(DefaultBookSearchCondition().by_author_substring('author 3'))
+
+        self.assertIsNone(storage._lazy)
+        self.assertEqual(len(found), 14)
+        self.assertIn(book, found)
+        self.assertEqual(storage.statistics.total, 100)
+
+    def test_materialize_order(self: Self):
+        storage = BookStorage.load_from_disk(self.path, lazy=True)
+        storage.find_book_by_id(50)
+        storage.find_book_by_id(6)
+        storage.new_book('new', 'author 1', 2000)
+        storage.find_books(DefaultBookSearchCondition().by_author_substring('author 1'))
+
+        #после полной загрузки книги идут по возрастанию ID, как при обычной загрузке
+        ids = [book.id for book in storage.all_books()]
+        self.assertEqual(ids, sorted(ids))
+        found = [book.id for book in storage.find_books(DefaultBookSearchCondition().by_author_substring('author 1'))]
+        self.assertEqual(found, sorted(found))
+        self.assertEqual(len(found), 16)
+        found = [book.id for book in storage.books_with_status(BookStatus.in_storage)]
+        self.assertEqual(found, sorted(found))
+
+    def test_sidecar(self: Self):
+        BookStorage.load_from_disk(self.path, lazy=True)
+        stat = os.stat(self.path)
+        self.assertIsNotNone(OffsetIndex.load(sidecar_path(self.path), stat.st_size, stat.st_mtime_ns))
+        self.assertIsNone(OffsetIndex.load(sidecar_path(self.path), stat.st_size + 1, stat.st_mtime_ns))
+
+        storage = BookStorage.load_from_disk(self.path, lazy=True)
+        self.assertEqual(storage.find_book_by_id(10).title, 'title 10')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from modules.books import BookStorage
+from modules.loader import BackgroundStorageLoader
+from typing import Self
+import os
+
+class BackgroundStorageLoaderTestSuite(unittest.TestCase):
+    def test_load(self: Self):
+        storage = BookStorage('t')
+        b = storage.new_book('title', 'author', 255)
+        storage.save_to_disk()
+
+        loader = BackgroundStorageLoader('t').start()
+        loaded = loader.result()
+
+        self.assertTrue(loader.done)
+        loaded_units, total_units = loader.progress
+        self.assertEqual(loaded_units, total_units)
+        self.assertIsNone(loader.take_error())
+        self.assertEqual(loaded.find_book_by_id(b.id).title, 'title')
+
+        os.remove('t')
+
+    def test_load_missing_file(self: Self):
+        loader = BackgroundStorageLoader('missing').start()
+        storage = loader.result()
+
+        #отсутствие файла - не ошибка: загрузка сразу завершается пустым хранилищем
+        self.assertTrue(loader.done)
+        self.assertEqual(storage.books_count, 0)
+        self.assertTrue(loader.missing)
+        self.assertIsNone(loader.take_error())
+
+    def test_load_error(self: Self):
+        with open('t', 'w') as file:
+            file.write('{')
+
+        loader = BackgroundStorageLoader('t').start()
+        storage = loader.result()
+
+        self.assertEqual(storage.books_count, 0)
+        self.assertFalse(loader.missing)
+        self.assertIsNotNone(loader.take_error())
+        self.assertIsNone(loader.take_error())
+
+        os.remove('t')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from modules import metrics
+from modules.metrics import LatencyHistogram, MetricsRegistry, instrumented
+from modules.events import Event
+from typing import Self
+import json
+import os
+import threading
+import time
+
+class LatencyHistogramTestSuite(unittest.TestCase):
+    def test_empty(self: Self):
+        h = LatencyHistogram()
+        self.assertEqual(h.count, 0)
+        self.assertEqual(h.percentile(50), 0.0)
+
+    def test_percentiles(self: Self):
+        h = LatencyHistogram()
+        for _ in range(90):
+            h.record(0.001)
+        for _ in range(10):
+            h.record(1.0)
+
+        self.assertEqual(h.count, 100)
+        #перцентиль оценивается сверху с точностью до корзины (2 ** 0.25)
+        self.assertTrue(0.001 <= h.percentile(50) < 0.001 * 1.2)
+        self.assertTrue(1.0 <= h.percentile(95) < 1.2)
+        self.assertTrue(1.0 <= h.percentile(99) < 1.2)
+
+    def test_out_of_range(self: Self):
+        h = LatencyHistogram()
+        h.record(0)
+        h.record(10 ** 6)
+        self.assertEqual(h.count, 2)
+
+class MetricsRegistryTestSuite(unittest.TestCase):
+    def test_dump_json(self: Self):
+        reg = MetricsRegistry()
+        reg.record('op', 0.5)
+        reg.dump('t.json')
+
+        with open('t.json') as f:
+            data = json.load(f)
+        os.remove('t.json')
+
+        self.assertEqual(data['op']['count'], 1)
+        self.assertEqual(data['op']['sum_s'], 0.5)
+
+    def test_prometheus(self: Self):
+        reg = MetricsRegistry()
+        reg.record('op', 0.5)
+        text = reg.to_prometheus()
+
+        self.assertIn('library_operation_duration_seconds_count{op="op"} 1', text)
+        self.assertIn('quantile="0.99"', text)
+
+    def test_threads(self: Self):
+        reg = MetricsRegistry()
+
+        def record(thread: int) -> None:
+            for i in range(2000):
+                reg.record(f'op {i % 50}', 0.001 * thread)
+
+        threads = [threading.Thread(target=record, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        data = reg.to_json()
+        self.assertEqual(len(data), 50)
+        self.assertEqual(sum(h['count'] for h in data.values()), 8000)
+
+class InstrumentedTestSuite(unittest.TestCase):
+    def tearDown(self: Self):
+        metrics.disable()
+
+    def test_disabled(self: Self):
+        f = instrumented('f')(lambda x: x + 1)
+        self.assertEqual(f(1), 2)
+        self.assertIsNone(metrics.registry())
+
+    def test_enabled(self: Self):
+        f = instrumented('f')(lambda x: x + 1)
+        reg = metrics.enable()
+        f(1)
+        f(2)
+        self.assertEqual(reg.histograms['f'].count, 2)
+
+    def test_waiting_excluded(self: Self):
+        def action() -> None:
+            with metrics.waiting():
+                time.sleep(0.05)
+        f = instrumented('f')(action)
+        reg = metrics.enable()
+        f()
+        self.assertLess(reg.histograms['f'].sum, 0.04)
+
+    def test_event_unwrapped_when_disabled(self: Self):
+        call = Event.__call__
+        reg = metrics.enable()
+        self.assertIsNot(Event.__call__, call)
+        Event()()
+        self.assertEqual(reg.histograms['event.call'].count, 1)
+        metrics.disable()
+        self.assertIs(Event.__call__, call)
+
+if __name__ == '__main__':
+    unittest.main()
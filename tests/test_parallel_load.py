@@ -0,0 +1,52 @@
+import os
+import unittest
+from modules.books import BookStorage, BookStatus
+from modules.parallel_load import decode_range, split_ranges, MIN_RANGE_BYTES
+from typing import Self
+
+class ParallelLoadTestSuite(unittest.TestCase):
+    def test_split_ranges(self: Self):
+        self.assertEqual(split_ranges(10, 20, 4), [(10, 20)])
+        ranges = split_ranges(0, MIN_RANGE_BYTES * 3, 8)
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[-1][1], MIN_RANGE_BYTES * 3)
+
+    def test_decode_range_boundaries(self: Self):
+        storage = BookStorage('t')
+        for i in range(50):
+            storage.new_book(f'Книга {i}', 'Автор', 1900 + i)
+        storage.save_to_disk()
+
+        with open('t', 'rb') as f:
+            body_start = len(f.readline())
+        size = os.path.getsize('t')
+
+        #строки, пересекающие границу диапазона, должны попасть ровно в один диапазон
+        for step in (1, 7, 64, size):
+            rows = []
+            closed = False
+            for start in range(body_start, size, step):
+                result = decode_range('t', start, min(start + step, size))
+                self.assertIsNone(result.error)
+                rows.extend(result.rows)
+                closed = closed or result.closed
+            self.assertTrue(closed)
+            self.assertEqual([row[3] for row in rows], list(range(1900, 1950)))
+
+        os.remove('t')
+
+    def test_load_parallel(self: Self):
+        storage = BookStorage('t')
+        for i in range(20):
+            storage.set_status(storage.new_book(f'Книга {i}', 'Автор', 1900 + i), BookStatus.loaned)
+        storage.save_to_disk()
+
+        loaded = BookStorage.load_from_disk('t', workers=2)
+
+        self.assertEqual(loaded.books_count, 20)
+        self.assertEqual(loaded.statistics.count_by_status(BookStatus.loaned), 20)
+        self.assertEqual(loaded.complete_title('кн'), ['книга'])
+        self.assertEqual(loaded.complete_author('а'), ['автор'])
+        self.assertEqual(loaded.new_book('title', 'author', 1).id, 20)
+
+        os.remove('t')
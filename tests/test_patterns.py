@@ -0,0 +1,21 @@
+import re
+import unittest
+from modules.patterns import required_literals, fullmatch_predicate
+from typing import Self
+
+class PatternsTestSuite(unittest.TestCase):
+    def test_required_literals(self: Self):
+        self.assertEqual(required_literals(re.compile('.*мир.*')), ['мир'])
+        self.assertEqual(required_literals(re.compile('Война и (мир|пир)')), ['Война и '])
+        self.assertEqual(required_literals(re.compile('(?:ab){2,}c?')), ['ab'])
+        self.assertEqual(required_literals(re.compile(r'\d*')), [])
+        self.assertIsNone(required_literals(re.compile('.*мир.*', re.IGNORECASE)))
+
+    def test_predicate_equals_fullmatch(self: Self):
+        patterns = ['.*мир.*', '.*?мир.*', '(?s).*мир.*', 'Война и (мир|пир)', '(?:ab){2,}c', 'x(?i:ab)c', r'\w+ \d+', '.*', '.*a\nb.*', '.*\n.*']
+        texts = ['мир', 'Война и мир', 'Война и пир', 'мир\nмир', 'ababc', 'abc', 'xABc', 'xabc', 'том 2', '', 'a\nb', 'x\ny', 'xa\nb\n']
+        for p in patterns:
+            pattern = re.compile(p)
+            predicate = fullmatch_predicate(pattern)
+            for text in texts:
+                self.assertEqual(predicate(text), pattern.fullmatch(text) is not None, (p, text))
@@ -0,0 +1,47 @@
+import unittest
+from modules.rowstore import ChunkedRowStore
+from typing import Self
+
+class ChunkedRowStoreTestSuite(unittest.TestCase):
+    def test_set_delete(self: Self):
+        store = ChunkedRowStore[str]()
+        store.set(0, 'a')
+        store.set(ChunkedRowStore.CHUNK_SIZE + 1, 'b')
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get(ChunkedRowStore.CHUNK_SIZE + 1), 'b')
+        self.assertIsNone(store.get(1))
+
+        store.delete(0)
+        self.assertEqual(len(store), 1)
+        self.assertRaises(KeyError, lambda: store.delete(0))
+
+    def test_set_many(self: Self):
+        store = ChunkedRowStore[int]()
+        store.set(5, -5)
+        view = store.snapshot()
+        store.set_many((i, i) for i in range(3000))
+
+        self.assertEqual(len(store), 3000)
+        self.assertEqual(store.get(5), 5)
+        self.assertEqual(store.get(2999), 2999)
+        self.assertEqual(view.get(5), -5)
+
+    def test_snapshot_is_immutable(self: Self):
+        store = ChunkedRowStore[int]()
+        for i in range(3000):
+            store.set(i, i)
+
+        view = store.snapshot()
+        store.set(0, -1)
+        store.delete(2999)
+        store.set(5000, 5000)
+        second = store.snapshot()
+        store.set(1, -1)
+
+        self.assertEqual(list(view), list(range(3000)))
+        self.assertEqual(view.get(0), 0)
+        self.assertEqual(second.get(1), 1)
+        self.assertEqual(second.get(0), -1)
+        self.assertEqual(len(second), 3000)
+        self.assertEqual(store.get(1), -1)
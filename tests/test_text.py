@@ -0,0 +1,31 @@
+import unittest
+from modules.text import normalize_search_key, count_tokens
+from typing import Self
+
+class NormalizeSearchKeyTestSuite(unittest.TestCase):
+    def test_casefold(self: Self):
+        self.assertEqual('толстой', normalize_search_key('ТолСТОЙ'))
+        self.assertEqual('strasse', normalize_search_key('Straße'))
+
+    def test_nfkc(self: Self):
+        #"й" из двух кодовых точек и полноширинные символы приводятся к каноническому виду
+        self.assertEqual('й', normalize_search_key('й'))
+        self.assertEqual('abc', normalize_search_key('ＡＢＣ'))
+
+    def test_stable(self: Self):
+        #casefold раскладывает "ǰ" и "ΐ" на несколько кодовых точек, ключ снова приводится к NFKC
+        self.assertEqual('\u01f0', normalize_search_key('\u01f0'))
+        self.assertEqual('\u0390', normalize_search_key('\u0390'))
+        self.assertEqual(normalize_search_key('J\u030c'), normalize_search_key('\u01f0'))
+
+    def test_fold_yo(self: Self):
+        self.assertEqual('елка', normalize_search_key('Ёлка'))
+        self.assertEqual('ёлка', normalize_search_key('Ёлка', fold_yo=False))
+
+class CountTokensTestSuite(unittest.TestCase):
+    def test_count(self: Self):
+        #слово считается один раз для каждой строки, даже если встречается в ней несколько раз
+        self.assertEqual(count_tokens(['Мир мир', 'Война и мир', 'Война и мир']), {'мир': 3, 'война': 2, 'и': 2})
+
+if __name__ == '__main__':
+    unittest.main()